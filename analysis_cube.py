@@ -0,0 +1,169 @@
+# analysis_cube.py
+"""
+Cube d'agrégats de la page Data Analyse.
+
+Au chargement, les films sont regroupés par cellule
+(année, langue originale, genre principal, tranche de votes TMDB) ; chaque
+cellule garde le nombre de films et, par métrique, le nombre de valeurs
+renseignées, leur somme et la somme de leurs carrés.
+
+Un changement de filtres ne relit plus les films : on sélectionne les cellules
+concernées et on somme leurs compteurs, d'où moyennes et écarts-types exacts.
+Le nombre de cellules est borné par les dimensions (et non par le catalogue).
+
+Les tranches de votes suivent VOTE_BUCKET_EDGES : le filtre « votes minimum »
+n'est exact que sur ces seuils (ce sont les crans du curseur de la page).
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ["release_year", "original_language", "main_genre", "vote_bucket"]
+
+METRICS = [
+    "vote_average",
+    "imdb_rating",
+    "popularity",
+    "imdb_std",
+    "imdb_polarization",
+]
+
+# Seuils du filtre « Nombre minimal de votes TMDB » (bornes basses des tranches)
+VOTE_BUCKET_EDGES = (0, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000)
+
+_ROWS = "n_rows"
+
+
+def vote_bucket(vote_count: pd.Series) -> np.ndarray:
+    """Indice de tranche de votes (votes manquants = 0 vote)."""
+    votes = pd.to_numeric(vote_count, errors="coerce").fillna(0).to_numpy()
+    return np.searchsorted(VOTE_BUCKET_EDGES, votes, side="right") - 1
+
+
+def min_vote_bucket(min_votes: int) -> int:
+    """Première tranche dont tous les films ont au moins min_votes votes (seuil = borne)."""
+    return int(np.searchsorted(VOTE_BUCKET_EDGES, min_votes, side="left"))
+
+
+def vote_thresholds(max_votes: int) -> List[int]:
+    """Crans utiles du curseur : jusqu'au premier seuil qui dépasse le max du catalogue."""
+    thresholds = []
+    for edge in VOTE_BUCKET_EDGES:
+        thresholds.append(edge)
+        if edge >= max_votes:
+            break
+    return thresholds
+
+
+class AggregateCube:
+    """Cellules (dimensions + compteurs), éventuellement restreintes à une sélection."""
+
+    def __init__(self, cells: pd.DataFrame, dims: List[str], metrics: List[str]):
+        self.cells = cells
+        self.dims = dims
+        self.metrics = metrics
+
+    @classmethod
+    def build(
+        cls,
+        df: pd.DataFrame,
+        metrics: Iterable[str] = METRICS,
+        extra_dim: Optional[str] = None,
+    ) -> "AggregateCube":
+        """
+        Cube des films de df. extra_dim ajoute une dimension multi-valuée
+        (liste par film, ex. "genres") : un film compte alors dans chacune de
+        ses valeurs, les films sans valeur sont ignorés.
+        """
+        metrics = [m for m in metrics if m in df.columns]
+        dims = [*DIMENSIONS, extra_dim] if extra_dim else list(DIMENSIONS)
+
+        base = df.assign(vote_bucket=vote_bucket(df["vote_count"]))
+        if extra_dim:
+            base = base.explode(extra_dim).dropna(subset=[extra_dim])
+
+        counters: Dict[str, Any] = {d: base[d].to_numpy() for d in dims}
+        counters[_ROWS] = np.ones(len(base), dtype=np.int64)
+        for m in metrics:
+            values = pd.to_numeric(base[m], errors="coerce").to_numpy(dtype=np.float64)
+            present = ~np.isnan(values)
+            filled = np.where(present, values, 0.0)
+            counters[f"{m}__n"] = present.astype(np.int64)
+            counters[f"{m}__sum"] = filled
+            counters[f"{m}__sumsq"] = filled * filled
+
+        cells = (
+            pd.DataFrame(counters)
+            .groupby(dims, dropna=False, sort=False)
+            .sum()
+            .reset_index()
+        )
+        return cls(cells, dims, metrics)
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    @property
+    def n_films(self) -> int:
+        return int(self.cells[_ROWS].sum())
+
+    def select(
+        self,
+        year_range: Optional[Tuple[int, int]] = None,
+        languages: Optional[Iterable[str]] = None,
+        main_genres: Optional[Iterable[str]] = None,
+        min_votes: int = 0,
+    ) -> "AggregateCube":
+        """Mêmes filtres que la page (listes vides = pas de filtre)."""
+        cells = self.cells
+        mask = np.ones(len(cells), dtype=bool)
+        if year_range is not None:
+            mask &= cells["release_year"].between(year_range[0], year_range[1]).to_numpy()
+        if languages:
+            mask &= cells["original_language"].isin(list(languages)).to_numpy()
+        if main_genres:
+            mask &= cells["main_genre"].isin(list(main_genres)).to_numpy()
+        if min_votes > 0:
+            mask &= cells["vote_bucket"].to_numpy() >= min_vote_bucket(min_votes)
+        return AggregateCube(cells[mask], self.dims, self.metrics)
+
+    def aggregate(self, by: str, **aggs: Tuple[Optional[str], str]) -> pd.DataFrame:
+        """
+        Agrégats par valeur de la dimension by, à la manière de groupby().agg() :
+        nom=(métrique, "mean" | "std" | "sum" | "count") ou nom=(None, "size")
+        pour le nombre de films. Les valeurs manquantes de by sont ignorées.
+        """
+        totals = self.cells.drop(columns=[d for d in self.dims if d != by]).groupby(by).sum()
+        out = pd.DataFrame(index=totals.index)
+        for name, (metric, func) in aggs.items():
+            if func == "size":
+                out[name] = totals[_ROWS]
+                continue
+            n = totals[f"{metric}__n"].to_numpy(dtype=np.float64)
+            s = totals[f"{metric}__sum"].to_numpy()
+            if func == "count":
+                out[name] = n.astype(np.int64)
+            elif func == "sum":
+                out[name] = s
+            elif func == "mean":
+                out[name] = _mean(s, n)
+            elif func == "std":
+                out[name] = _std(s, totals[f"{metric}__sumsq"].to_numpy(), n)
+            else:
+                raise ValueError(f"Agrégat non supporté par le cube : {func}")
+        return out.reset_index()
+
+
+def _mean(s: np.ndarray, n: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n > 0, s / n, math.nan)
+
+
+def _std(s: np.ndarray, sumsq: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """Écart-type échantillon (ddof=1, comme pandas)."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = (sumsq - s * s / n) / (n - 1)
+        return np.where(n > 1, np.sqrt(np.clip(var, 0.0, None)), math.nan)
@@ -1,21 +1,29 @@
 # analysis_page.py
 
 import math
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
 import streamlit as st
 import pandas as pd
 import altair as alt
 
+from analysis_cube import AggregateCube, min_vote_bucket, vote_bucket, vote_thresholds
+from chart_data import box_stats, histogram, histogram_chart, thin_scatter, with_density
+from filter_index import FilterIndex
 from tmdb_client import TMDBClient
 from imdb_client import IMDbClient
+from latency import LatencyBudget, BudgetExceeded
+from scheduler import request_priority, BACKGROUND
 
 
 # ===================== Helpers IMDb =====================
 
 def safe_get_imdb_client() -> IMDbClient | None:
-    """Retourne un client IMDb si la clé est dispo dans st.secrets, sinon None."""
+    """
+    Retourne un client IMDb si la clé est dispo dans st.secrets ou si une base
+    IMDb locale a été ingérée (cf. imdb_datasets.py), sinon None.
+    """
     api_key = st.secrets.get("RAPIDAPI_IMDB_KEY")
-    if not api_key:
-        return None
     try:
         return IMDbClient(api_key=api_key)
     except Exception:
@@ -133,10 +141,50 @@ def compute_imdb_hist_stats(hist: dict | None):
     return std, share_high, share_low, polarization
 
 
+def fetch_imdb_stats(imdb_client: IMDbClient | None, imdb_id: str | None) -> dict:
+    """
+    Note, votes et structure des votes IMDb pour un tconst.
+    Toutes les valeurs restent à None si IMDb ne renvoie rien.
+    """
+    rating = None
+    rating_count = None
+    hist = None
+    std = None
+    share_high = None
+    share_low = None
+    polarization = None
+
+    if imdb_client and imdb_id:
+        try:
+            # Note / votes : base locale si dispo, sinon RapidAPI
+            imdb_raw = imdb_client.get_rating_summary(imdb_id)
+            rating, rating_count, hist = parse_imdb_ratings_with_histogram(imdb_raw)
+            # L'histogramme n'existe que côté API
+            if hist is None and imdb_client.api_key:
+                _, _, hist = parse_imdb_ratings_with_histogram(
+                    imdb_client.get_ratings(imdb_id)
+                )
+            std, share_high, share_low, polarization = compute_imdb_hist_stats(hist)
+        except Exception:
+            pass
+
+    return {
+        "imdb_rating": rating,
+        "imdb_votes": rating_count,
+        "imdb_std": std,
+        "imdb_share_high": share_high,
+        "imdb_share_low": share_low,
+        "imdb_polarization": polarization,
+    }
+
+
 # ===================== Chargement & enrichissement des données =====================
 
-@st.cache_data(show_spinner=True)
-def load_analysis_data(language: str = "fr-FR", nb_pages: int = 5) -> pd.DataFrame:
+# Budget de latence du chargement de la page (secondes)
+ANALYSIS_BUDGET_S = 12.0
+
+
+def fetch_analysis_data(language: str = "fr-FR", nb_pages: int = 5) -> pd.DataFrame:
     """
     Charge un jeu de données riche pour l'analyse :
     - films populaires TMDB sur plusieurs pages
@@ -161,50 +209,58 @@ def load_analysis_data(language: str = "fr-FR", nb_pages: int = 5) -> pd.DataFra
     details_by_id: dict[int, dict] = {}
     imdb_stats_by_id: dict[int, dict] = {}
 
-    for m in movies:
-        mid = m.get("id")
-        if mid is None:
-            continue
+    movie_ids = [m.get("id") for m in movies if m.get("id") is not None]
 
-        # Détails TMDB
+    # tconst déjà connus (table de correspondance locale) : les appels IMDb
+    # partent tout de suite, en parallèle des détails TMDB
+    known_imdb_ids = (
+        client.resolve_imdb_ids(movie_ids, fetch_missing=False) if imdb_client else {}
+    )
+
+    def _safe_details(mid: int) -> dict:
         try:
-            d = client.get_movie_details(mid)
+            return client.get_movie_details(mid)
+        except BudgetExceeded:
+            raise
         except Exception:
-            d = {}
-        details_by_id[mid] = d
-
-        # IMDb (optionnel)
-        rating = None
-        rating_count = None
-        hist = None
-        std = None
-        share_high = None
-        share_low = None
-        polarization = None
-
-        if imdb_client:
-            imdb_id = d.get("imdb_id")
-            if imdb_id:
-                try:
-                    imdb_raw = imdb_client.get_ratings(imdb_id)
-                    rating, rating_count, hist = parse_imdb_ratings_with_histogram(
-                        imdb_raw
-                    )
-                    std, share_high, share_low, polarization = compute_imdb_hist_stats(
-                        hist
-                    )
-                except Exception:
-                    pass
-
-        imdb_stats_by_id[mid] = {
-            "imdb_rating": rating,
-            "imdb_votes": rating_count,
-            "imdb_std": std,
-            "imdb_share_high": share_high,
-            "imdb_share_low": share_low,
-            "imdb_polarization": polarization,
+            return {}
+
+    # Budget de latence : une fois écoulé, on garde ce qui est arrivé et on
+    # marque les films incomplets plutôt que d'attendre la réponse la plus lente
+    missing_ids: set[int] = set()
+    # Enrichissement en masse : priorité basse, les requêtes interactives passent devant
+    with request_priority(BACKGROUND), LatencyBudget(ANALYSIS_BUDGET_S) as budget:
+        pool = ThreadPoolExecutor(max_workers=8)
+        details_futures = {
+            mid: budget.submit(pool, _safe_details, mid) for mid in movie_ids
+        }
+        imdb_futures = {
+            mid: budget.submit(pool, fetch_imdb_stats, imdb_client, imdb_id)
+            for mid, imdb_id in known_imdb_ids.items()
         }
 
+        for mid in movie_ids:
+            fut = details_futures[mid]
+            try:
+                d = fut.result(timeout=budget.remaining())
+            except (FutureTimeout, BudgetExceeded):
+                missing_ids.add(mid)
+                d = {}
+            details_by_id[mid] = d
+            # Film jamais vu : on attend son imdb_id dans les détails TMDB
+            if imdb_client and mid not in imdb_futures and d.get("imdb_id"):
+                imdb_futures[mid] = budget.submit(
+                    pool, fetch_imdb_stats, imdb_client, d.get("imdb_id")
+                )
+
+        for mid, fut in imdb_futures.items():
+            try:
+                imdb_stats_by_id[mid] = fut.result(timeout=budget.remaining())
+            except FutureTimeout:
+                missing_ids.add(mid)
+
+        pool.shutdown(wait=False, cancel_futures=True)
+
     def _map_detail(movie_id, field):
         d = details_by_id.get(movie_id, {})
         value = d.get(field)
@@ -250,9 +306,45 @@ def load_analysis_data(language: str = "fr-FR", nb_pages: int = 5) -> pd.DataFra
 
     df["main_genre"] = df["genres"].apply(_main_genre)
 
+    # Films dont les détails / stats IMDb ne sont pas arrivés dans le budget
+    df["partial"] = df["id"].isin(missing_ids)
+
     return df.dropna(subset=["title"]).reset_index(drop=True)
 
 
+def build_analysis_indexes(
+    df: pd.DataFrame,
+) -> tuple[AggregateCube, AggregateCube, FilterIndex]:
+    """
+    Structures construites une fois par chargement du jeu d'analyse :
+    - cube d'agrégats par film (agrégats par année / langue)
+    - cube par genre (un film compte dans chacun de ses genres)
+    - bitmaps des filtres globaux (lignes de df retenues)
+    """
+    filters = (
+        FilterIndex(len(df))
+        .add_values("release_year", df["release_year"])
+        .add_values("original_language", df["original_language"])
+        .add_values("main_genre", df["main_genre"])
+        .add_values("vote_bucket", vote_bucket(df["vote_count"]))
+    )
+    return AggregateCube.build(df), AggregateCube.build(df, extra_dim="genres"), filters
+
+
+@st.cache_resource(show_spinner=False)
+def load_analysis_data(
+    language: str = "fr-FR", nb_pages: int = 5
+) -> tuple[pd.DataFrame, AggregateCube | None, AggregateCube | None, FilterIndex | None]:
+    """
+    Jeu d'analyse et ses index, construits ensemble et partagés tels quels
+    (sans copie) entre reruns et sessions : la page ne les modifie pas.
+    """
+    df = fetch_analysis_data(language, nb_pages=nb_pages)
+    if df.empty:
+        return df, None, None, None
+    return (df, *build_analysis_indexes(df))
+
+
 # ===================== Page Data Analyse =====================
 
 
@@ -264,12 +356,21 @@ def render_analysis_page():
     )
 
     with st.spinner("Chargement et enrichissement des données TMDB & IMDb..."):
-        df = load_analysis_data("fr-FR", nb_pages=5)
+        df, films_cube, genres_cube, filters = load_analysis_data("fr-FR", nb_pages=5)
 
     if df.empty:
         st.warning("Impossible de charger les données TMDB pour l'analyse.")
         return
 
+    nb_partial = int(df["partial"].sum())
+    if nb_partial:
+        st.caption(
+            f"⏱️ Budget de latence dépassé : {nb_partial} film(s) affiché(s) sans détails "
+            "TMDB / IMDb complets. Ils seront complétés au prochain chargement."
+        )
+        # On ne garde pas en cache un résultat incomplet (données et index ensemble)
+        load_analysis_data.clear()
+
     # ----------------- FILTRES GLOBAUX -----------------
     st.markdown("### 🎚️ Filtres globaux")
 
@@ -310,31 +411,38 @@ def render_analysis_page():
             default=genres[:3] if len(genres) >= 3 else genres,
         )
 
-    # Seuil de votes TMDB
+    # Seuil de votes TMDB (crans = tranches de votes du cube d'agrégats)
     with col_f4:
         max_votes = int(df["vote_count"].fillna(0).max())
-        min_votes = st.slider(
+        min_votes = st.select_slider(
             "Nombre minimal de votes TMDB",
-            min_value=0,
-            max_value=max(50, max_votes),
+            options=vote_thresholds(max(50, max_votes)),
             value=50,
-            step=10,
         )
 
-    # Application des filtres
-    mask = pd.Series(True, index=df.index)
-
-    mask &= df["release_year"].between(year_range[0], year_range[1])
+    # Application des filtres : intersection des bitmaps précalculées
+    mask = filters.keys_between("release_year", year_range[0], year_range[1])
     if selected_langs:
-        mask &= df["original_language"].isin(selected_langs)
+        mask &= filters.isin("original_language", selected_langs)
     if selected_genres:
-        mask &= df["main_genre"].isin(selected_genres)
-    mask &= df["vote_count"].fillna(0) >= min_votes
-
-    df_filt = df[mask].copy()
+        mask &= filters.isin("main_genre", selected_genres)
+    if min_votes > 0:
+        mask &= filters.keys_between("vote_bucket", min_vote_bucket(min_votes))
+
+    df_filt = df.iloc[filters.positions(mask)]
+
+    # Agrégats des sections suivantes : somme des cellules du cube sélectionnées
+    selection = dict(
+        year_range=year_range,
+        languages=selected_langs,
+        main_genres=selected_genres,
+        min_votes=min_votes,
+    )
+    films_sel = films_cube.select(**selection)
+    genres_sel = genres_cube.select(**selection)
 
     st.caption(
-        f"Après filtres : **{len(df_filt)} films** (sur {len(df)} films populaires récupérés)."
+        f"Après filtres : **{films_sel.n_films} films** (sur {len(df)} films populaires récupérés)."
     )
 
     if df_filt.empty:
@@ -417,22 +525,18 @@ def render_analysis_page():
     # ===================== 2. ANALYSE DES GENRES =====================
     st.markdown("### 🎭 Analyse des genres")
 
-    df_genres = df_filt.explode("genres").dropna(subset=["genres"])
-    if df_genres.empty:
+    df_genres_agg = genres_sel.aggregate(
+        "genres",
+        note_moy_tmdb=("vote_average", "mean"),
+        note_moy_imdb=("imdb_rating", "mean"),
+        pop_moy=("popularity", "mean"),
+        nb_films=(None, "size"),
+        std_moy_imdb=("imdb_std", "mean"),
+        pol_moy_imdb=("imdb_polarization", "mean"),
+    )
+    if df_genres_agg.empty:
         st.info("Pas assez de données de genres pour cette sélection.")
     else:
-        df_genres_agg = (
-            df_genres.groupby("genres")
-            .agg(
-                note_moy_tmdb=("vote_average", "mean"),
-                note_moy_imdb=("imdb_rating", "mean"),
-                pop_moy=("popularity", "mean"),
-                nb_films=("id", "count"),
-                std_moy_imdb=("imdb_std", "mean"),
-                pol_moy_imdb=("imdb_polarization", "mean"),
-            )
-            .reset_index()
-        )
 
         df_genres_top = df_genres_agg.sort_values("nb_films", ascending=False).head(10)
 
@@ -490,20 +594,31 @@ def render_analysis_page():
             "À gauche : vision TMDB par genre. À droite : vision IMDb moyennée par genre (quand les données existent)."
         )
 
-        # Boxplot des notes TMDB par genre
+        # Boxplot des notes TMDB par genre : quartiles calculés ici (une ligne par genre)
         st.markdown("#### 📦 Variabilité des notes TMDB par genre")
-        df_box = df_genres[df_genres["vote_average"].notna()]
+        df_genres = df_filt[["genres", "vote_average"]].explode("genres")
+        df_box = box_stats(df_genres, "genres", "vote_average")
         if not df_box.empty:
-            chart_box = (
-                alt.Chart(df_box)
-                .mark_boxplot()
-                .encode(
-                    x=alt.X("genres:N", title="Genre", sort="-y"),
-                    y=alt.Y("vote_average:Q", title="Note TMDB"),
-                    tooltip=[alt.Tooltip("genres:N", title="Genre")],
-                )
-                .properties(height=360)
+            genre_order = df_box["genres"].tolist()
+            box_base = alt.Chart(df_box).encode(
+                x=alt.X("genres:N", title="Genre", sort=genre_order)
             )
+            box_tooltip = [
+                alt.Tooltip("genres:N", title="Genre"),
+                alt.Tooltip("median:Q", title="Médiane", format=".2f"),
+                alt.Tooltip("q1:Q", title="Q1", format=".2f"),
+                alt.Tooltip("q3:Q", title="Q3", format=".2f"),
+                alt.Tooltip("nb_films:Q", title="Nombre de films"),
+            ]
+            chart_box = alt.layer(
+                box_base.mark_rule().encode(
+                    y=alt.Y("lower:Q", title="Note TMDB"), y2="upper:Q"
+                ),
+                box_base.mark_bar(size=14).encode(
+                    y="q1:Q", y2="q3:Q", tooltip=box_tooltip
+                ),
+                box_base.mark_tick(color="white", size=14).encode(y="median:Q"),
+            ).properties(height=360)
             st.altair_chart(chart_box, use_container_width=True)
             st.caption(
                 "Les genres avec des boxplots serrés sont plus stables en qualité TMDB, "
@@ -515,20 +630,15 @@ def render_analysis_page():
     # ===================== 3. ANALYSE TEMPORELLE =====================
     st.markdown("### ⏱️ Analyse temporelle")
 
-    df_time = df_filt.dropna(subset=["release_year"])
-    if df_time.empty:
+    df_year = films_sel.aggregate(
+        "release_year",
+        nb_films=(None, "size"),
+        note_moy_tmdb=("vote_average", "mean"),
+        note_moy_imdb=("imdb_rating", "mean"),
+    ).sort_values("release_year")
+    if df_year.empty:
         st.info("Pas assez de dates de sortie pour construire une analyse temporelle.")
     else:
-        df_year = (
-            df_time.groupby("release_year")
-            .agg(
-                nb_films=("id", "count"),
-                note_moy_tmdb=("vote_average", "mean"),
-                note_moy_imdb=("imdb_rating", "mean"),
-            )
-            .reset_index()
-            .sort_values("release_year")
-        )
 
         col_t1, col_t2 = st.columns(2)
 
@@ -600,20 +710,10 @@ def render_analysis_page():
 
         with col_s1:
             st.markdown("#### 📦 Distribution de l'écart-type IMDb")
-            chart_std = (
-                alt.Chart(df_imdb)
-                .mark_bar()
-                .encode(
-                    x=alt.X(
-                        "imdb_std:Q",
-                        bin=alt.Bin(step=0.1),
-                        title="σ IMDb (dispersion des notes)",
-                    ),
-                    y=alt.Y("count():Q", title="Nombre de films"),
-                    tooltip=[alt.Tooltip("count():Q", title="Films")],
-                )
-                .properties(height=260)
-            )
+            chart_std = histogram_chart(
+                histogram(df_imdb["imdb_std"], step=0.1),
+                "σ IMDb (dispersion des notes)",
+            ).properties(height=260)
             st.altair_chart(chart_std, use_container_width=True)
 
         with col_s2:
@@ -624,8 +724,15 @@ def render_analysis_page():
             if df_pol_scatter.empty:
                 st.info("Pas assez de données pour le scatter polarisation vs note.")
             else:
-                chart_pol_scatter = (
-                    alt.Chart(df_pol_scatter)
+                points, grid = thin_scatter(
+                    df_pol_scatter,
+                    "imdb_rating",
+                    "imdb_polarization",
+                    columns=["title", "main_genre", "imdb_votes"],
+                    top_by="imdb_votes",
+                )
+                chart_pol_scatter = with_density(
+                    alt.Chart(points)
                     .mark_circle(size=70, opacity=0.7)
                     .encode(
                         x=alt.X("imdb_rating:Q", title="Note IMDb"),
@@ -647,9 +754,11 @@ def render_analysis_page():
                             ),
                             alt.Tooltip("imdb_votes:Q", title="Votes IMDb"),
                         ],
-                    )
-                    .properties(height=260)
-                )
+                    ),
+                    grid,
+                    "Note IMDb",
+                    "Polarisation (part votes 1–4 & 8–10)",
+                ).properties(height=260)
                 st.altair_chart(chart_pol_scatter, use_container_width=True)
 
         st.caption(
@@ -662,16 +771,13 @@ def render_analysis_page():
     # ===================== 4. ANALYSE PAYS / LANGUES =====================
     st.markdown("### 🌍 Analyse par langue / pays")
 
-    df_lang = (
-        df_filt.groupby("original_language")
-        .agg(
-            nb_films=("id", "count"),
-            note_moy_tmdb=("vote_average", "mean"),
-            note_moy_imdb=("imdb_rating", "mean"),
-            pol_moy_imdb=("imdb_polarization", "mean"),
-            pop_moy=("popularity", "mean"),
-        )
-        .reset_index()
+    df_lang = films_sel.aggregate(
+        "original_language",
+        nb_films=(None, "size"),
+        note_moy_tmdb=("vote_average", "mean"),
+        note_moy_imdb=("imdb_rating", "mean"),
+        pol_moy_imdb=("imdb_polarization", "mean"),
+        pop_moy=("popularity", "mean"),
     )
 
     if df_lang.empty:
@@ -810,8 +916,22 @@ def render_analysis_page():
         if df_scatter.empty:
             st.info("Pas assez de films avec budget renseigné pour le scatter.")
         else:
-            scatter = (
-                alt.Chart(df_scatter)
+            points, grid = thin_scatter(
+                df_scatter,
+                "budget",
+                "popularity",
+                columns=[
+                    "title",
+                    "main_genre",
+                    "vote_average",
+                    "imdb_rating",
+                    "imdb_std",
+                    "imdb_polarization",
+                ],
+                log_x=True,
+            )
+            scatter = with_density(
+                alt.Chart(points)
                 .mark_circle(size=70, opacity=0.7)
                 .encode(
                     x=alt.X(
@@ -838,9 +958,12 @@ def render_analysis_page():
                             format=".2f",
                         ),
                     ],
-                )
-                .properties(height=320)
-            )
+                ),
+                grid,
+                "Budget (USD)",
+                "Popularité TMDB",
+                log_x=True,
+            ).properties(height=320)
             st.altair_chart(scatter, use_container_width=True)
 
     st.caption(
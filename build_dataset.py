@@ -0,0 +1,383 @@
+# build_dataset.py
+"""
+Reconstruction incrémentale de data/oscars_features.csv à partir de sources locales.
+
+    python build_dataset.py                  # ajoute les cérémonies absentes du CSV
+    python build_dataset.py --dry-run        # affiche ce qui serait ajouté
+
+Sources (dossier data/sources/, seul nominees.csv est obligatoire) :
+  - nominees.csv           : year, titre, imdb_id, Oscar, nomination_count (+ tmdb_id facultatif)
+  - precursors.csv         : imdb_id, BAFTA, DGA, PGA, SAG, GG (prix remportés)
+  - tmdb/*.json            : réponses TMDB /movie/{id} mises en cache (vote_average,
+                             runtime, genres, release_date, imdb_id)
+  - title.ratings.tsv.gz   : dump IMDb des notes (tconst, averageRating)
+  - critics.csv            : imdb_id, NotesRottenTomatoes, NotesMetacritic
+
+Les sources sont jointes par imdb_id (merges pandas vectorisés ; l'imdb_id d'un
+nominé sans identifiant est repris de sa réponse TMDB via tmdb_id). Seules les
+années absentes du CSV sont construites et ajoutées à la fin du fichier : les
+lignes historiques ne sont jamais réécrites. Le Parquet typé est ensuite régénéré.
+
+Chaque étape (lecture d'une source, features d'une année) est mise en cache dans
+data/build_cache/ sous le hash de son contenu : après l'ajout d'une année, seules
+les étapes dont les entrées ont changé sont recalculées.
+"""
+
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from oscar_dataset import AWARD_COLS, DEFAULT_CSV_PATH, GENRE_COLS, convert_csv_to_parquet
+
+DEFAULT_SOURCES_DIR = os.path.join("data", "sources")
+DEFAULT_CACHE_DIR = os.path.join("data", "build_cache")
+
+# Version du code des étapes : la changer invalide tout le cache
+PIPELINE_VERSION = 1
+
+# Notes manquantes : le CSV historique les remplit par la moyenne de la colonne
+MEAN_FILLED_COLS = ["NotesIMDb", "NotesRottenTomatoes", "NotesMetacritic"]
+# ... et marque ainsi les données TMDB absentes
+TMDB_MISSING = "Non Disponible"
+IMDB_MISSING = "Not Found"
+
+
+# ===================== Cache des étapes =====================
+
+def _hash_files(paths: List[str]) -> str:
+    h = hashlib.sha256()
+    for path in sorted(paths):
+        h.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+def _hash_frame(df: pd.DataFrame) -> str:
+    h = hashlib.sha256(",".join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()[:16]
+
+
+class StageCache:
+    """Résultats d'étapes (DataFrames) stockés en Parquet, indexés par le hash de leurs entrées."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits: List[str] = []
+        self.misses: List[str] = []
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{stage}-{key}.parquet")
+
+    def run(self, stage: str, inputs: List[str], build: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        key = hashlib.sha256(f"{PIPELINE_VERSION}|{stage}|{'|'.join(inputs)}".encode()).hexdigest()[:16]
+        path = self._path(stage, key)
+        if os.path.exists(path):
+            self.hits.append(stage)
+            return pd.read_parquet(path)
+
+        self.misses.append(stage)
+        df = build()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        return df
+
+
+# ===================== Lecture des sources =====================
+
+def _clean_ids(series: pd.Series) -> pd.Series:
+    ids = series.astype("string").str.strip()
+    return ids.where(~ids.isin(["", IMDB_MISSING]))
+
+
+def _col(raw: pd.DataFrame, name: str, default: Any = pd.NA) -> pd.Series:
+    return raw[name] if name in raw else pd.Series(default, index=raw.index)
+
+
+def _bool_col(series: pd.Series) -> pd.Series:
+    return series.astype("string").str.strip().str.lower().isin(["true", "1", "yes", "oui"])
+
+
+def read_nominees(path: str) -> pd.DataFrame:
+    raw = pd.read_csv(path, dtype={"titre": "string", "imdb_id": "string"})
+    df = pd.DataFrame({
+        "year": pd.to_numeric(raw["year"], errors="coerce").astype("Int16"),
+        "titre": raw["titre"].astype("string"),
+        "imdb_id": _clean_ids(_col(raw, "imdb_id")),
+        "tmdb_id": pd.to_numeric(_col(raw, "tmdb_id"), errors="coerce").astype("Int64"),
+        "Oscar": _bool_col(raw["Oscar"]),
+        "nomination_count": pd.to_numeric(_col(raw, "nomination_count", 1), errors="coerce").fillna(1).astype("int8"),
+    })
+    return df.dropna(subset=["year", "titre"])
+
+
+def read_precursors(path: str) -> pd.DataFrame:
+    raw = pd.read_csv(path, dtype={"imdb_id": "string"})
+    df = pd.DataFrame({"imdb_id": _clean_ids(raw["imdb_id"])})
+    for col in AWARD_COLS:
+        df[col] = _bool_col(raw[col]) if col in raw else False
+    # Un même film listé plusieurs fois : un prix obtenu sur une ligne vaut pour le film
+    return df.dropna(subset=["imdb_id"]).groupby("imdb_id", as_index=False)[AWARD_COLS].any()
+
+
+def read_tmdb_responses(paths: List[str]) -> pd.DataFrame:
+    """Réponses TMDB /movie/{id} -> une ligne par film (notes, durée, trimestre, genres)."""
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            records.append(json.load(f))
+    if not records:
+        return pd.DataFrame(columns=["tmdb_id", "imdb_id", "NotesTMDb", "Runtime", "Quarter", *GENRE_COLS])
+
+    raw = pd.json_normalize(records, max_level=0)
+    release = pd.to_datetime(_col(raw, "release_date"), errors="coerce")
+    df = pd.DataFrame({
+        "tmdb_id": pd.to_numeric(raw["id"], errors="coerce").astype("Int64"),
+        "imdb_id": _clean_ids(_col(raw, "imdb_id")),
+        "NotesTMDb": pd.to_numeric(_col(raw, "vote_average"), errors="coerce"),
+        "Runtime": pd.to_numeric(_col(raw, "runtime"), errors="coerce"),
+        "Quarter": release.dt.quarter.astype("float32"),
+    })
+
+    # Genres : liste de {"id", "name"} -> une colonne 0/1 par genre du modèle
+    genres = _col(raw, "genres").explode().dropna()
+    names = genres.map(lambda g: g.get("name") if isinstance(g, dict) else None).dropna()
+    dummies = pd.crosstab(names.index, names).reindex(index=df.index, columns=GENRE_COLS, fill_value=0)
+    df[GENRE_COLS] = (dummies.fillna(0).to_numpy() > 0).astype("int8")
+    return df.drop_duplicates(subset=["tmdb_id"])
+
+
+def read_imdb_ratings(path: str) -> pd.DataFrame:
+    raw = pd.read_csv(
+        path, sep="\t", usecols=["tconst", "averageRating"], na_values=["\\N"],
+        dtype={"tconst": "string", "averageRating": "float64"},
+    )
+    return raw.rename(columns={"tconst": "imdb_id", "averageRating": "NotesIMDb"})
+
+
+def read_critics(path: str) -> pd.DataFrame:
+    raw = pd.read_csv(path, dtype={"imdb_id": "string"})
+    df = pd.DataFrame({"imdb_id": _clean_ids(raw["imdb_id"])})
+    for col in ("NotesRottenTomatoes", "NotesMetacritic"):
+        df[col] = pd.to_numeric(_col(raw, col), errors="coerce")
+    return df.dropna(subset=["imdb_id"]).drop_duplicates(subset=["imdb_id"])
+
+
+def load_sources(sources_dir: str, cache: StageCache) -> Dict[str, pd.DataFrame]:
+    """Chaque source présente, lue une fois puis servie par le cache tant que son contenu ne change pas."""
+    readers = {
+        "nominees": (["nominees.csv"], lambda paths: read_nominees(paths[0])),
+        "precursors": (["precursors.csv"], lambda paths: read_precursors(paths[0])),
+        "tmdb": ([os.path.join("tmdb", "*.json")], read_tmdb_responses),
+        "imdb_ratings": (["title.ratings.tsv.gz", "title.ratings.tsv"], lambda paths: read_imdb_ratings(paths[0])),
+        "critics": (["critics.csv"], lambda paths: read_critics(paths[0])),
+    }
+    sources: Dict[str, pd.DataFrame] = {}
+    for name, (patterns, reader) in readers.items():
+        paths: List[str] = []
+        for pattern in patterns:
+            paths = sorted(glob.glob(os.path.join(sources_dir, pattern)))
+            if paths:
+                break
+        if not paths:
+            continue
+        sources[name] = cache.run(f"source_{name}", [_hash_files(paths)], lambda r=reader, p=paths: r(p))
+
+    if "nominees" not in sources:
+        raise FileNotFoundError(f"{os.path.join(sources_dir, 'nominees.csv')} introuvable.")
+    return sources
+
+
+# ===================== Assemblage d'une année =====================
+
+def _year_inputs(sources: Dict[str, pd.DataFrame], year: int) -> Dict[str, pd.DataFrame]:
+    """Tranches des sources utiles à une année (leur contenu sert de clé de cache)."""
+    nominees = sources["nominees"][sources["nominees"]["year"] == year].reset_index(drop=True)
+    inputs = {"nominees": nominees}
+
+    tmdb = sources.get("tmdb")
+    if tmdb is not None:
+        inputs["tmdb"] = tmdb[
+            tmdb["tmdb_id"].isin(nominees["tmdb_id"].dropna()) | tmdb["imdb_id"].isin(nominees["imdb_id"].dropna())
+        ].reset_index(drop=True)
+        ids = pd.concat([nominees["imdb_id"], inputs["tmdb"]["imdb_id"]]).dropna().unique()
+    else:
+        ids = nominees["imdb_id"].dropna().unique()
+
+    for name in ("precursors", "imdb_ratings", "critics"):
+        if name in sources:
+            inputs[name] = sources[name][sources[name]["imdb_id"].isin(ids)].reset_index(drop=True)
+    return inputs
+
+
+def build_year(inputs: Dict[str, pd.DataFrame], score_means: Dict[str, float]) -> pd.DataFrame:
+    """Features d'une cérémonie : une ligne par film nommé, colonnes du CSV historique."""
+    df = inputs["nominees"].copy()
+
+    tmdb = inputs.get("tmdb")
+    if tmdb is not None and not tmdb.empty:
+        tmdb_cols = ["NotesTMDb", "Runtime", "Quarter", *GENRE_COLS]
+        # Jointure sur tmdb_id quand le nominé en a un, sinon sur imdb_id
+        by_tmdb = tmdb.dropna(subset=["tmdb_id"]).drop_duplicates("tmdb_id")
+        by_imdb = tmdb.dropna(subset=["imdb_id"]).drop_duplicates("imdb_id")
+        on_tmdb = df["tmdb_id"].isin(by_tmdb["tmdb_id"])
+        df = pd.concat([
+            df[on_tmdb].merge(
+                by_tmdb[["tmdb_id", "imdb_id", *tmdb_cols]].rename(columns={"imdb_id": "tmdb_imdb_id"}),
+                on="tmdb_id", how="left",
+            ),
+            df[~on_tmdb].merge(by_imdb[["imdb_id", *tmdb_cols]], on="imdb_id", how="left"),
+        ], ignore_index=True)
+        # imdb_id manquant côté nominés : repris de la réponse TMDB
+        if "tmdb_imdb_id" in df:
+            df["imdb_id"] = df["imdb_id"].fillna(df.pop("tmdb_imdb_id"))
+
+    for name in ("precursors", "imdb_ratings", "critics"):
+        source = inputs.get(name)
+        if source is not None and not source.empty:
+            df = df.merge(source, on="imdb_id", how="left")
+
+    for col in AWARD_COLS:
+        df[col] = df[col].fillna(False).astype(bool) if col in df else False
+    for col in GENRE_COLS:
+        df[col] = df[col].fillna(0).astype("int8") if col in df else np.int8(0)
+    for col in ("NotesTMDb", "Runtime", "Quarter"):
+        if col not in df:
+            df[col] = np.nan
+    for col in MEAN_FILLED_COLS:
+        values = pd.to_numeric(df[col], errors="coerce") if col in df else pd.Series(np.nan, index=df.index)
+        df[col] = values.fillna(score_means.get(col, np.nan))
+    return df.sort_values(["Oscar", "titre"], ascending=[False, True]).reset_index(drop=True)
+
+
+# ===================== Ajout au CSV =====================
+
+def _csv_value(col: str, value: Any) -> str:
+    if value is None or pd.isna(value):
+        if col in ("NotesTMDb", "Runtime"):
+            return TMDB_MISSING
+        if col == "imdb_id":
+            return IMDB_MISSING
+        return ""
+    if isinstance(value, (bool, np.bool_)):
+        return str(bool(value))
+    if col in ("nomination_count", "Quarter"):
+        return str(float(value))
+    if col == "Runtime":
+        return str(int(value))
+    return str(value)
+
+
+def append_years(csv_path: str, frames: List[pd.DataFrame]) -> int:
+    """Ajoute les lignes à la fin du CSV, dans son format d'origine (index de ligne continus)."""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        next_index = sum(1 for _ in reader)
+
+    # Trois colonnes d'index de ligne ("", "Unnamed: 0.1", "Unnamed: 0")
+    index_cols = {c for c in header if c == "" or c.startswith("Unnamed: 0")}
+    n_rows = 0
+    with open(csv_path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        for df in frames:
+            for record in df.to_dict("records"):
+                out = []
+                for col in header:
+                    if col in index_cols:
+                        out.append(str(next_index))
+                    elif col == "imdbID":
+                        # Doublon historique d'imdb_id, vide (et non "Not Found") quand inconnu
+                        imdb_id = record.get("imdb_id")
+                        out.append("" if imdb_id is None or pd.isna(imdb_id) else str(imdb_id))
+                    else:
+                        out.append(_csv_value(col, record.get(col)))
+                writer.writerow(out)
+                next_index += 1
+                n_rows += 1
+    return n_rows
+
+
+def existing_score_means(csv_path: str) -> Dict[str, float]:
+    df = pd.read_csv(csv_path, usecols=MEAN_FILLED_COLS)
+    return {c: float(pd.to_numeric(df[c], errors="coerce").mean()) for c in MEAN_FILLED_COLS}
+
+
+def rebuild(
+    csv_path: str = DEFAULT_CSV_PATH,
+    sources_dir: str = DEFAULT_SOURCES_DIR,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    dry_run: bool = False,
+    parquet_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Construit et ajoute les années absentes du CSV, puis régénère le Parquet typé
+    (par défaut à côté du CSV) ; renvoie un résumé.
+    """
+    start = time.perf_counter()
+    cache = StageCache(cache_dir)
+    sources = load_sources(sources_dir, cache)
+
+    known_years = set(pd.read_csv(csv_path, usecols=["year"])["year"].astype(int))
+    source_years = sorted(int(y) for y in sources["nominees"]["year"].unique())
+    new_years = [y for y in source_years if y not in known_years]
+
+    score_means = existing_score_means(csv_path)
+    frames = []
+    for year in new_years:
+        inputs = _year_inputs(sources, year)
+        keys = [f"{name}:{_hash_frame(df)}" for name, df in sorted(inputs.items())]
+        keys.append(json.dumps(score_means, sort_keys=True))
+        frames.append(cache.run(f"year_{year}", keys, lambda i=inputs: build_year(i, score_means)))
+
+    n_rows = 0
+    if frames and not dry_run:
+        n_rows = append_years(csv_path, frames)
+        convert_csv_to_parquet(csv_path, parquet_path or f"{os.path.splitext(csv_path)[0]}.parquet")
+
+    return {
+        "new_years": new_years,
+        "rows": n_rows if not dry_run else int(sum(len(f) for f in frames)),
+        "cache_hits": cache.hits,
+        "cache_misses": cache.misses,
+        "seconds": round(time.perf_counter() - start, 2),
+        "frames": frames,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Ajout incrémental de cérémonies à oscars_features.csv.")
+    parser.add_argument("--csv", default=DEFAULT_CSV_PATH)
+    parser.add_argument("--sources", default=DEFAULT_SOURCES_DIR)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--dry-run", action="store_true", help="Construit sans modifier le CSV")
+    args = parser.parse_args(argv)
+
+    summary = rebuild(args.csv, args.sources, args.cache_dir, dry_run=args.dry_run)
+    if not summary["new_years"]:
+        print(f"✅ Aucune nouvelle cérémonie dans {args.sources}/ ({summary['seconds']:.1f}s)")
+        return
+    if args.dry_run:
+        for frame in summary["frames"]:
+            print(frame[["year", "titre", "Oscar", "imdb_id", "NotesTMDb", "NotesIMDb"]].to_string(index=False))
+    print(
+        f"✅ {', '.join(map(str, summary['new_years']))} : {summary['rows']} films "
+        f"{'à ajouter' if args.dry_run else 'ajoutés'} ({summary['seconds']:.1f}s, "
+        f"{len(summary['cache_hits'])} étapes en cache, {len(summary['cache_misses'])} recalculées)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# chart_data.py
+"""
+Données pré-agrégées des graphiques Altair (pages Découverte et Data Analyse).
+
+Altair embarque toutes les lignes du DataFrame dans la spec Vega-Lite envoyée
+au navigateur, qui refait ensuite binning et agrégats. Ici on agrège côté
+serveur pour que chaque graphique reçoive un nombre de lignes borné, quelle
+que soit la taille du catalogue :
+- histogram      : une ligne par classe (au lieu de alt.Bin)
+- box_stats      : quartiles et moustaches par groupe (au lieu de mark_boxplot)
+- thin_scatter   : nuage complet tant qu'il reste petit, sinon grille de
+                   densité + les MAX_POINTS points les plus notables
+"""
+
+from typing import Iterable, List, Optional, Tuple
+
+import altair as alt
+import numpy as np
+import pandas as pd
+
+# Au-delà, un nuage de points passe en grille de densité (+ top points)
+MAX_POINTS = 500
+GRID_BINS = (40, 30)
+
+
+def _bin_index(values: np.ndarray, step: float) -> np.ndarray:
+    # Arrondi avant floor : 1.3 / 0.1 = 12.999... doit tomber dans la classe 13
+    return np.floor(np.round(values / step, 9)).astype(np.int64)
+
+
+def histogram(values: pd.Series, step: float) -> pd.DataFrame:
+    """Effectifs par classe [bin_start, bin_end[ de largeur step (valeurs manquantes ignorées)."""
+    arr = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)
+    arr = arr[~np.isnan(arr)]
+    if arr.size == 0:
+        return pd.DataFrame(columns=["bin_start", "bin_end", "nb_films"])
+    idx = _bin_index(arr, step)
+    first = idx.min()
+    counts = np.bincount(idx - first)
+    starts = (np.arange(len(counts)) + first) * step
+    out = pd.DataFrame({"bin_start": starts, "bin_end": starts + step, "nb_films": counts})
+    return out[out["nb_films"] > 0].round({"bin_start": 9, "bin_end": 9}).reset_index(drop=True)
+
+
+def histogram_chart(hist: pd.DataFrame, title: str) -> alt.Chart:
+    """Barres d'un histogramme déjà calculé (même rendu que alt.Bin + count())."""
+    return (
+        alt.Chart(hist)
+        .mark_bar()
+        .encode(
+            x=alt.X("bin_start:Q", bin="binned", title=title),
+            x2="bin_end:Q",
+            y=alt.Y("nb_films:Q", title="Nombre de films"),
+            tooltip=[
+                alt.Tooltip("bin_start:Q", title="De"),
+                alt.Tooltip("bin_end:Q", title="À"),
+                alt.Tooltip("nb_films:Q", title="Nombre de films"),
+            ],
+        )
+    )
+
+
+def box_stats(df: pd.DataFrame, by: str, value: str) -> pd.DataFrame:
+    """
+    Quartiles par groupe + moustaches de Tukey (dernière valeur à moins de
+    1,5 IQR des quartiles), triés par médiane décroissante. Les points
+    aberrants ne sont pas transmis.
+    """
+    data = df[[by, value]].dropna()
+    if data.empty:
+        return pd.DataFrame(columns=[by, "q1", "median", "q3", "lower", "upper", "nb_films"])
+    grouped = data.groupby(by)[value]
+    stats = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    stats.columns = ["q1", "median", "q3"]
+    stats["nb_films"] = grouped.size()
+
+    iqr = stats["q3"] - stats["q1"]
+    bounds = data.join(
+        pd.DataFrame({"lo": stats["q1"] - 1.5 * iqr, "hi": stats["q3"] + 1.5 * iqr}), on=by
+    )
+    inside = bounds[(bounds[value] >= bounds["lo"]) & (bounds[value] <= bounds["hi"])]
+    whiskers = inside.groupby(by)[value].agg(lower="min", upper="max")
+    return (
+        stats.join(whiskers)
+        .reset_index()
+        .sort_values("median", ascending=False)
+        .reset_index(drop=True)
+    )
+
+
+def thin_scatter(
+    df: pd.DataFrame,
+    x: str,
+    y: str,
+    columns: Iterable[str],
+    top_by: Optional[str] = None,
+    max_points: int = MAX_POINTS,
+    log_x: bool = False,
+    bins: Tuple[int, int] = GRID_BINS,
+) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """
+    (points, grille). Tant que le nuage compte au plus max_points films, tous
+    les points sont gardés et la grille vaut None. Sinon : grille de densité de
+    tous les films (cases non vides seulement) + les max_points films les plus
+    grands selon top_by (ou y), seuls à garder une infobulle.
+    Seules les colonnes utiles au graphique sont conservées.
+    """
+    keep: List[str] = list(dict.fromkeys([x, y, *columns, *([top_by] if top_by else [])]))
+    data = df[keep].copy()
+    for col in dict.fromkeys([x, y, top_by or y]):
+        data[col] = pd.to_numeric(data[col], errors="coerce")
+    data = data.dropna(subset=[x, y])
+    if log_x:
+        data = data[data[x] > 0]
+    if len(data) <= max_points:
+        return data.reset_index(drop=True), None
+
+    points = data.nlargest(max_points, top_by or y).reset_index(drop=True)
+    return points, density_grid(data[x], data[y], log_x=log_x, bins=bins)
+
+
+def density_grid(
+    xs: pd.Series,
+    ys: pd.Series,
+    log_x: bool = False,
+    bins: Tuple[int, int] = GRID_BINS,
+) -> pd.DataFrame:
+    """Effectifs d'une grille 2D (cases vides omises), bornes en unités d'origine."""
+    xv = xs.to_numpy(dtype=np.float64)
+    yv = ys.to_numpy(dtype=np.float64)
+    if log_x:
+        xv = np.log10(xv)
+    counts, x_edges, y_edges = np.histogram2d(xv, yv, bins=bins)
+    if log_x:
+        x_edges = 10 ** x_edges
+    ix, iy = np.nonzero(counts)
+    return pd.DataFrame({
+        "x_start": x_edges[ix],
+        "x_end": x_edges[ix + 1],
+        "y_start": y_edges[iy],
+        "y_end": y_edges[iy + 1],
+        "nb_films": counts[ix, iy].astype(np.int64),
+    })
+
+
+def density_layer(grid: pd.DataFrame, x_title: str, y_title: str, log_x: bool = False) -> alt.Chart:
+    """Cases de la grille de densité, à superposer sous les points (mêmes axes)."""
+    x_scale = alt.Scale(type="log") if log_x else alt.Undefined
+    return (
+        alt.Chart(grid)
+        .mark_rect(opacity=0.55)
+        .encode(
+            x=alt.X("x_start:Q", title=x_title, scale=x_scale),
+            x2="x_end:Q",
+            y=alt.Y("y_start:Q", title=y_title),
+            y2="y_end:Q",
+            color=alt.Color(
+                "nb_films:Q",
+                scale=alt.Scale(scheme="greys"),
+                legend=alt.Legend(title="Films (densité)"),
+            ),
+            tooltip=[alt.Tooltip("nb_films:Q", title="Films dans la case")],
+        )
+    )
+
+
+def with_density(
+    points: alt.Chart,
+    grid: Optional[pd.DataFrame],
+    x_title: str,
+    y_title: str,
+    log_x: bool = False,
+) -> alt.Chart:
+    """Nuage de points, avec la grille de densité dessous si le nuage a été réduit."""
+    if grid is None:
+        return points
+    return alt.layer(
+        density_layer(grid, x_title, y_title, log_x=log_x), points
+    ).resolve_scale(color="independent")
@@ -1,5 +1,6 @@
 # compare_page.py
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any, List
 
 import streamlit as st
@@ -8,6 +9,8 @@ import altair as alt
 
 from tmdb_client import TMDBClient
 from imdb_client import IMDbClient
+from scheduler import request_priority, submit_in_context, INTERACTIVE
+from search_service import get_search_service, normalize_query, refine_results_df
 
 
 # ========= Style global pour les badges d'info =========
@@ -43,7 +46,6 @@ def get_imdb_client() -> IMDbClient:
     return IMDbClient(api_key=api_key)
 
 
-@st.cache_data(show_spinner=False)
 def search_movies_df(
     query: str,
     year: Optional[int] = None,
@@ -51,12 +53,124 @@ def search_movies_df(
 ) -> pd.DataFrame:
     """
     Recherche TMDB et renvoie un DataFrame propre pour alimenter le selectbox.
+    Passe par le service de recherche partagé (cache normalisé commun à la page ML).
     """
-    tmdb = get_tmdb_client(language)
-    genre_map = tmdb.get_genre_map()
-    movies = tmdb.search_movies(query=query, year=year)
-    df = tmdb.movies_to_dataframe(movies, genre_map)
-    return df.dropna(subset=["title"]).reset_index(drop=True)
+    return get_search_service(language).search_df(query, year)
+
+
+# ========= Recherche "as-you-type" =========
+
+TYPEAHEAD_MIN_CHARS = 2
+# Taille d'une page /search/movie : une page pleine peut cacher d'autres films
+TMDB_PAGE_SIZE = 20
+
+
+def typeahead_search_df(
+    query: str,
+    year: Optional[int],
+    state_key: str,
+    spinner_text: str = "Recherche en cours sur TMDB...",
+    language: str = "fr-FR",
+) -> Optional[pd.DataFrame]:
+    """
+    Suggestions pour une saisie validée (st.text_input relance la page à
+    Entrée / perte de focus, pas à chaque touche), du moins cher au plus cher :
+      1. même saisie qu'au rerun précédent -> résultats déjà affichés
+      2. requête déjà en cache (toutes sessions) -> sans réseau
+      3. saisie qui prolonge la précédente, dont les résultats étaient complets
+         (page TMDB non pleine) -> filtrage local, sans réseau
+      4. sinon, recherche TMDB
+
+    Le filtrage local d'une page pleine n'est que provisoire : il ne sert
+    que si la recherche TMDB échoue.
+    """
+    state = st.session_state.get(state_key) or {}
+    previous_df: Optional[pd.DataFrame] = state.get("df")
+
+    q = normalize_query(query or "")
+    if len(q) < TYPEAHEAD_MIN_CHARS:
+        return previous_df
+
+    if state.get("query") == q and state.get("year") == year:
+        return previous_df
+
+    refined: Optional[pd.DataFrame] = None
+    if (
+        previous_df is not None
+        and state.get("query")
+        and q.startswith(state["query"])
+        and state.get("year") == year
+    ):
+        refined = refine_results_df(previous_df, q)
+
+    service = get_search_service(language)
+    cached = service.peek(q, year)
+    if cached is not None:
+        df = service.to_df(cached)
+        complete = len(cached) < TMDB_PAGE_SIZE
+    elif refined is not None and not refined.empty and state.get("complete"):
+        df, complete = refined, True
+    else:
+        try:
+            with st.spinner(spinner_text):
+                movies = service.search(query, year)
+        except Exception:
+            if refined is None:
+                raise
+            # Résultats provisoires : la requête sera retentée au prochain rerun
+            return refined
+        df = service.to_df(movies)
+        complete = len(movies) < TMDB_PAGE_SIZE
+
+    st.session_state[state_key] = {"query": q, "year": year, "df": df, "complete": complete}
+    return df
+
+
+# ========= Récupération TMDB + IMDb d'un film =========
+
+def _safe_call(fn, *args) -> Optional[Dict[str, Any]]:
+    try:
+        return fn(*args)
+    except Exception:
+        return None
+
+
+def fetch_movie_bundle(
+    tmdb: TMDBClient,
+    imdb_client: Optional[IMDbClient],
+    movie_id: int,
+) -> Dict[str, Any]:
+    """
+    Détails + crédits TMDB, notes + box office IMDb d'un film, en parallèle.
+    Si le tconst est déjà connu (table de correspondance), les appels IMDb
+    partent sans attendre les détails TMDB.
+    """
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        details_future = submit_in_context(pool, tmdb.get_movie_details, movie_id)
+        credits_future = submit_in_context(pool, tmdb.get_movie_credits, movie_id)
+
+        imdb_id = tmdb.get_known_imdb_id(movie_id) if imdb_client else None
+        if imdb_id:
+            ratings_future = submit_in_context(pool, _safe_call, imdb_client.get_ratings, imdb_id)
+            business_future = submit_in_context(pool, _safe_call, imdb_client.get_business, imdb_id)
+
+        details = details_future.result()
+
+        if imdb_client and not imdb_id:
+            imdb_id = details.get("imdb_id")
+            if imdb_id:
+                ratings_future = submit_in_context(pool, _safe_call, imdb_client.get_ratings, imdb_id)
+                business_future = submit_in_context(pool, _safe_call, imdb_client.get_business, imdb_id)
+
+        imdb_rating_data = ratings_future.result() if imdb_id else None
+        imdb_business = business_future.result() if imdb_id else None
+
+        return {
+            "details": details,
+            "credits": credits_future.result(),
+            "imdb_rating_data": imdb_rating_data,
+            "imdb_business": imdb_business,
+        }
 
 
 # ========= Helper robuste pour parser la réponse IMDb get-ratings =========
@@ -382,15 +496,7 @@ def render_single_movie_analysis():
             except ValueError:
                 st.warning("Année invalide, je l’ignore.")
 
-    df_results = None
-    if query and len(query.strip()) >= 2:
-        with st.spinner("Recherche en cours sur TMDB..."):
-            df_results = search_movies_df(
-                query=query.strip(), year=year, language="fr-FR"
-            )
-        st.session_state.compare_search_results = df_results
-    else:
-        df_results = st.session_state.get("compare_search_results")
+    df_results = typeahead_search_df(query, year, state_key="compare_search_results")
 
     if df_results is None or df_results.empty:
         st.info(
@@ -430,23 +536,11 @@ def render_single_movie_analysis():
         imdb_client = None  # on fera sans si pas de clé
 
     with st.spinner("Récupération des détails du film..."):
-        details = tmdb.get_movie_details(movie_id)
-        credits = tmdb.get_movie_credits(movie_id)
-
-        imdb_id = details.get("imdb_id")
-        imdb_rating_data: Optional[Dict[str, Any]] = None
-        imdb_business: Optional[Dict[str, Any]] = None
-
-        if imdb_client and imdb_id:
-            try:
-                imdb_rating_data = imdb_client.get_ratings(imdb_id)
-            except Exception:
-                imdb_rating_data = None
-
-            try:
-                imdb_business = imdb_client.get_business(imdb_id)
-            except Exception:
-                imdb_business = None
+        bundle = fetch_movie_bundle(tmdb, imdb_client, movie_id)
+        details = bundle["details"]
+        credits = bundle["credits"]
+        imdb_rating_data: Optional[Dict[str, Any]] = bundle["imdb_rating_data"]
+        imdb_business: Optional[Dict[str, Any]] = bundle["imdb_business"]
 
     # ------- Pré-calcul des métriques -------
     tmdb_vote = details.get("vote_average")
@@ -699,22 +793,14 @@ def render_compare_two_movies():
                 st.warning("Année invalide pour le film 2")
 
     # ------- Recherche si au moins 2 caractères -------
-    df_results1 = None
-    df_results2 = None
-
-    if query1 and len(query1.strip()) >= 2:
-        with st.spinner("Recherche film 1 sur TMDB..."):
-            df_results1 = search_movies_df(query=query1.strip(), year=year1, language="fr-FR")
-        st.session_state.compare_1_results = df_results1
-    else:
-        df_results1 = st.session_state.get("compare_1_results")
-
-    if query2 and len(query2.strip()) >= 2:
-        with st.spinner("Recherche film 2 sur TMDB..."):
-            df_results2 = search_movies_df(query=query2.strip(), year=year2, language="fr-FR")
-        st.session_state.compare_2_results = df_results2
-    else:
-        df_results2 = st.session_state.get("compare_2_results")
+    df_results1 = typeahead_search_df(
+        query1, year1, state_key="compare_1_results",
+        spinner_text="Recherche film 1 sur TMDB...",
+    )
+    df_results2 = typeahead_search_df(
+        query2, year2, state_key="compare_2_results",
+        spinner_text="Recherche film 2 sur TMDB...",
+    )
 
     if df_results1 is None or df_results1.empty or df_results2 is None or df_results2.empty:
         st.info("Tape les titres (min. 2 caractères) pour voir les résultats de recherche.")
@@ -763,33 +849,20 @@ def render_compare_two_movies():
         imdb_client = None
 
     with st.spinner("Récupération des détails..."):
-        details1 = tmdb.get_movie_details(movie_id1)
-        credits1 = tmdb.get_movie_credits(movie_id1)
-        details2 = tmdb.get_movie_details(movie_id2)
-        credits2 = tmdb.get_movie_credits(movie_id2)
-
-        imdb_id1 = details1.get("imdb_id")
-        imdb_id2 = details2.get("imdb_id")
-
-        imdb_rating_data1: Optional[Dict[str, Any]] = None
-        imdb_business1: Optional[Dict[str, Any]] = None
-        imdb_rating_data2: Optional[Dict[str, Any]] = None
-        imdb_business2: Optional[Dict[str, Any]] = None
-
-        if imdb_client:
-            if imdb_id1:
-                try:
-                    imdb_rating_data1 = imdb_client.get_ratings(imdb_id1)
-                    imdb_business1 = imdb_client.get_business(imdb_id1)
-                except Exception:
-                    pass
-
-            if imdb_id2:
-                try:
-                    imdb_rating_data2 = imdb_client.get_ratings(imdb_id2)
-                    imdb_business2 = imdb_client.get_business(imdb_id2)
-                except Exception:
-                    pass
+        # Les deux films sont récupérés en parallèle
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            bundle1_future = submit_in_context(pool, fetch_movie_bundle, tmdb, imdb_client, movie_id1)
+            bundle2_future = submit_in_context(pool, fetch_movie_bundle, tmdb, imdb_client, movie_id2)
+            bundle1 = bundle1_future.result()
+            bundle2 = bundle2_future.result()
+
+        details1, credits1 = bundle1["details"], bundle1["credits"]
+        details2, credits2 = bundle2["details"], bundle2["credits"]
+
+        imdb_rating_data1: Optional[Dict[str, Any]] = bundle1["imdb_rating_data"]
+        imdb_business1: Optional[Dict[str, Any]] = bundle1["imdb_business"]
+        imdb_rating_data2: Optional[Dict[str, Any]] = bundle2["imdb_rating_data"]
+        imdb_business2: Optional[Dict[str, Any]] = bundle2["imdb_business"]
 
     # ------- Pré-calcul des métriques -------
     def extract_movie_data(details, credits, imdb_rating_data):
@@ -1088,7 +1161,9 @@ def render_compare_page():
         horizontal=True,
     )
 
-    if mode == "Analyse d'un film":
-        render_single_movie_analysis()
-    else:
-        render_compare_two_movies()
\ No newline at end of file
+    # Recherches et fiches déclenchées par l'utilisateur : priorité maximale
+    with request_priority(INTERACTIVE):
+        if mode == "Analyse d'un film":
+            render_single_movie_analysis()
+        else:
+            render_compare_two_movies()
\ No newline at end of file
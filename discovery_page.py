@@ -1,10 +1,14 @@
 # discovery_page.py
 import math
+from concurrent.futures import ThreadPoolExecutor, wait, TimeoutError as FutureTimeout
 import streamlit as st
 import pandas as pd
 import altair as alt
 import streamlit.components.v1 as components
 from tmdb_client import TMDBClient
+from filter_index import FilterIndex
+from chart_data import histogram, histogram_chart, thin_scatter, with_density
+from latency import LatencyBudget, BudgetExceeded
 
 # ===================== CSS scroll horizontal + cartes top 10 =====================
 
@@ -248,6 +252,9 @@ TOP10_CSS = """
 
 # ===================== Chargement rapide =====================
 
+# Budget de latence du chargement de la page (secondes)
+DISCOVERY_BUDGET_S = 4.0
+
 
 @st.cache_data(show_spinner=False)
 def load_movies_data(language: str = "fr-FR") -> pd.DataFrame:
@@ -260,11 +267,29 @@ def load_movies_data(language: str = "fr-FR") -> pd.DataFrame:
         language=language,
     )
 
-    genre_map = client.get_genre_map()
-    movies = client.get_now_playing_movies(nb_pages=1)
-    df = client.movies_to_dataframe(movies, genre_map)
+    missing: list[str] = []
+
+    with LatencyBudget(DISCOVERY_BUDGET_S) as budget:
+        pool = ThreadPoolExecutor(max_workers=2)
+        genre_future = budget.submit(pool, client.get_genre_map)
+        movies_future = budget.submit(pool, client.get_now_playing_movies, 1)
+        wait([genre_future, movies_future], timeout=budget.remaining())
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    # Sans la liste des films on ne peut rien afficher : on laisse remonter l'erreur
+    movies = movies_future.result(timeout=0)
+
+    # Sans la table des genres, on affiche quand même les films (genres bruts)
+    genre_map: dict[int, str] = {}
+    if genre_future.done() and genre_future.exception() is None:
+        genre_map = genre_future.result()
+    else:
+        missing.append("genres")
 
-    return df.dropna(subset=["title"]).reset_index(drop=True)
+    df = client.movies_to_dataframe(movies, genre_map)
+    df = df.dropna(subset=["title"]).reset_index(drop=True)
+    df.attrs["missing"] = missing
+    return df
 
 
 # ===================== Carrousel horizontal Top 10 =====================
@@ -341,12 +366,33 @@ def render_top10_carousel(df: pd.DataFrame):
 # ===================== Section Data Analyse / Exploration =====================
 
 
-def render_exploration_section(df: pd.DataFrame):
+def build_exploration_data(df: pd.DataFrame) -> tuple[pd.DataFrame, FilterIndex]:
+    """
+    Films explorables (note et popularité connues) + index des filtres de la
+    section : note triée pour la tranche de notes, bitmaps par langue.
+    """
+    df_explo = df.dropna(subset=["vote_average", "popularity"]).reset_index(drop=True)
+    filters = (
+        FilterIndex(len(df_explo))
+        .add_sorted("vote_average", df_explo["vote_average"])
+        .add_values("original_language", df_explo["original_language"])
+    )
+    return df_explo, filters
+
+
+@st.cache_resource(show_spinner=False)
+def load_exploration_data(language: str = "fr-FR") -> tuple[pd.DataFrame, FilterIndex]:
+    """Partagé sans copie entre reruns (lecture seule) ; vidé avec load_movies_data."""
+    return build_exploration_data(load_movies_data(language))
+
+
+def render_exploration_section(
+    df: pd.DataFrame, explo: tuple[pd.DataFrame, FilterIndex] | None = None
+):
     st.markdown("### 📊 Explorer les sorties en salle")
     st.caption("Un regard data sur les films actuellement en salle : distributions, pays, genres…")
 
-    df_explo = df.copy()
-    df_explo = df_explo.dropna(subset=["vote_average", "popularity"])
+    df_explo, filters = explo if explo is not None else build_exploration_data(df)
 
     # ---------- KPIs ----------
     col1, col2, col3, col4 = st.columns(4)
@@ -377,21 +423,10 @@ def render_exploration_section(df: pd.DataFrame):
         # ---------- DISTRIBUTION DES NOTES ----------
     st.markdown("#### 🎯 Distribution des notes TMDB")
 
-    # Histogramme global
-    chart_notes = (
-        alt.Chart(df_explo)
-        .mark_bar()
-        .encode(
-            x=alt.X(
-                "vote_average:Q",
-                bin=alt.Bin(step=0.5),
-                title="Note moyenne TMDB",
-            ),
-            y=alt.Y("count():Q", title="Nombre de films"),
-            tooltip=[alt.Tooltip("count():Q", title="Nombre de films")],
-        )
-        .properties(height=260)
-    )
+    # Histogramme global : classes calculées ici, seules ~20 lignes partent au navigateur
+    chart_notes = histogram_chart(
+        histogram(df_explo["vote_average"], step=0.5), "Note moyenne TMDB"
+    ).properties(height=260)
 
     st.altair_chart(chart_notes, use_container_width=True)
 
@@ -420,13 +455,10 @@ def render_exploration_section(df: pd.DataFrame):
         format="%.1f",
     )
 
-    # Films dans la tranche [low, high)
-    mask = (df_explo["vote_average"] >= low) & (df_explo["vote_average"] < high)
-    df_slice = (
-        df_explo[mask]
-        .sort_values("vote_average", ascending=False)
-        .reset_index(drop=True)
-    )
+    # Films dans la tranche [low, high) : dichotomie dans les notes triées,
+    # positions renvoyées par note croissante (d'où l'inversion)
+    in_band = filters.range_positions("vote_average", low, high, closed="left")
+    df_slice = df_explo.iloc[in_band[::-1]].reset_index(drop=True)
 
     st.write(f"🎬 {len(df_slice)} film(s) entre {low:.1f} et {high:.1f} :")
 
@@ -547,7 +579,9 @@ def render_exploration_section(df: pd.DataFrame):
             )
 
             df_lang = (
-                df_explo[df_explo["original_language"] == selected_lang]
+                df_explo.iloc[
+                    filters.positions(filters.isin("original_language", [selected_lang]))
+                ]
                 .sort_values("vote_average", ascending=False)
                 .head(10)
             )
@@ -615,9 +649,16 @@ def render_exploration_section(df: pd.DataFrame):
     df_scatter = df_explo[
         df_explo["popularity"] <= df_explo["popularity"].quantile(0.98)
     ]
+    # Nuage borné : au-delà de MAX_POINTS films, grille de densité + films les plus populaires
+    points, grid = thin_scatter(
+        df_scatter,
+        "vote_average",
+        "popularity",
+        columns=["title", "original_language"],
+    )
 
-    scatter_chart = (
-        alt.Chart(df_scatter)
+    scatter_chart = with_density(
+        alt.Chart(points)
         .mark_circle(size=70, opacity=0.7)
         .encode(
             x=alt.X("vote_average:Q", title="Note moyenne TMDB"),
@@ -632,9 +673,11 @@ def render_exploration_section(df: pd.DataFrame):
                 alt.Tooltip("popularity:Q", title="Popularité", format=".1f"),
                 alt.Tooltip("original_language:N", title="Langue"),
             ],
-        )
-        .properties(height=320)
-    )
+        ),
+        grid,
+        "Note moyenne TMDB",
+        "Popularité",
+    ).properties(height=320)
 
     st.altair_chart(scatter_chart, use_container_width=True)
 
@@ -653,7 +696,24 @@ def render_discovery_page():
     )
 
     with st.spinner("Chargement des films..."):
-        df = load_movies_data("fr-FR")
+        try:
+            df = load_movies_data("fr-FR")
+        except (BudgetExceeded, FutureTimeout):
+            st.warning("⏱️ TMDB met trop de temps à répondre, réessaie dans un instant.")
+            return
+
+    if df.attrs.get("missing"):
+        st.caption(
+            "⏱️ Affichage partiel (budget de latence dépassé) : "
+            + ", ".join(df.attrs["missing"])
+            + " manquant(s)."
+        )
+        # On ne garde pas en cache un résultat incomplet (ni l'index construit dessus)
+        load_movies_data.clear()
+        load_exploration_data.clear()
+        explo = None
+    else:
+        explo = load_exploration_data("fr-FR")
 
     # 1) Top 10 esthétique
     render_top10_carousel(df)
@@ -661,4 +721,4 @@ def render_discovery_page():
     st.markdown("---")
 
     # 2) Section exploration / data analyse
-    render_exploration_section(df)
+    render_exploration_section(df, explo)
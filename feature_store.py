@@ -0,0 +1,250 @@
+# feature_store.py
+"""
+Feature store et cache de prédictions de la page ML, partagés entre sessions.
+
+- features    : vecteur de features d'un film (avant alignement sur les colonnes
+                d'entraînement) + dates de récupération TMDB / IMDb
+- predictions : probabilité d'Oscar par (film, hash de l'artefact modèle)
+- explanations : contributions TreeSHAP des features, même clé que predictions
+
+Une nouvelle version du modèle change le hash : les anciennes prédictions sont
+ignorées sans invalidation manuelle, alors que les features restent réutilisables.
+"""
+
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_DB_PATH = os.path.join("data", "feature_store.sqlite")
+
+# Les notes TMDB / IMDb bougent : au-delà, les features sont re-récupérées
+DEFAULT_FEATURES_TTL_S = 7 * 24 * 3600
+# Features construites sans les notes IMDb (appel en échec) : retentées bien plus tôt
+DEFAULT_IMDB_RETRY_TTL_S = 6 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS features (
+    movie_id INTEGER PRIMARY KEY,
+    features TEXT NOT NULL,
+    meta TEXT NOT NULL,
+    tmdb_fetched_at REAL NOT NULL,
+    imdb_fetched_at REAL
+);
+CREATE TABLE IF NOT EXISTS predictions (
+    movie_id INTEGER NOT NULL,
+    model_hash TEXT NOT NULL,
+    proba REAL NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (movie_id, model_hash)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS explanations (
+    movie_id INTEGER NOT NULL,
+    model_hash TEXT NOT NULL,
+    contribs TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (movie_id, model_hash)
+) WITHOUT ROWID;
+"""
+
+# SQLite limite le nombre de paramètres par requête
+_MAX_PARAMS = 500
+
+# Features fraîches (alias f) : TTL normal, ou TTL court si IMDb n'a pas répondu
+_FRESH_FEATURES = (
+    "f.tmdb_fetched_at >= ? AND (f.imdb_fetched_at IS NOT NULL OR f.tmdb_fetched_at >= ?)"
+)
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """Hash (tronqué) du contenu d'un artefact modèle."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+def _to_json(row: Dict[str, Any]) -> str:
+    # NaN n'est pas du JSON valide : stocké en null
+    return json.dumps({
+        k: None if isinstance(v, float) and math.isnan(v) else v
+        for k, v in row.items()
+    })
+
+
+def _from_json(payload: str) -> Dict[str, Any]:
+    return {k: float("nan") if v is None else v for k, v in json.loads(payload).items()}
+
+
+class FeatureStore:
+    """
+    Stockage SQLite partagé entre sessions / threads (accès sérialisés par un verrou).
+    """
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        features_ttl_s: float = DEFAULT_FEATURES_TTL_S,
+        imdb_retry_ttl_s: float = DEFAULT_IMDB_RETRY_TTL_S,
+    ):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db_path = db_path
+        self.features_ttl_s = features_ttl_s
+        self.imdb_retry_ttl_s = min(imdb_retry_ttl_s, features_ttl_s)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+    # ---------- Features ----------
+    def put_features(
+        self,
+        movie_id: int,
+        features: Dict[str, Any],
+        meta: Optional[Dict[str, Any]] = None,
+        imdb_fetched: bool = False,
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO features "
+                "(movie_id, features, meta, tmdb_fetched_at, imdb_fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (int(movie_id), _to_json(features), json.dumps(meta or {}), now, now if imdb_fetched else None),
+            )
+            # Nouvelles features : les prédictions calculées sur les anciennes ne valent plus
+            self._conn.execute("DELETE FROM predictions WHERE movie_id = ?", (int(movie_id),))
+            self._conn.execute("DELETE FROM explanations WHERE movie_id = ?", (int(movie_id),))
+            self._conn.commit()
+
+    def _freshness_params(self) -> List[float]:
+        now = time.time()
+        return [now - self.features_ttl_s, now - self.imdb_retry_ttl_s]
+
+    def get_features_many(self, movie_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        {movie_id: {"features", "meta", "tmdb_fetched_at", "imdb_fetched_at"}}
+        pour les films dont les features sont encore fraîches (les lignes sans
+        notes IMDb expirent après imdb_retry_ttl_s, pour retenter IMDb).
+        """
+        ids: List[int] = [int(m) for m in movie_ids]
+        fresh = self._freshness_params()
+        found: Dict[int, Dict[str, Any]] = {}
+        for start in range(0, len(ids), _MAX_PARAMS):
+            chunk = ids[start:start + _MAX_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT f.movie_id, f.features, f.meta, f.tmdb_fetched_at, f.imdb_fetched_at "
+                    f"FROM features f WHERE f.movie_id IN ({placeholders}) AND {_FRESH_FEATURES}",
+                    [*chunk, *fresh],
+                ).fetchall()
+            for movie_id, features, meta, tmdb_at, imdb_at in rows:
+                found[movie_id] = {
+                    "features": _from_json(features),
+                    "meta": json.loads(meta),
+                    "tmdb_fetched_at": tmdb_at,
+                    "imdb_fetched_at": imdb_at,
+                }
+        return found
+
+    def get_features(self, movie_id: int) -> Optional[Dict[str, Any]]:
+        return self.get_features_many([movie_id]).get(int(movie_id))
+
+    # ---------- Prédictions ----------
+    def put_predictions(self, model_hash: str, probas: Dict[int, float]) -> None:
+        if not probas:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO predictions (movie_id, model_hash, proba, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                [(int(m), model_hash, float(p), now) for m, p in probas.items()],
+            )
+            self._conn.commit()
+
+    def get_predictions(self, model_hash: str, movie_ids: Iterable[int]) -> Dict[int, float]:
+        """Prédictions de ce modèle, tant que les features du film sont fraîches."""
+        ids: List[int] = [int(m) for m in movie_ids]
+        fresh = self._freshness_params()
+        found: Dict[int, float] = {}
+        for start in range(0, len(ids), _MAX_PARAMS):
+            chunk = ids[start:start + _MAX_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT p.movie_id, p.proba FROM predictions p "
+                    "JOIN features f ON f.movie_id = p.movie_id "
+                    f"WHERE p.model_hash = ? AND p.movie_id IN ({placeholders}) "
+                    f"AND {_FRESH_FEATURES}",
+                    [model_hash, *chunk, *fresh],
+                ).fetchall()
+            found.update(dict(rows))
+        return found
+
+    # ---------- Explications ----------
+    def put_explanations(self, model_hash: str, contribs: Dict[int, List[float]]) -> None:
+        """Contributions par film, dans l'ordre des colonnes du modèle (+ biais en dernier)."""
+        if not contribs:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO explanations (movie_id, model_hash, contribs, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                [(int(m), model_hash, json.dumps([float(v) for v in c]), now) for m, c in contribs.items()],
+            )
+            self._conn.commit()
+
+    def get_explanations(self, model_hash: str, movie_ids: Iterable[int]) -> Dict[int, List[float]]:
+        """Explications de ce modèle, tant que les features du film sont fraîches."""
+        ids: List[int] = [int(m) for m in movie_ids]
+        fresh = self._freshness_params()
+        found: Dict[int, List[float]] = {}
+        for start in range(0, len(ids), _MAX_PARAMS):
+            chunk = ids[start:start + _MAX_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT e.movie_id, e.contribs FROM explanations e "
+                    "JOIN features f ON f.movie_id = e.movie_id "
+                    f"WHERE e.model_hash = ? AND e.movie_id IN ({placeholders}) "
+                    f"AND {_FRESH_FEATURES}",
+                    [model_hash, *chunk, *fresh],
+                ).fetchall()
+            found.update({movie_id: json.loads(contribs) for movie_id, contribs in rows})
+        return found
+
+    def forget(self, movie_id: int) -> None:
+        """Oublie features, prédictions et explications d'un film (données corrigées en amont...)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM features WHERE movie_id = ?", (int(movie_id),))
+            self._conn.execute("DELETE FROM predictions WHERE movie_id = ?", (int(movie_id),))
+            self._conn.execute("DELETE FROM explanations WHERE movie_id = ?", (int(movie_id),))
+            self._conn.commit()
+
+
+_default_store: Optional[FeatureStore] = None
+_default_lock = threading.Lock()
+
+
+def get_default_feature_store() -> Optional[FeatureStore]:
+    """
+    Store partagé par tout le process (chemin surchargeable via FEATURE_STORE_DB).
+    Renvoie None si la base ne peut pas être ouverte (disque en lecture seule, etc.).
+    """
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            try:
+                _default_store = FeatureStore(os.getenv("FEATURE_STORE_DB", DEFAULT_DB_PATH))
+            except (sqlite3.Error, OSError):
+                return None
+        return _default_store
@@ -0,0 +1,125 @@
+# filter_index.py
+"""
+Index de filtrage des pages Data Analyse et Découverte.
+
+Construit une fois au chargement du catalogue :
+- une bitmap par valeur d'une colonne catégorielle (langue, genre, année,
+  tranche de votes...) : bits des lignes qui ont cette valeur, empaquetés
+  8 par octet (np.packbits) ;
+- un tableau trié (valeurs + positions) pour les filtres d'intervalle sur une
+  colonne continue (note) : bornes trouvées par dichotomie.
+
+Une combinaison de filtres est un ET / OU de bitmaps (opérateurs & et | sur
+des tableaux uint8 de n/8 octets) ; seules les lignes retenues sont ensuite
+lues dans le DataFrame.
+"""
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class FilterIndex:
+    """Bitmaps par valeur et tableaux triés des colonnes d'un DataFrame (lignes 0..n-1)."""
+
+    def __init__(self, n_rows: int):
+        self.n_rows = n_rows
+        self._bitmaps: Dict[str, Dict[Any, np.ndarray]] = {}
+        self._sorted: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    # ---------- Construction ----------
+    def add_values(self, name: str, values: Iterable[Any], multi: bool = False) -> "FilterIndex":
+        """
+        Une bitmap par valeur distincte (valeurs manquantes ignorées).
+        multi=True : chaque ligne porte une liste de valeurs (ex. genres).
+        """
+        series = pd.Series(list(values), dtype=object)
+        if multi:
+            series = series.explode()
+        series = series.dropna()
+        codes, uniques = pd.factorize(series, sort=True)
+        rows = series.index.to_numpy()
+
+        # Lignes regroupées par valeur : un seul tri pour toutes les bitmaps
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        bitmaps = {}
+        for k, key in enumerate(uniques):
+            bitmaps[_key(key)] = self._pack(rows[order[bounds[k]:bounds[k + 1]]])
+        self._bitmaps[name] = bitmaps
+        return self
+
+    def add_sorted(self, name: str, values: Iterable[Any]) -> "FilterIndex":
+        """Valeurs numériques triées (manquantes ignorées) pour les filtres d'intervalle."""
+        arr = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=np.float64)
+        rows = np.flatnonzero(~np.isnan(arr))
+        order = np.argsort(arr[rows], kind="stable")
+        self._sorted[name] = (arr[rows][order], rows[order])
+        return self
+
+    # ---------- Bitmaps ----------
+    def all(self) -> np.ndarray:
+        return self._pack(np.arange(self.n_rows))
+
+    def none(self) -> np.ndarray:
+        return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+
+    def keys(self, name: str) -> list:
+        return list(self._bitmaps[name])
+
+    def isin(self, name: str, keys: Iterable[Any]) -> np.ndarray:
+        """Lignes dont la valeur est dans keys (valeurs inconnues ignorées)."""
+        bitmaps = self._bitmaps[name]
+        out = self.none()
+        for key in keys:
+            bitmap = bitmaps.get(_key(key))
+            if bitmap is not None:
+                out |= bitmap
+        return out
+
+    def keys_between(self, name: str, low: Any = None, high: Any = None) -> np.ndarray:
+        """Lignes dont la valeur (discrète : année, tranche...) est dans [low, high]."""
+        return self.isin(name, [
+            key for key in self._bitmaps[name]
+            if (low is None or key >= low) and (high is None or key <= high)
+        ])
+
+    def range(self, name: str, low: Optional[float] = None, high: Optional[float] = None,
+              closed: str = "both") -> np.ndarray:
+        """Lignes dont la valeur continue est dans l'intervalle (cf. range_positions)."""
+        return self._pack(self.range_positions(name, low, high, closed))
+
+    def range_positions(self, name: str, low: Optional[float] = None, high: Optional[float] = None,
+                        closed: str = "both") -> np.ndarray:
+        """
+        Positions des lignes dont la valeur est dans l'intervalle, par valeur
+        croissante. closed : "both" ([low, high]) ou "left" ([low, high[).
+        """
+        values, rows = self._sorted[name]
+        start = 0 if low is None else np.searchsorted(values, low, side="left")
+        end = len(values) if high is None else np.searchsorted(
+            values, high, side="right" if closed == "both" else "left"
+        )
+        return rows[start:max(start, end)]
+
+    # ---------- Lecture ----------
+    def positions(self, bitmap: np.ndarray) -> np.ndarray:
+        """Positions (croissantes) des lignes retenues par une bitmap."""
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.n_rows))
+
+    def count(self, bitmap: np.ndarray) -> int:
+        return int(np.unpackbits(bitmap, count=self.n_rows).sum())
+
+    def _pack(self, rows: np.ndarray) -> np.ndarray:
+        bits = np.zeros(self.n_rows, dtype=bool)
+        bits[rows] = True
+        return np.packbits(bits)
+
+
+def _key(value: Any) -> Any:
+    # Les scalaires NumPy (années float64, int64...) deviennent des clés Python
+    return value.item() if isinstance(value, np.generic) else value
@@ -0,0 +1,111 @@
+# id_mapping.py
+"""
+Table de correspondance persistante TMDB id <-> IMDb tconst.
+
+Alimentée par chaque réponse TMDB qui contient un imdb_id (détails du film,
+external_ids). Pour un film déjà vu, on connaît donc son tconst sans attendre
+les détails TMDB : les appels IMDb peuvent partir immédiatement.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Optional, Dict, Iterable, List, Tuple
+
+DEFAULT_DB_PATH = os.path.join("data", "id_mapping.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS id_map (
+    tmdb_id INTEGER PRIMARY KEY,
+    imdb_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_id_map_imdb ON id_map (imdb_id);
+"""
+
+# SQLite limite le nombre de paramètres par requête
+_MAX_PARAMS = 500
+
+
+class IdMappingStore:
+    """
+    Stockage SQLite partagé entre sessions / threads (accès sérialisés par un verrou).
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+    # ---------- Écriture ----------
+    def record(self, tmdb_id: int, imdb_id: Optional[str]) -> None:
+        if tmdb_id is None or not imdb_id:
+            return
+        self.record_many([(tmdb_id, imdb_id)])
+
+    def record_many(self, pairs: Iterable[Tuple[int, Optional[str]]]) -> None:
+        rows = [(int(t), i) for t, i in pairs if t is not None and i]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO id_map (tmdb_id, imdb_id) VALUES (?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    # ---------- Lecture ----------
+    def get_imdb_id(self, tmdb_id: int) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT imdb_id FROM id_map WHERE tmdb_id = ?", (int(tmdb_id),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_tmdb_id(self, imdb_id: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tmdb_id FROM id_map WHERE imdb_id = ?", (imdb_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def resolve_many(self, tmdb_ids: Iterable[int]) -> Dict[int, str]:
+        """
+        Résolution en masse : renvoie {tmdb_id: imdb_id} pour les films connus
+        (les ids inconnus sont simplement absents du résultat).
+        """
+        ids: List[int] = [int(t) for t in tmdb_ids if t is not None]
+        found: Dict[int, str] = {}
+        for start in range(0, len(ids), _MAX_PARAMS):
+            chunk = ids[start:start + _MAX_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT tmdb_id, imdb_id FROM id_map WHERE tmdb_id IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+            found.update({t: i for t, i in rows})
+        return found
+
+
+_default_store: Optional[IdMappingStore] = None
+_default_lock = threading.Lock()
+
+
+def get_default_store() -> Optional[IdMappingStore]:
+    """
+    Store partagé par tout le process (chemin surchargeable via ID_MAPPING_DB).
+    Renvoie None si la base ne peut pas être ouverte (disque en lecture seule, etc.).
+    """
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            try:
+                _default_store = IdMappingStore(os.getenv("ID_MAPPING_DB", DEFAULT_DB_PATH))
+            except (sqlite3.Error, OSError):
+                return None
+        return _default_store
@@ -5,25 +5,89 @@ from typing import Optional, Dict, Any
 
 import requests
 
+from imdb_datasets import IMDbLocalStore
+from negative_cache import NegativeCache, get_default_negative_cache, NO_DATA, ERROR
+from scheduler import imdb_scheduler
+
+
+class IMDbNoDataError(LookupError):
+    """Lookup IMDb sauté : un échec récent est mémorisé dans le cache négatif."""
+
+
+def _ratings_are_empty(data: Dict[str, Any]) -> bool:
+    """get-ratings répond 200 sans note pour les titres jamais notés."""
+    if data.get("rating") or data.get("ratingsHistograms"):
+        return False
+    title_block = (data.get("data") or {}).get("title") or {}
+    summary = title_block.get("ratingsSummary") or {}
+    return not summary.get("aggregateRating")
+
 
 class IMDbClient:
     BASE_URL = "https://imdb8.p.rapidapi.com"
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        local_store: Optional[IMDbLocalStore] = None,
+        negative_cache: Optional[NegativeCache] = None,
+    ):
         self.api_key = api_key or os.getenv("RAPIDAPI_IMDB_KEY")
-        if not self.api_key:
-            raise ValueError("Aucune clé RapidAPI IMDb fournie (RAPIDAPI_IMDB_KEY).")
+        # Base locale issue des dumps IMDb (cf. imdb_datasets.py), si ingérée
+        self.local_store = local_store or IMDbLocalStore.open_default()
+        if not self.api_key and self.local_store is None:
+            raise ValueError(
+                "Aucune clé RapidAPI IMDb fournie (RAPIDAPI_IMDB_KEY) "
+                "et aucune base IMDb locale trouvée."
+            )
+        # Mémorise les tconst / endpoints sans données pour ne pas les retenter
+        self.negative_cache = negative_cache or get_default_negative_cache()
 
     def _get(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.api_key:
+            raise ValueError("Aucune clé RapidAPI IMDb fournie (RAPIDAPI_IMDB_KEY).")
         headers = {
             "X-RapidAPI-Key": self.api_key,
             "X-RapidAPI-Host": "imdb8.p.rapidapi.com",
         }
         url = f"{self.BASE_URL}{path}"
-        resp = requests.get(url, params=params, headers=headers, timeout=15)
+        # Quota RapidAPI partagé : admission selon la priorité de l'appel
+        with imdb_scheduler.slot(timeout=15):
+            resp = requests.get(url, params=params, headers=headers, timeout=15)
         resp.raise_for_status()
         return resp.json()
 
+    def _remember_failure(self, tconst: str, path: str, reason: str) -> None:
+        if self.negative_cache is not None:
+            try:
+                self.negative_cache.record(tconst, path, reason)
+            except Exception:
+                pass
+
+    def _get_title(self, path: str, tconst: str, is_empty=None) -> Dict[str, Any]:
+        """
+        Appel d'un endpoint par tconst, protégé par le cache négatif :
+        - échec récent mémorisé -> IMDbNoDataError sans appel réseau
+        - 404 / réponse vide -> mémorisé en "no_data" (TTL de quelques jours)
+        - autre erreur HTTP / réseau -> mémorisé en "error" (TTL court)
+        """
+        if self.negative_cache is not None and self.negative_cache.is_negative(tconst, path):
+            raise IMDbNoDataError(f"Pas de données IMDb récentes pour {tconst} ({path}).")
+
+        try:
+            data = self._get(path, params={"tconst": tconst})
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            self._remember_failure(tconst, path, NO_DATA if status == 404 else ERROR)
+            raise
+        except requests.RequestException:
+            self._remember_failure(tconst, path, ERROR)
+            raise
+
+        if not data or (is_empty is not None and is_empty(data)):
+            self._remember_failure(tconst, path, NO_DATA)
+        return data
+
     @staticmethod
     def _clean_tconst(imdb_id: str) -> str:
         """
@@ -48,7 +112,20 @@ class IMDbClient:
         => retourne { rating, ratingCount, ratingsHistograms, ... }
         """
         tconst = self._clean_tconst(imdb_id)
-        return self._get("/title/get-ratings", params={"tconst": tconst})
+        return self._get_title("/title/get-ratings", tconst, is_empty=_ratings_are_empty)
+
+    def get_rating_summary(self, imdb_id: str) -> Dict[str, Any]:
+        """
+        Note + nombre de votes : d'abord la base locale (O(1), hors ligne),
+        sinon l'endpoint get-ratings de RapidAPI.
+        => retourne au minimum { rating, ratingCount }
+        """
+        tconst = self._clean_tconst(imdb_id)
+        if self.local_store is not None:
+            local = self.local_store.get_rating(tconst)
+            if local is not None:
+                return local
+        return self.get_ratings(tconst)
 
     def get_business(self, imdb_id: str) -> Dict[str, Any]:
         """
@@ -56,4 +133,4 @@ class IMDbClient:
         GET /title/v2/get-business?tconst=ttXXXXXXX
         """
         tconst = self._clean_tconst(imdb_id)
-        return self._get("/title/v2/get-business", params={"tconst": tconst})
+        return self._get_title("/title/v2/get-business", tconst)
@@ -0,0 +1,257 @@
+# imdb_datasets.py
+"""
+Ingestion locale des dumps IMDb (https://datasets.imdbws.com/) :
+  - title.basics.tsv.gz  : titres, année, durée, genres
+  - title.ratings.tsv.gz : note moyenne + nombre de votes
+
+Les fichiers sont lus en streaming (gzip + csv ligne à ligne) et stockés dans
+une base SQLite indexée par tconst. IMDbClient s'en sert pour répondre aux
+notes / votes sans appel RapidAPI.
+
+Seuls les films sont utiles : dès que title.basics a été ingéré, les notes des
+séries, épisodes, etc. sont ignorées. Sans title.basics (le dump des notes ne
+donne pas le type), toutes les notes sont gardées.
+
+Usage :
+    python imdb_datasets.py --ratings title.ratings.tsv.gz --basics title.basics.tsv.gz
+"""
+
+import argparse
+import csv
+import gzip
+import os
+import sqlite3
+import sys
+import threading
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+
+DEFAULT_DB_PATH = os.path.join("data", "imdb_local.sqlite")
+
+# Types de titres conservés depuis title.basics (on ignore séries / épisodes) ;
+# TMDB référence aussi les courts métrages et les films sortis en vidéo
+MOVIE_TITLE_TYPES = {"movie", "tvMovie", "video", "short"}
+
+BATCH_SIZE = 50_000
+
+# Les TSV IMDb peuvent contenir des champs très longs
+csv.field_size_limit(sys.maxsize)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS titles (
+    tconst TEXT PRIMARY KEY,
+    title_type TEXT,
+    primary_title TEXT,
+    original_title TEXT,
+    start_year INTEGER,
+    runtime INTEGER,
+    genres TEXT,
+    rating REAL,
+    votes INTEGER
+) WITHOUT ROWID;
+"""
+
+
+def _null(value: str) -> Optional[str]:
+    """IMDb encode les valeurs manquantes avec '\\N'."""
+    return None if value == "\\N" else value
+
+
+def _to_int(value: str) -> Optional[int]:
+    value = _null(value)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _iter_tsv(path: str) -> Iterator[Dict[str, str]]:
+    """Lit un TSV IMDb (gzip ou non) ligne à ligne, sans tout charger en mémoire."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f, delimiter="\t", quoting=csv.QUOTE_NONE)
+        for row in reader:
+            yield row
+
+
+def _executemany_batched(
+    conn: sqlite3.Connection,
+    sql: str,
+    rows: Iterator[Tuple],
+) -> int:
+    batch: List[Tuple] = []
+    total = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            # Lignes réellement écrites (un UPDATE peut ne rien toucher)
+            total += conn.executemany(sql, batch).rowcount
+            batch.clear()
+    if batch:
+        total += conn.executemany(sql, batch).rowcount
+    conn.commit()
+    return total
+
+
+# ===================== Ingestion =====================
+
+def ingest_basics(conn: sqlite3.Connection, basics_path: str) -> int:
+    def rows():
+        for r in _iter_tsv(basics_path):
+            if r.get("titleType") not in MOVIE_TITLE_TYPES:
+                continue
+            yield (
+                r["tconst"],
+                r["titleType"],
+                _null(r.get("primaryTitle", "\\N")),
+                _null(r.get("originalTitle", "\\N")),
+                _to_int(r.get("startYear", "\\N")),
+                _to_int(r.get("runtimeMinutes", "\\N")),
+                _null(r.get("genres", "\\N")),
+            )
+
+    sql = """
+        INSERT INTO titles (tconst, title_type, primary_title, original_title,
+                            start_year, runtime, genres)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(tconst) DO UPDATE SET
+            title_type = excluded.title_type,
+            primary_title = excluded.primary_title,
+            original_title = excluded.original_title,
+            start_year = excluded.start_year,
+            runtime = excluded.runtime,
+            genres = excluded.genres
+    """
+    return _executemany_batched(conn, sql, rows())
+
+
+def ingest_ratings(conn: sqlite3.Connection, ratings_path: str) -> int:
+    """
+    Notes + votes. Si des titres typés sont déjà en base (title.basics), seules
+    leurs notes sont mises à jour : les autres tconst ne sont pas des films.
+    """
+    def rows():
+        for r in _iter_tsv(ratings_path):
+            try:
+                rating = float(r["averageRating"])
+            except (KeyError, ValueError):
+                continue
+            yield (r["tconst"], rating, _to_int(r.get("numVotes", "\\N")))
+
+    has_basics = conn.execute(
+        "SELECT 1 FROM titles WHERE title_type IS NOT NULL LIMIT 1"
+    ).fetchone() is not None
+    if has_basics:
+        # Notes d'une ingestion précédente sans filtre (titres non typés)
+        conn.execute("DELETE FROM titles WHERE title_type IS NULL")
+        sql = """
+            UPDATE titles SET rating = ?2, votes = ?3
+            WHERE tconst = ?1
+        """
+    else:
+        sql = """
+            INSERT INTO titles (tconst, rating, votes)
+            VALUES (?, ?, ?)
+            ON CONFLICT(tconst) DO UPDATE SET
+                rating = excluded.rating,
+                votes = excluded.votes
+        """
+    return _executemany_batched(conn, sql, rows())
+
+
+def ingest_imdb_datasets(
+    ratings_path: str,
+    basics_path: Optional[str] = None,
+    db_path: str = DEFAULT_DB_PATH,
+) -> Dict[str, int]:
+    """
+    Construit (ou met à jour) la base locale à partir des dumps IMDb.
+    Renvoie le nombre de lignes ingérées par fichier.
+    """
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        # Ingestion en vrac : on privilégie la vitesse d'écriture
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(SCHEMA)
+
+        counts: Dict[str, int] = {}
+        if basics_path:
+            counts["basics"] = ingest_basics(conn, basics_path)
+        counts["ratings"] = ingest_ratings(conn, ratings_path)
+        return counts
+    finally:
+        conn.close()
+
+
+# ===================== Lecture =====================
+
+class IMDbLocalStore:
+    """
+    Accès en lecture seule à la base locale IMDb (lookup O(1) par tconst).
+    Partageable entre threads Streamlit : les requêtes sont sérialisées par un verrou.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"Base IMDb locale introuvable : {db_path}")
+        self.db_path = db_path
+        self._conn = sqlite3.connect(
+            f"file:{db_path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open_default(cls) -> Optional["IMDbLocalStore"]:
+        """Ouvre la base pointée par IMDB_LOCAL_DB (ou data/imdb_local.sqlite) si elle existe."""
+        db_path = os.getenv("IMDB_LOCAL_DB", DEFAULT_DB_PATH)
+        if not os.path.exists(db_path):
+            return None
+        try:
+            return cls(db_path)
+        except sqlite3.Error:
+            return None
+
+    def get_title(self, tconst: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM titles WHERE tconst = ?", (tconst,)
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def get_rating(self, tconst: str) -> Optional[Dict[str, Any]]:
+        """
+        Renvoie la note au même format "plat" que l'endpoint get-ratings :
+        { tconst, rating, ratingCount }, ou None si le titre n'a pas de note.
+        """
+        title = self.get_title(tconst)
+        if not title or title.get("rating") is None:
+            return None
+        return {
+            "tconst": tconst,
+            "rating": title["rating"],
+            "ratingCount": title["votes"],
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Ingestion des dumps IMDb (TSV gzip) dans une base SQLite locale."
+    )
+    parser.add_argument("--ratings", required=True, help="Chemin vers title.ratings.tsv.gz")
+    parser.add_argument("--basics", help="Chemin vers title.basics.tsv.gz (optionnel)")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Base SQLite de sortie")
+    args = parser.parse_args(argv)
+
+    counts = ingest_imdb_datasets(args.ratings, args.basics, args.db)
+    for name, n in counts.items():
+        print(f"✅ {name} : {n:,} lignes ingérées")
+    print(f"📦 Base locale : {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# latency.py
+"""
+Maîtrise de la latence des appels HTTP :
+
+- LatencyTracker : fenêtre glissante des latences observées (p95, ...)
+- hedged_call    : si une requête dépasse le p95 observé, on envoie un doublon
+                   et on garde la première réponse arrivée
+- LatencyBudget  : budget de temps d'une page ; une fois écoulé, les appels
+                   restants échouent avec BudgetExceeded et la page s'affiche
+                   avec les résultats partiels
+"""
+
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    Future,
+    wait,
+    FIRST_COMPLETED,
+)
+from typing import Callable, Optional, TypeVar, Any
+
+T = TypeVar("T")
+
+# Délai de hedging tant qu'on n'a pas assez de mesures pour un p95 fiable
+DEFAULT_HEDGE_DELAY_S = 1.0
+MIN_HEDGE_DELAY_S = 0.2
+MIN_SAMPLES = 20
+
+# Pool dédié aux requêtes (et à leurs doublons)
+_REQUEST_POOL = ThreadPoolExecutor(max_workers=32, thread_name_prefix="http")
+
+
+class BudgetExceeded(TimeoutError):
+    """Le budget de latence de la page est épuisé."""
+
+
+class LatencyTracker:
+    def __init__(self, window: int = 200):
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        idx = min(len(samples) - 1, int(q * len(samples)))
+        return samples[idx]
+
+    def hedge_delay(self) -> float:
+        """Délai avant d'envoyer le doublon : p95 observé (borné en bas)."""
+        with self._lock:
+            enough = len(self._samples) >= MIN_SAMPLES
+        if not enough:
+            return DEFAULT_HEDGE_DELAY_S
+        return max(MIN_HEDGE_DELAY_S, self.quantile(0.95) or DEFAULT_HEDGE_DELAY_S)
+
+
+# ===================== Budget de latence par page =====================
+
+_current_budget: contextvars.ContextVar[Optional["LatencyBudget"]] = contextvars.ContextVar(
+    "latency_budget", default=None
+)
+
+
+class LatencyBudget:
+    """
+    Budget de temps d'un chargement de page.
+
+        with LatencyBudget(6.0) as budget:
+            fut = budget.submit(pool, client.get_movie_details, movie_id)
+            ...
+            wait(futures, timeout=budget.remaining())
+
+    Les appels TMDB faits sous ce budget (y compris dans les threads lancés
+    via budget.submit) voient la même échéance.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.deadline = time.monotonic() + seconds
+        self._token = None
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def submit(self, pool: ThreadPoolExecutor, fn: Callable[..., T], *args: Any) -> "Future[T]":
+        """Soumet fn au pool en propageant le budget courant au thread."""
+        ctx = contextvars.copy_context()
+        ctx.run(_current_budget.set, self)
+        return pool.submit(ctx.run, fn, *args)
+
+    def __enter__(self) -> "LatencyBudget":
+        self._token = _current_budget.set(self)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._token is not None:
+            _current_budget.reset(self._token)
+            self._token = None
+
+
+def current_budget() -> Optional[LatencyBudget]:
+    return _current_budget.get()
+
+
+def effective_timeout(default_timeout: float) -> float:
+    """
+    Timeout à appliquer à une requête : le plus petit entre le timeout par défaut
+    et le temps restant du budget courant. Lève BudgetExceeded si le budget est épuisé.
+    """
+    budget = current_budget()
+    if budget is None:
+        return default_timeout
+    remaining = budget.remaining()
+    if remaining <= 0.0:
+        raise BudgetExceeded("Budget de latence épuisé.")
+    return min(default_timeout, remaining)
+
+
+# ===================== Requêtes "hedgées" =====================
+
+def _timed(send: Callable[[float], T], timeout: float) -> "tuple[T, float]":
+    """(réponse, durée de cet envoi) : un doublon est mesuré depuis son propre départ."""
+    start = time.monotonic()
+    result = send(timeout)
+    return result, time.monotonic() - start
+
+
+def hedged_call(
+    send: Callable[[float], T],
+    tracker: LatencyTracker,
+    timeout: float,
+) -> T:
+    """
+    Exécute send(timeout). Si aucune réponse n'est arrivée après le p95 observé,
+    un doublon est envoyé ; la première réponse valide gagne.
+    Réservé aux requêtes idempotentes (GET).
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+
+    futures = [_REQUEST_POOL.submit(_timed, send, timeout)]
+    done, _ = wait(futures, timeout=min(tracker.hedge_delay(), timeout))
+    if not done:
+        remaining = deadline - time.monotonic()
+        if remaining > 0:
+            futures.append(_REQUEST_POOL.submit(_timed, send, remaining))
+
+    last_exc: Optional[BaseException] = None
+    while futures:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        done, _ = wait(futures, timeout=remaining, return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for fut in done:
+            futures.remove(fut)
+            exc = fut.exception()
+            if exc is None:
+                # Durée de l'envoi gagnant : le délai avant doublon ne gonfle pas le p95
+                result, elapsed = fut.result()
+                tracker.record(elapsed)
+                return result
+            last_exc = exc
+
+    if last_exc is not None and not futures:
+        raise last_exc
+    raise BudgetExceeded(f"Pas de réponse en {timeout:.1f}s.")
@@ -1,30 +1,89 @@
 import math
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Tuple
+import altair as alt
 import numpy as np
 import pandas as pd
 import streamlit as st
-import joblib
 
 from tmdb_client import TMDBClient
 from imdb_client import IMDbClient
+from scheduler import request_priority, submit_in_context, INTERACTIVE, PAGE_LOAD
+from search_service import get_search_service
+from feature_store import get_default_feature_store
+from oscar_analogs import AnalogIndex, build_analog_index
+from oscar_awards import get_default_awards_index
+from model_registry import DEFAULT_MAX_RESIDENT, FEATURES_VERSION, ModelRegistry
+from oscar_model import PIPELINE_FILENAME, TRAIN_COLS_FILENAME, FastOscarModel
+from oscar_race import DEFAULT_DRAWS, ceremony_feature_rows, ceremony_years, race_table
 
 
 # =========================================================
 # Chargement du modèle & des colonnes
 # =========================================================
+MODEL_DIR = "models"
+
+
 @st.cache_resource
-def load_model_and_columns():
+def load_model_and_columns(model_dir: str = MODEL_DIR):
     """
     Charge le pipeline entraîné + la liste des colonnes d'entraînement.
     On importe XGBClassifier ici pour que joblib puisse le "déserialiser".
     """
+    import joblib
     from xgboost import XGBClassifier  # noqa: F401
 
-    pipeline = joblib.load("models/oscar_pipeline.joblib")
-    train_cols: List[str] = joblib.load("models/oscar_train_cols.joblib")
+    pipeline = joblib.load(os.path.join(model_dir, PIPELINE_FILENAME))
+    train_cols: List[str] = joblib.load(os.path.join(model_dir, TRAIN_COLS_FILENAME))
     return pipeline, train_cols
 
 
+@st.cache_resource
+def get_model_registry() -> ModelRegistry:
+    """
+    Modèles de models/registry.json, chargés à la demande (LRU de
+    OSCAR_MAX_RESIDENT_MODELS modèles en mémoire). Le backend d'évaluation des
+    arbres se choisit via OSCAR_INFERENCE_BACKEND ("xgboost" ou "treelite").
+    """
+    return ModelRegistry(
+        MODEL_DIR,
+        max_resident=int(os.getenv("OSCAR_MAX_RESIDENT_MODELS", DEFAULT_MAX_RESIDENT)),
+        backend=os.getenv("OSCAR_INFERENCE_BACKEND", "xgboost"),
+    )
+
+
+def selected_model_name() -> str:
+    """Modèle choisi dans la session (modèle par défaut du registre sinon)."""
+    registry = get_model_registry()
+    name = st.session_state.get("ml_model")
+    return name if name in registry else registry.default
+
+
+def get_fast_model() -> FastOscarModel | None:
+    """
+    Chemin d'inférence NumPy + booster du modèle sélectionné (None -> on reste
+    sur pipeline.predict_proba). Le modèle natif exporté (python oscar_model.py
+    export) est préféré au pipeline joblib tant qu'il a été exporté depuis ce même pipeline.
+    """
+    return get_model_registry().get(selected_model_name())
+
+
+def get_model_hash() -> str | None:
+    """Version de l'artefact du modèle sélectionné (clé du cache de prédictions)."""
+    return get_model_registry().entry(selected_model_name()).artifact_hash
+
+
+@st.cache_resource(show_spinner=False)
+def get_analog_index() -> AnalogIndex | None:
+    """Index k-NN des films historiques, construit une fois par process."""
+    try:
+        return build_analog_index()
+    except Exception:
+        return None
+
+
 @st.cache_resource
 def get_tmdb_client() -> TMDBClient:
     return TMDBClient()
@@ -35,6 +94,16 @@ def get_imdb_client() -> IMDbClient:
     return IMDbClient()
 
 
+# Durée de vie de la liste des films à l'affiche (mode classement)
+NOW_PLAYING_TTL_S = 3600
+
+
+@st.cache_data(ttl=NOW_PLAYING_TTL_S, show_spinner=False)
+def get_now_playing_ids(nb_pages: int = 2) -> List[int]:
+    """Ids TMDB des films à l'affiche, partagés entre les reruns et les sessions."""
+    return [m["id"] for m in get_tmdb_client().get_now_playing_movies(nb_pages=nb_pages) if m.get("id")]
+
+
 # =========================================================
 # Helpers pour récupérer proprement IMDb
 # =========================================================
@@ -42,7 +111,8 @@ def safe_get_imdb_ratings(imdb_client: IMDbClient, imdb_id: str | None) -> Dict[
     if not imdb_id:
         return None
     try:
-        return imdb_client.get_ratings(imdb_id)
+        # Base IMDb locale en priorité, API en secours
+        return imdb_client.get_rating_summary(imdb_id)
     except Exception:
         return None
 
@@ -76,23 +146,58 @@ def extract_lifetime_gross_usd(business_json: Dict[str, Any] | None) -> float |
 # =========================================================
 # Construction des features pour un film TMDB
 # =========================================================
-def build_features_for_movie(
+GENRE_COLS = [
+    "Action", "Adventure", "Animation", "Comedy", "Crime",
+    "Documentary", "Drama", "Family", "Fantasy", "History",
+    "Horror", "Music", "Mystery", "Romance", "Science Fiction",
+    "Thriller", "War", "Western",
+]
+
+
+def fetch_movie_inputs(
     tmdb_client: TMDBClient,
     imdb_client: IMDbClient,
-    tmdb_movie: Dict[str, Any],
-    train_cols: List[str],
-) -> pd.DataFrame:
+    movie_id: int,
+) -> Tuple[Dict[str, Any], Dict[str, Any] | None]:
     """
-    Construit UNE ligne de features dans le même format que X dans Data_Final.csv.
+    Détails TMDB + notes IMDb d'un film (en parallèle si l'id IMDb est déjà connu).
+    Pas d'appel IMDb pour un film du dataset historique : ses notes sont connues.
     """
+    awards = get_default_awards_index()
+    known_imdb_id = tmdb_client.get_known_imdb_id(movie_id)
+    if known_imdb_id and awards is not None and known_imdb_id in awards:
+        return tmdb_client.get_movie_details(movie_id), None
+    if known_imdb_id:
+        # Film déjà vu : l'appel IMDb part en même temps que les détails TMDB
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            imdb_future = submit_in_context(pool, safe_get_imdb_ratings, imdb_client, known_imdb_id)
+            details = tmdb_client.get_movie_details(movie_id)
+            imdb_ratings = imdb_future.result()
+    else:
+        details = tmdb_client.get_movie_details(movie_id)
+        imdb_id = details.get("imdb_id")
+        if awards is not None and imdb_id in awards:
+            return details, None
+        imdb_ratings = safe_get_imdb_ratings(imdb_client, imdb_id)
+    return details, imdb_ratings
 
-    movie_id = tmdb_movie["id"]
-    details = tmdb_client.get_movie_details(movie_id)
 
-    # --------- Récup données TMDB / IMDb ---------
+def imdb_settled(details: Dict[str, Any], imdb_ratings: Dict[str, Any] | None) -> bool:
+    """
+    Notes IMDb définitives pour ce film : obtenues, ou volontairement absentes
+    (pas de tconst, film du dataset historique). Faux seulement si IMDb a échoué.
+    """
+    if imdb_ratings is not None:
+        return True
     imdb_id = details.get("imdb_id")
-    imdb_ratings = safe_get_imdb_ratings(imdb_client, imdb_id)
+    awards = get_default_awards_index()
+    return not imdb_id or (awards is not None and imdb_id in awards)
+
 
+def build_feature_row(details: Dict[str, Any], imdb_ratings: Dict[str, Any] | None) -> Dict[str, Any]:
+    """
+    Une ligne de features (dict) dans le même format que X dans Data_Final.csv.
+    """
     notes_tmdb = details.get("vote_average")
     runtime = details.get("runtime")
     notes_imdb = imdb_ratings.get("rating") if imdb_ratings else np.nan
@@ -108,21 +213,9 @@ def build_features_for_movie(
     nomination_count = 0
 
     # Genres TMDB -> dummies
-    all_genres_cols = [
-        "Action", "Adventure", "Animation", "Comedy", "Crime",
-        "Documentary", "Drama", "Family", "Fantasy", "History",
-        "Horror", "Music", "Mystery", "Romance", "Science Fiction",
-        "Thriller", "War", "Western",
-    ]
-
-    genre_flags = {g: 0 for g in all_genres_cols}
-
     tmdb_genres = details.get("genres") or []
     genre_names = {g.get("name") for g in tmdb_genres if g.get("name")}
-
-    for g in all_genres_cols:
-        if g in genre_names:
-            genre_flags[g] = 1
+    genre_flags = {g: int(g in genre_names) for g in GENRE_COLS}
 
     unnamed_0_2 = 0
 
@@ -143,20 +236,295 @@ def build_features_for_movie(
 
     base_row.update(genre_flags)
 
-    df = pd.DataFrame([base_row])
+    # Film du dataset historique : prix, nominations et notes connus
+    awards = get_default_awards_index()
+    if awards is not None:
+        awards.apply(base_row, details.get("imdb_id"))
+    return base_row
+
+
+def movie_meta(details: Dict[str, Any]) -> Dict[str, Any]:
+    """Infos d'affichage conservées avec les features (classement)."""
+    meta = {k: details.get(k) for k in ("title", "original_title", "release_date")}
+    meta["features_version"] = FEATURES_VERSION
+    return meta
+
+
+def get_feature_rows(
+    tmdb_client: TMDBClient,
+    imdb_client: IMDbClient,
+    movie_ids: List[int],
+    max_workers: int = 8,
+) -> Tuple[Dict[int, Tuple[Dict[str, Any], Dict[str, Any]]], Dict[int, Exception]]:
+    """
+    Features (ligne, méta) de chaque film : feature store d'abord, puis
+    récupération TMDB / IMDb en parallèle pour les films absents ou périmés.
+
+    Renvoie ({movie_id: (ligne, méta)}, {movie_id: erreur}).
+    """
+    store = get_default_feature_store()
+    rows: Dict[int, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+    errors: Dict[int, Exception] = {}
+
+    if store is not None:
+        try:
+            for mid, cached in store.get_features_many(movie_ids).items():
+                if cached["meta"].get("features_version") == FEATURES_VERSION:
+                    rows[mid] = (cached["features"], cached["meta"])
+        except Exception:
+            pass
+
+    missing = [mid for mid in movie_ids if mid not in rows]
+    if not missing:
+        return rows, errors
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(missing)))) as pool:
+        futures = {
+            mid: submit_in_context(pool, fetch_movie_inputs, tmdb_client, imdb_client, mid)
+            for mid in missing
+        }
+        for mid, fut in futures.items():
+            try:
+                details, imdb_ratings = fut.result()
+            except Exception as e:
+                errors[mid] = e
+                continue
+            row, meta = build_feature_row(details, imdb_ratings), movie_meta(details)
+            rows[mid] = (row, meta)
+            if store is not None:
+                try:
+                    store.put_features(mid, row, meta, imdb_fetched=imdb_settled(details, imdb_ratings))
+                except Exception:
+                    pass
+
+    return rows, errors
+
+
+def align_features(rows: List[Dict[str, Any]], train_cols: List[str]) -> pd.DataFrame:
+    """
+    Aligne des lignes de features sur les colonnes d'entraînement
+    (colonnes manquantes à 0, colonnes en trop ignorées, ordre respecté).
+    """
+    return pd.DataFrame(rows).reindex(columns=train_cols, fill_value=0)
+
+
+def build_features_for_movie(
+    tmdb_client: TMDBClient,
+    imdb_client: IMDbClient,
+    tmdb_movie: Dict[str, Any],
+    train_cols: List[str],
+) -> pd.DataFrame:
+    """
+    Construit UNE ligne de features dans le même format que X dans Data_Final.csv.
+    """
+    movie_id = int(tmdb_movie["id"])
+    rows, errors = get_feature_rows(tmdb_client, imdb_client, [movie_id])
+    if movie_id in errors:
+        raise errors[movie_id]
+    return align_features([rows[movie_id][0]], train_cols)
+
+
+# =========================================================
+# Scoring en lot (classement)
+# =========================================================
+MAX_BATCH_SIZE = 200
+BATCH_FETCH_WORKERS = 8
+
+
+def positive_class_index(pipeline, n_classes: int) -> int:
+    classes = list(getattr(pipeline, "classes_", []))
+    if classes and 1 in classes:
+        return classes.index(1)
+    return n_classes - 1
+
+
+def predict_oscar_proba(pipeline, features_df: pd.DataFrame) -> np.ndarray:
+    """Probabilités d'Oscar de toutes les lignes, en un seul appel au modèle."""
+    proba = pipeline.predict_proba(features_df)
+    return proba[:, positive_class_index(pipeline, proba.shape[1])]
+
+
+def predict_rows(
+    pipeline,
+    train_cols: List[str],
+    rows: List[Dict[str, Any]],
+    fast_model: FastOscarModel | None = None,
+) -> np.ndarray:
+    """Un seul appel au modèle pour tout un lot de lignes de features."""
+    if fast_model is not None:
+        return fast_model.predict_proba_rows(rows)
+    return predict_oscar_proba(pipeline, align_features(rows, train_cols))
+
+
+def predict_cached(
+    pipeline,
+    train_cols: List[str],
+    rows: Dict[int, Dict[str, Any]],
+    model_hash: str | None,
+    fast_model: FastOscarModel | None = None,
+) -> Dict[int, float]:
+    """
+    Probabilités d'Oscar {movie_id: proba} : cache de prédictions (film, version
+    du modèle) d'abord, un seul appel au modèle pour les films restants
+    (chemin NumPy si disponible, sinon predict_proba sur DataFrame).
+    """
+    store = get_default_feature_store() if model_hash else None
+    probas: Dict[int, float] = {}
+    if store is not None:
+        try:
+            probas = store.get_predictions(model_hash, rows)
+        except Exception:
+            probas = {}
+
+    todo = [mid for mid in rows if mid not in probas]
+    if todo:
+        computed = predict_rows(pipeline, train_cols, [rows[mid] for mid in todo], fast_model)
+        fresh = {mid: float(p) for mid, p in zip(todo, computed)}
+        probas.update(fresh)
+        if store is not None:
+            try:
+                store.put_predictions(model_hash, fresh)
+            except Exception:
+                pass
+    return probas
+
+
+def explain_cached(
+    fast_model: FastOscarModel | None,
+    rows: Dict[int, Dict[str, Any]],
+    model_hash: str | None,
+) -> Dict[int, np.ndarray]:
+    """
+    Contributions TreeSHAP {movie_id: (n_features + 1,)} : cache d'abord, puis un
+    seul appel pred_contribs du booster pour les films restants. Vide sans booster.
+    """
+    if fast_model is None or not rows:
+        return {}
+
+    store = get_default_feature_store() if model_hash else None
+    contribs: Dict[int, np.ndarray] = {}
+    if store is not None:
+        try:
+            cached = store.get_explanations(model_hash, rows)
+            contribs = {
+                mid: np.asarray(c) for mid, c in cached.items() if len(c) == fast_model.n_features + 1
+            }
+        except Exception:
+            contribs = {}
+
+    todo = [mid for mid in rows if mid not in contribs]
+    if todo:
+        computed = fast_model.contributions_rows([rows[mid] for mid in todo])
+        fresh = dict(zip(todo, computed))
+        contribs.update(fresh)
+        if store is not None:
+            try:
+                store.put_explanations(model_hash, {mid: c.tolist() for mid, c in fresh.items()})
+            except Exception:
+                pass
+    return contribs
+
+
+# Libellés lisibles des features dans les explications
+FEATURE_LABELS = {
+    "Unnamed: 0.2": "Index de ligne (artefact d'entraînement)",
+    "GG": "Golden Globes",
+    "NotesTMDb": "Note TMDB",
+    "NotesIMDb": "Note IMDb",
+    "NotesRottenTomatoes": "Rotten Tomatoes",
+    "NotesMetacritic": "Metacritic",
+    "nomination_count": "Nominations",
+    "Runtime": "Durée",
+}
+
+
+def feature_label(col: str) -> str:
+    return FEATURE_LABELS.get(col, col)
+
+
+def top_drivers(contribs: np.ndarray, train_cols: List[str], k: int = 3) -> str:
+    """Les k features qui pèsent le plus sur le score : "▲ BAFTA, ▼ NotesIMDb..."."""
+    values = np.asarray(contribs)[:len(train_cols)]
+    order = np.argsort(-np.abs(values))[:k]
+    return ", ".join(
+        f"{'▲' if values[i] > 0 else '▼'} {feature_label(train_cols[i])}" for i in order if values[i] != 0
+    )
+
+
+def predict_movie(
+    tmdb_client: TMDBClient,
+    imdb_client: IMDbClient,
+    pipeline,
+    train_cols: List[str],
+    movie_id: int,
+    model_hash: str | None = None,
+    fast_model: FastOscarModel | None = None,
+) -> Tuple[float, Dict[str, Any]]:
+    """
+    Probabilité d'Oscar d'un film (instantanée si déjà prédite pour ce modèle)
+    et la ligne de features utilisée.
+    """
+    movie_id = int(movie_id)
+    rows, errors = get_feature_rows(tmdb_client, imdb_client, [movie_id])
+    if movie_id in errors:
+        raise errors[movie_id]
+    row = rows[movie_id][0]
+    proba = predict_cached(pipeline, train_cols, {movie_id: row}, model_hash, fast_model)[movie_id]
+    return proba, row
 
-    # --------- Alignement sur les colonnes d'entraînement ---------
-    for col in train_cols:
-        if col not in df.columns:
-            df[col] = 0
 
-    extra_cols = [c for c in df.columns if c not in train_cols]
-    if extra_cols:
-        df = df.drop(columns=extra_cols)
+def score_movies(
+    tmdb_client: TMDBClient,
+    imdb_client: IMDbClient,
+    pipeline,
+    train_cols: List[str],
+    movie_ids: List[int],
+    max_workers: int = BATCH_FETCH_WORKERS,
+    model_hash: str | None = None,
+    fast_model: FastOscarModel | None = None,
+    explain: bool = False,
+) -> Tuple[pd.DataFrame, List[int]]:
+    """
+    Score une liste de films TMDB :
+      - features lues dans le feature store, sinon récupérées en parallèle (TMDB + IMDb)
+      - un seul predict_proba vectorisé pour les films sans prédiction en cache
+      - explain : principaux facteurs de chaque score (colonne "facteurs", TreeSHAP en lot)
+
+    Renvoie (classement trié par probabilité décroissante, ids en échec).
+    """
+    movie_ids = list(dict.fromkeys(int(m) for m in movie_ids))[:MAX_BATCH_SIZE]
+    if not movie_ids:
+        return pd.DataFrame(), []
 
-    df = df[train_cols]
+    rows, errors = get_feature_rows(tmdb_client, imdb_client, movie_ids, max_workers=max_workers)
+    failed = [mid for mid in movie_ids if mid in errors]
+    ids = [mid for mid in movie_ids if mid in rows]
+    if not ids:
+        return pd.DataFrame(), failed
 
-    return df
+    feature_rows = {mid: rows[mid][0] for mid in ids}
+    probas = predict_cached(pipeline, train_cols, feature_rows, model_hash, fast_model)
+
+    metas = [rows[mid][1] for mid in ids]
+    leaderboard = pd.DataFrame({
+        "id": ids,
+        "title": [m.get("title") or m.get("original_title") for m in metas],
+        "year": [(m.get("release_date") or "")[:4] or None for m in metas],
+        "NotesTMDb": [rows[mid][0].get("NotesTMDb", np.nan) for mid in ids],
+        "NotesIMDb": [rows[mid][0].get("NotesIMDb", np.nan) for mid in ids],
+        "proba_oscar": [probas[mid] for mid in ids],
+    })
+    if explain and fast_model is not None:
+        contribs = explain_cached(fast_model, feature_rows, model_hash)
+        leaderboard["facteurs"] = [top_drivers(contribs[mid], fast_model.train_cols) for mid in ids]
+    leaderboard = leaderboard.sort_values("proba_oscar", ascending=False).reset_index(drop=True)
+    leaderboard.insert(0, "rang", np.arange(1, len(leaderboard) + 1))
+    return leaderboard, failed
+
+
+def parse_tmdb_ids(text: str) -> List[int]:
+    """Ids TMDB d'un texte libre (un par ligne, virgules, CSV...)."""
+    return [int(tok) for tok in re.findall(r"\d+", text or "")]
 
 
 # =========================================================
@@ -222,6 +590,304 @@ def render_prediction_result(proba_oscar: float, selected_movie: Dict[str, Any])
         """)
 
 
+def render_leaderboard_mode(
+    tmdb_client: TMDBClient,
+    imdb_client: IMDbClient,
+    pipeline,
+    train_cols: List[str],
+    fast_model: FastOscarModel | None = None,
+):
+    """Score tout un lot de films et affiche le classement."""
+    st.markdown("### 📋 Classement de films")
+
+    source = st.radio(
+        "Films à classer",
+        ["Films à l'affiche", "Résultats d'une recherche", "Liste d'ids TMDB"],
+        horizontal=True,
+    )
+
+    # Un classement affiché ne vaut que pour sa source et la version du modèle
+    leaderboard_key = (source, get_model_hash())
+    stored = st.session_state.get("ml_leaderboard")
+    if stored and stored["key"] != leaderboard_key:
+        del st.session_state["ml_leaderboard"]
+
+    movie_ids: List[int] = []
+    try:
+        if source == "Films à l'affiche":
+            movie_ids = get_now_playing_ids(nb_pages=2)
+        elif source == "Résultats d'une recherche":
+            query = st.text_input(
+                "Titre à rechercher",
+                placeholder="Ex : Dune, Batman...",
+                key="ml_batch_query",
+            )
+            if query:
+                with request_priority(INTERACTIVE):
+                    movie_ids = [m["id"] for m in get_search_service().search(query) if m.get("id")]
+        else:
+            ids_text = st.text_area(
+                "Ids TMDB (un par ligne ou séparés par des virgules)",
+                placeholder="872585\n693134\n496243",
+            )
+            uploaded = st.file_uploader("...ou un fichier texte / CSV d'ids", type=["txt", "csv"])
+            if uploaded is not None:
+                ids_text = f"{ids_text}\n{uploaded.getvalue().decode('utf-8', errors='ignore')}"
+            movie_ids = parse_tmdb_ids(ids_text)
+    except Exception as e:
+        st.error("❌ Impossible de récupérer la liste de films sur TMDB.")
+        st.exception(e)
+        return
+
+    movie_ids = list(dict.fromkeys(movie_ids))
+    if not movie_ids:
+        st.info("💡 Choisis une source de films pour construire le classement")
+        return
+    if len(movie_ids) > MAX_BATCH_SIZE:
+        st.caption(f"Seuls les {MAX_BATCH_SIZE} premiers films seront classés.")
+        movie_ids = movie_ids[:MAX_BATCH_SIZE]
+
+    if st.button(
+        f"🏆 Classer {len(movie_ids)} films",
+        use_container_width=True,
+        type="primary",
+    ):
+        with st.spinner("⏳ Récupération des features et scoring du lot..."):
+            try:
+                # Lot lancé par l'utilisateur, mais passe après les recherches interactives
+                with request_priority(PAGE_LOAD):
+                    leaderboard, failed = score_movies(
+                        tmdb_client, imdb_client, pipeline, train_cols, movie_ids,
+                        model_hash=get_model_hash(),
+                        fast_model=fast_model,
+                        explain=True,
+                    )
+            except Exception as e:
+                st.error("❌ Erreur lors du scoring du lot.")
+                st.exception(e)
+                return
+        st.session_state.ml_leaderboard = {"key": leaderboard_key, "data": (leaderboard, failed)}
+
+    stored = st.session_state.get("ml_leaderboard")
+    if not stored:
+        return
+    leaderboard, failed = stored["data"]
+
+    if leaderboard.empty:
+        st.warning("😕 Aucun film n'a pu être scoré.")
+        return
+
+    st.dataframe(
+        leaderboard.drop(columns=["id"]),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "rang": st.column_config.NumberColumn("#", width="small"),
+            "title": "Film",
+            "year": "Année",
+            "NotesTMDb": st.column_config.NumberColumn("Note TMDB", format="%.1f"),
+            "NotesIMDb": st.column_config.NumberColumn("Note IMDb", format="%.1f"),
+            "proba_oscar": st.column_config.ProgressColumn(
+                "Probabilité d'Oscar", min_value=0.0, max_value=1.0, format="percent"
+            ),
+            "facteurs": st.column_config.TextColumn(
+                "Principaux facteurs", help="▲ tire le score vers le haut, ▼ vers le bas"
+            ),
+        },
+    )
+    if failed:
+        st.caption(f"⚠️ {len(failed)} film(s) ignoré(s) faute de données TMDB : {', '.join(map(str, failed))}")
+
+
+def render_race_mode(
+    tmdb_client: TMDBClient,
+    imdb_client: IMDbClient,
+    pipeline,
+    train_cols: List[str],
+    fast_model: FastOscarModel | None = None,
+):
+    """Course à l'Oscar : un seul gagnant parmi les films d'une cérémonie ou d'une shortlist."""
+    st.markdown("### 🏁 Course à l'Oscar")
+    st.caption(
+        "Les probabilités des films sont normalisées entre eux, puis une simulation "
+        "de Monte Carlo donne la part de victoires de chacun et une fourchette (5 % – 95 %)."
+    )
+
+    source = st.radio(
+        "Concurrents",
+        ["Cérémonie du dataset", "Shortlist d'ids TMDB"],
+        horizontal=True,
+    )
+    n_draws = st.select_slider(
+        "Nombre de tirages",
+        options=[DEFAULT_DRAWS, 2 * DEFAULT_DRAWS, 5 * DEFAULT_DRAWS],
+        value=DEFAULT_DRAWS,
+        format_func=lambda n: f"{n:,}".replace(",", " "),
+    )
+
+    titles: List[str] = []
+    actual: List[bool] | None = None
+    probas = np.empty(0)
+    try:
+        if source == "Cérémonie du dataset":
+            year = st.selectbox("Cérémonie", ceremony_years())
+            titles, rows, actual = ceremony_feature_rows(year)
+            st.caption("⚠️ Films du dataset d'entraînement : le modèle a déjà vu leur résultat.")
+            if not st.button(f"🏁 Simuler la cérémonie {year}", use_container_width=True, type="primary"):
+                return
+            probas = predict_rows(pipeline, train_cols, rows, fast_model)
+        else:
+            ids_text = st.text_area(
+                "Ids TMDB des nommés (un par ligne ou séparés par des virgules)",
+                placeholder="872585\n693134\n792307",
+                key="ml_race_ids",
+            )
+            movie_ids = list(dict.fromkeys(parse_tmdb_ids(ids_text)))[:MAX_BATCH_SIZE]
+            if len(movie_ids) < 2:
+                st.info("💡 Indique au moins deux films pour lancer la course")
+                return
+            if not st.button(f"🏁 Simuler la course ({len(movie_ids)} films)", use_container_width=True, type="primary"):
+                return
+            with st.spinner("⏳ Récupération des features et scoring des nommés..."):
+                with request_priority(PAGE_LOAD):
+                    leaderboard, failed = score_movies(
+                        tmdb_client, imdb_client, pipeline, train_cols, movie_ids,
+                        model_hash=get_model_hash(),
+                        fast_model=fast_model,
+                    )
+            if failed:
+                st.caption(f"⚠️ {len(failed)} film(s) ignoré(s) faute de données TMDB : {', '.join(map(str, failed))}")
+            if leaderboard.empty:
+                st.warning("😕 Aucun film n'a pu être scoré.")
+                return
+            titles = leaderboard["title"].astype(str).tolist()
+            probas = leaderboard["proba_oscar"].to_numpy()
+    except Exception as e:
+        st.error("❌ Erreur lors du scoring des concurrents.")
+        st.exception(e)
+        return
+
+    table = race_table(titles, probas, n_draws=n_draws, actual_winners=actual)
+    if actual is not None:
+        table["gagnant_reel"] = table["gagnant_reel"].map({True: "🏆 Oscar", False: ""})
+
+    st.dataframe(
+        table,
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "proba_modele": st.column_config.NumberColumn("Proba. seule", format="percent"),
+            "part_normalisee": st.column_config.NumberColumn("Part normalisée", format="percent"),
+            "victoires_mc": st.column_config.ProgressColumn("Victoires simulées", min_value=0.0, max_value=1.0, format="percent"),
+            "ic_bas": st.column_config.NumberColumn("IC bas", format="percent"),
+            "ic_haut": st.column_config.NumberColumn("IC haut", format="percent"),
+            "gagnant_reel": st.column_config.TextColumn("Résultat", width="small"),
+        },
+    )
+
+
+def render_feature_contributions(
+    fast_model: FastOscarModel | None,
+    feature_row: Dict[str, Any],
+    movie_id: int,
+    k: int = 8,
+):
+    """Pourquoi ce score : contributions TreeSHAP des features qui pèsent le plus."""
+    try:
+        contribs = explain_cached(fast_model, {int(movie_id): feature_row}, get_model_hash()).get(int(movie_id))
+    except Exception:
+        contribs = None
+    if contribs is None:
+        return
+
+    cols = fast_model.train_cols
+    values = contribs[:len(cols)]
+    order = [i for i in np.argsort(-np.abs(values))[:k] if values[i] != 0]
+    if not order:
+        return
+
+    df = pd.DataFrame({
+        "feature": [feature_label(cols[i]) for i in order],
+        "valeur": [feature_row.get(cols[i]) for i in order],
+        "contribution": [float(values[i]) for i in order],
+    })
+    df["valeur"] = df["valeur"].map(lambda v: "—" if v is None or (isinstance(v, float) and math.isnan(v)) else str(v))
+    df["sens"] = np.where(df["contribution"] > 0, "Favorable", "Défavorable")
+
+    st.markdown("#### 🔎 Pourquoi ce score ?")
+    st.caption("Contribution de chaque feature au score du modèle (log-odds, TreeSHAP)")
+    chart = (
+        alt.Chart(df)
+        .mark_bar()
+        .encode(
+            x=alt.X("contribution:Q", title="Contribution (log-odds)"),
+            y=alt.Y("feature:N", sort=None, title=None),
+            color=alt.Color(
+                "sens:N",
+                scale=alt.Scale(domain=["Favorable", "Défavorable"], range=["#2ca02c", "#ed2b12"]),
+                legend=None,
+            ),
+            tooltip=[
+                alt.Tooltip("feature:N", title="Feature"),
+                alt.Tooltip("valeur:N", title="Valeur"),
+                alt.Tooltip("contribution:Q", title="Contribution", format="+.3f"),
+            ],
+        )
+    )
+    st.altair_chart(chart, use_container_width=True)
+
+
+def render_historical_analogs(feature_row: Dict[str, Any], imdb_id: str | None, k: int = 5):
+    """
+    Films historiques les plus proches du film évalué, avec leur résultat aux
+    Oscars (le film lui-même, s'il est dans le dataset, est écarté par imdb_id).
+    """
+    index = get_analog_index()
+    if index is None:
+        return
+
+    analogs = index.query(feature_row, k=k, exclude_imdb_id=imdb_id)
+    if not analogs:
+        return
+
+    st.markdown("#### 🎞️ Précédents historiques")
+    st.caption("Les nominés passés les plus proches (notes, durée, genres) et leur résultat")
+    st.dataframe(
+        pd.DataFrame({
+            "Film": [a["titre"] for a in analogs],
+            "Cérémonie": [a["year"] for a in analogs],
+            "Résultat": ["🏆 Oscar" if a["Oscar"] else "Nommé" for a in analogs],
+            "Similarité": [1.0 / (1.0 + a["distance"]) for a in analogs],
+        }),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "Similarité": st.column_config.ProgressColumn(
+                "Similarité", min_value=0.0, max_value=1.0, format="%.2f"
+            ),
+        },
+    )
+
+
+def render_model_selector():
+    """Choix du modèle quand le registre en compte plusieurs (catégories, versions)."""
+    registry = get_model_registry()
+    names = [
+        name for name in registry.names()
+        if registry.entry(name).features_version == FEATURES_VERSION
+    ]
+    if len(names) < 2:
+        return
+    st.selectbox(
+        "Modèle",
+        names,
+        index=names.index(registry.default) if registry.default in names else 0,
+        format_func=lambda name: f"{registry.entry(name).display_name()} · {registry.entry(name).category}",
+        key="ml_model",
+        help="Les modèles déjà utilisés restent en mémoire : changer de modèle ne les recharge pas.",
+    )
+
+
 # =========================================================
 # UI principale de la page ML
 # =========================================================
@@ -253,8 +919,15 @@ def render_ml_page():
     tmdb_client = get_tmdb_client()
     imdb_client = get_imdb_client()
 
+    render_model_selector()
+
     try:
-        pipeline, train_cols = load_model_and_columns()
+        # Le pipeline joblib n'est chargé que si le chemin rapide est indisponible
+        fast_model = get_fast_model()
+        if fast_model is not None:
+            pipeline, train_cols = None, fast_model.train_cols
+        else:
+            pipeline, train_cols = load_model_and_columns(get_model_registry().artifact_dir(selected_model_name()))
     except Exception as e:
         st.error(
             "❌ Impossible de charger le modèle (`oscar_pipeline.joblib`) ou les colonnes "
@@ -263,6 +936,22 @@ def render_ml_page():
         st.exception(e)
         return
 
+    # Index des précédents historiques construit dès l'ouverture de la page
+    get_analog_index()
+
+    mode = st.radio(
+        "Mode",
+        ["🎯 Un film", "📋 Classement de films", "🏁 Course à l'Oscar"],
+        horizontal=True,
+        label_visibility="collapsed",
+    )
+    if mode == "📋 Classement de films":
+        render_leaderboard_mode(tmdb_client, imdb_client, pipeline, train_cols, fast_model)
+        return
+    if mode == "🏁 Course à l'Oscar":
+        render_race_mode(tmdb_client, imdb_client, pipeline, train_cols, fast_model)
+        return
+
     # --------- Section de recherche ---------
     st.markdown("### 🔍 Recherche du film")
     
@@ -299,7 +988,9 @@ def render_ml_page():
     # Recherche TMDB
     with st.spinner("🔄 Recherche de films sur TMDB..."):
         try:
-            search_results = tmdb_client.search_movies(query=query, year=year_param)
+            with request_priority(INTERACTIVE):
+                # Cache de recherche partagé avec la page Comparaison
+                search_results = get_search_service().search(query, year=year_param)
         except Exception as e:
             st.error("❌ Erreur lors de l'appel à l'API TMDB.")
             st.exception(e)
@@ -371,23 +1062,17 @@ def render_ml_page():
     if predict_button:
         with st.spinner("⏳ Construction des features et prédiction en cours..."):
             try:
-                features_df = build_features_for_movie(
-                    tmdb_client=tmdb_client,
-                    imdb_client=imdb_client,
-                    tmdb_movie=selected_movie,
-                    train_cols=train_cols,
-                )
-                
-                # Prédiction
-                proba_all = pipeline.predict_proba(features_df)[0]
-
-                classes = list(getattr(pipeline, "classes_", []))
-                if classes and 1 in classes:
-                    pos_idx = classes.index(1)
-                else:
-                    pos_idx = len(proba_all) - 1
-
-                proba_oscar = float(proba_all[pos_idx])
+                # Features et prédiction servies par le feature store quand le film est déjà connu
+                with request_priority(INTERACTIVE):
+                    proba_oscar, feature_row = predict_movie(
+                        tmdb_client=tmdb_client,
+                        imdb_client=imdb_client,
+                        pipeline=pipeline,
+                        train_cols=train_cols,
+                        movie_id=selected_movie["id"],
+                        model_hash=get_model_hash(),
+                        fast_model=fast_model,
+                    )
 
             except Exception as e:
                 st.error(
@@ -398,4 +1083,11 @@ def render_ml_page():
                 return
 
         # Affichage du résultat
-        render_prediction_result(proba_oscar, selected_movie)
\ No newline at end of file
+        render_prediction_result(proba_oscar, selected_movie)
+        render_feature_contributions(fast_model, feature_row, selected_movie["id"])
+        try:
+            # tconst noté lors de la récupération des features (table de correspondance)
+            imdb_id = tmdb_client.resolve_imdb_ids([selected_movie["id"]]).get(selected_movie["id"])
+        except Exception:
+            imdb_id = None
+        render_historical_analogs(feature_row, imdb_id)
\ No newline at end of file
@@ -0,0 +1,325 @@
+# model_registry.py
+"""
+Registre des modèles servis par la page ML (catégories ou versions côte à côte).
+
+Le manifeste models/registry.json décrit chaque modèle :
+  - name / label / category / version
+  - path : dossier des artefacts, relatif à models/ ("." pour le modèle historique,
+    "versions/<version>" pour une version produite par train_model.py)
+  - artifact_hash : hash de l'artefact (clé du cache de prédictions)
+  - features : spec des features attendues (features_version + colonnes, dans l'ordre)
+
+    python model_registry.py list
+    python model_registry.py register best_picture_v2 versions/20250101-120000-abcd1234 --label "Meilleur film (v2)"
+
+Les modèles ne sont chargés qu'à la première demande et gardés dans un LRU borné :
+un modèle jamais demandé (ou évincé) n'occupe pas de mémoire, et revenir sur un
+modèle encore en mémoire ne le recharge pas. Le manifeste est relu dès que sa date
+de modification change (register / promotion pendant que l'appli tourne).
+"""
+
+import argparse
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from oscar_model import (
+    DEFAULT_BACKEND,
+    DEFAULT_MODEL_DIR,
+    TRAIN_COLS_FILENAME,
+    FastOscarModel,
+    load_serving_model,
+    model_version,
+    read_native_spec,
+)
+
+MANIFEST_FILENAME = "registry.json"
+MANIFEST_VERSION = 1
+DEFAULT_MODEL_NAME = "best_picture"
+DEFAULT_MAX_RESIDENT = 2
+
+# Version du format des lignes de features (ml_page.build_feature_row).
+# À incrémenter quand build_feature_row change : les features stockées avant sont ignorées
+FEATURES_VERSION = 2
+
+
+class ModelEntry:
+    def __init__(
+        self,
+        name: str,
+        path: str,
+        artifact_hash: Optional[str],
+        train_cols: Optional[List[str]] = None,
+        features_version: int = FEATURES_VERSION,
+        label: Optional[str] = None,
+        category: str = "Best Picture",
+        version: Optional[str] = None,
+    ):
+        self.name = name
+        self.path = path
+        self.artifact_hash = artifact_hash
+        self.train_cols = list(train_cols) if train_cols is not None else None
+        self.features_version = features_version
+        self.label = label or name
+        self.category = category
+        self.version = version
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ModelEntry":
+        features = data.get("features") or {}
+        return cls(
+            name=data["name"],
+            path=data.get("path", "."),
+            artifact_hash=data.get("artifact_hash"),
+            train_cols=features.get("train_cols"),
+            features_version=features.get("features_version", FEATURES_VERSION),
+            label=data.get("label"),
+            category=data.get("category", "Best Picture"),
+            version=data.get("version"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "label": self.label,
+            "category": self.category,
+            "version": self.version,
+            "path": self.path,
+            "artifact_hash": self.artifact_hash,
+            "features": {"features_version": self.features_version, "train_cols": self.train_cols},
+        }
+
+    def display_name(self) -> str:
+        return f"{self.label} ({self.version})" if self.version else self.label
+
+
+# ===================== Manifeste =====================
+
+def manifest_path(models_dir: str = DEFAULT_MODEL_DIR) -> str:
+    return os.path.join(models_dir, MANIFEST_FILENAME)
+
+
+def manifest_mtime(models_dir: str = DEFAULT_MODEL_DIR) -> Optional[int]:
+    """Date de modification du manifeste (ns), None s'il n'existe pas."""
+    try:
+        return os.stat(manifest_path(models_dir)).st_mtime_ns
+    except OSError:
+        return None
+
+
+def read_manifest(models_dir: str = DEFAULT_MODEL_DIR) -> Tuple[Dict[str, ModelEntry], Optional[str]]:
+    """
+    ({name: entrée}, nom du modèle par défaut). Sans manifeste (ou manifeste
+    illisible), le modèle historique de models/ est le seul enregistré.
+    """
+    try:
+        with open(manifest_path(models_dir), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"Version de manifeste inconnue : {manifest.get('version')}")
+        entries = [ModelEntry.from_dict(m) for m in manifest.get("models", [])]
+    except (OSError, ValueError, KeyError):
+        entries = []
+
+    if not entries:
+        entries = [ModelEntry(DEFAULT_MODEL_NAME, ".", model_version(models_dir), label="Meilleur film")]
+        return {DEFAULT_MODEL_NAME: entries[0]}, DEFAULT_MODEL_NAME
+
+    by_name = {e.name: e for e in entries}
+    default = manifest.get("default")
+    return by_name, default if default in by_name else entries[0].name
+
+
+def write_manifest(models_dir: str, entries: Dict[str, ModelEntry], default: Optional[str]) -> str:
+    path = manifest_path(models_dir)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "default": default,
+        "models": [e.to_dict() for e in entries.values()],
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _artifact_train_cols(artifact_dir: str) -> List[str]:
+    spec = read_native_spec(artifact_dir)
+    if spec is not None:
+        return list(spec["train_cols"])
+    import joblib
+
+    return list(joblib.load(os.path.join(artifact_dir, TRAIN_COLS_FILENAME)))
+
+
+def register(
+    name: str,
+    path: str,
+    models_dir: str = DEFAULT_MODEL_DIR,
+    label: Optional[str] = None,
+    category: Optional[str] = None,
+    version: Optional[str] = None,
+    make_default: bool = False,
+) -> ModelEntry:
+    """Ajoute (ou met à jour) un modèle du registre à partir de ses artefacts."""
+    artifact_dir = os.path.join(models_dir, path)
+    artifact_hash = model_version(artifact_dir)
+    if artifact_hash is None:
+        raise FileNotFoundError(f"Aucun artefact modèle dans {artifact_dir}/.")
+
+    entries, default = read_manifest(models_dir)
+    previous = entries.get(name)
+    entries[name] = ModelEntry(
+        name=name,
+        path=path,
+        artifact_hash=artifact_hash,
+        train_cols=_artifact_train_cols(artifact_dir),
+        label=label or (previous.label if previous else None),
+        category=category or (previous.category if previous else "Best Picture"),
+        version=version or (previous.version if previous else os.path.basename(os.path.normpath(path))),
+    )
+    write_manifest(models_dir, entries, name if make_default or default is None else default)
+    return entries[name]
+
+
+def refresh_path(path: str, models_dir: str = DEFAULT_MODEL_DIR, version: Optional[str] = None) -> List[str]:
+    """Réenregistre les modèles servis depuis ce dossier (artefacts remplacés, ex. promotion)."""
+    entries, _ = read_manifest(models_dir)
+    names = [e.name for e in entries.values() if os.path.normpath(e.path) == os.path.normpath(path)]
+    for name in names:
+        register(name, path, models_dir, version=version)
+    return names
+
+
+# ===================== Chargement paresseux =====================
+
+class ModelRegistry:
+    """Modèles du manifeste, chargés à la demande dans un LRU borné (thread-safe)."""
+
+    def __init__(
+        self,
+        models_dir: str = DEFAULT_MODEL_DIR,
+        max_resident: int = DEFAULT_MAX_RESIDENT,
+        backend: str = DEFAULT_BACKEND,
+    ):
+        self.models_dir = models_dir
+        self.max_resident = max(1, max_resident)
+        self.backend = backend
+        self._manifest_mtime = manifest_mtime(models_dir)
+        self.entries, self.default = read_manifest(models_dir)
+        self._resident: "OrderedDict[str, Optional[FastOscarModel]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def refresh(self) -> bool:
+        """
+        Relit le manifeste s'il a changé depuis la dernière lecture. Les modèles en
+        mémoire dont l'entrée a disparu ou pointe vers d'autres artefacts sont évincés.
+        """
+        mtime = manifest_mtime(self.models_dir)
+        if mtime == self._manifest_mtime:
+            return False
+        with self._lock:
+            if mtime == self._manifest_mtime:
+                return False
+            entries, default = read_manifest(self.models_dir)
+            for name in list(self._resident):
+                old, new = self.entries.get(name), entries.get(name)
+                if new is None or old is None or new.to_dict() != old.to_dict():
+                    del self._resident[name]
+            self.entries, self.default = entries, default
+            self._manifest_mtime = mtime
+            return True
+
+    def __contains__(self, name: Optional[str]) -> bool:
+        self.refresh()
+        return name in self.entries
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self.entries)
+
+    def names(self) -> List[str]:
+        self.refresh()
+        return list(self.entries)
+
+    def entry(self, name: Optional[str] = None) -> ModelEntry:
+        """Entrée du registre (modèle par défaut si name est None). KeyError si inconnue."""
+        self.refresh()
+        return self.entries[name or self.default]
+
+    def artifact_dir(self, name: Optional[str] = None) -> str:
+        return os.path.join(self.models_dir, self.entry(name).path)
+
+    def resident(self) -> List[str]:
+        """Modèles actuellement en mémoire, du moins au plus récemment utilisé."""
+        with self._lock:
+            return list(self._resident)
+
+    def get(self, name: Optional[str] = None) -> Optional[FastOscarModel]:
+        """
+        Chemin rapide du modèle demandé (None si son pipeline ne s'y prête pas).
+        Lève ValueError si les artefacts ne correspondent plus au manifeste.
+        """
+        entry = self.entry(name)
+        with self._lock:
+            if entry.name in self._resident:
+                self._resident.move_to_end(entry.name)
+                return self._resident[entry.name]
+
+            model = self._load(entry)
+            self._resident[entry.name] = model
+            while len(self._resident) > self.max_resident:
+                self._resident.popitem(last=False)
+            return model
+
+    def _load(self, entry: ModelEntry) -> Optional[FastOscarModel]:
+        artifact_dir = os.path.join(self.models_dir, entry.path)
+        if entry.artifact_hash is not None and model_version(artifact_dir) != entry.artifact_hash:
+            raise ValueError(
+                f"Artefacts de {entry.name} modifiés depuis leur enregistrement "
+                f"(python model_registry.py register {entry.name} {entry.path})."
+            )
+        model = load_serving_model(artifact_dir, self.backend)
+        if model is not None and entry.train_cols is not None and model.train_cols != entry.train_cols:
+            raise ValueError(f"Colonnes de {entry.name} différentes de la spec du registre.")
+        self.loads += 1
+        return model
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Registre des modèles Oscar (models/registry.json).")
+    parser.add_argument("--models-dir", default=DEFAULT_MODEL_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="Modèles enregistrés")
+    reg = sub.add_parser("register", help="Enregistre (ou met à jour) un modèle")
+    reg.add_argument("name")
+    reg.add_argument("path", help="Dossier des artefacts, relatif à models/")
+    reg.add_argument("--label")
+    reg.add_argument("--category")
+    reg.add_argument("--version")
+    reg.add_argument("--default", action="store_true", help="Devient le modèle par défaut de l'appli")
+    args = parser.parse_args(argv)
+
+    if args.command == "register":
+        entry = register(
+            args.name, args.path, args.models_dir,
+            label=args.label, category=args.category, version=args.version, make_default=args.default,
+        )
+        print(f"✅ {entry.name} -> {entry.path} ({entry.artifact_hash})")
+        return
+
+    entries, default = read_manifest(args.models_dir)
+    for e in entries.values():
+        n_cols = len(e.train_cols) if e.train_cols is not None else "?"
+        print(
+            f"{'*' if e.name == default else ' '} {e.name:<20} {e.display_name():<30} "
+            f"{e.category:<15} {e.path:<40} {e.artifact_hash}  {n_cols} features"
+        )
+
+
+if __name__ == "__main__":
+    main()
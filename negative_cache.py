@@ -0,0 +1,162 @@
+# negative_cache.py
+"""
+Cache négatif : mémorise les lookups qui n'ont rien donné (pas d'imdb_id,
+titre absent d'IMDb, erreur API) par clé et par endpoint, pour ne pas les
+retenter à chaque rerun Streamlit.
+
+- TTL courts et distincts selon la cause ("no_data" vs "error")
+- persistance SQLite partagée entre sessions
+- filtre de Bloom optionnel devant la base pour les gros catalogues :
+  un "non" du filtre évite toute requête SQLite
+"""
+
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict
+
+DEFAULT_DB_PATH = os.path.join("data", "negative_cache.sqlite")
+
+# Durées de vie par cause (secondes)
+NO_DATA = "no_data"
+ERROR = "error"
+DEFAULT_TTLS: Dict[str, float] = {
+    NO_DATA: 3 * 24 * 3600,  # le titre n'a pas de données : on réessaie dans quelques jours
+    ERROR: 15 * 60,          # erreur réseau / quota : on réessaie vite
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS negative_cache (
+    key TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (key, endpoint)
+) WITHOUT ROWID;
+"""
+
+
+class BloomFilter:
+    """
+    Filtre de Bloom minimal (bytearray + double hachage blake2b).
+    Pas de faux négatifs : si `x in bloom` est False, x n'a jamais été ajouté.
+    """
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.nb_hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.nb_hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class NegativeCache:
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        ttls: Optional[Dict[str, float]] = None,
+        bloom_capacity: Optional[int] = None,
+    ):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db_path = db_path
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.execute(
+                "DELETE FROM negative_cache WHERE expires_at < ?", (time.time(),)
+            )
+            self._conn.commit()
+
+        self._bloom: Optional[BloomFilter] = None
+        if bloom_capacity:
+            self._bloom = BloomFilter(capacity=bloom_capacity)
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT key, endpoint FROM negative_cache"
+                ).fetchall()
+            for key, endpoint in rows:
+                self._bloom.add(self._bloom_key(key, endpoint))
+
+    @staticmethod
+    def _bloom_key(key: str, endpoint: str) -> str:
+        return f"{endpoint}|{key}"
+
+    def is_negative(self, key: str, endpoint: str) -> bool:
+        """True si un échec récent (non expiré) est mémorisé pour (key, endpoint)."""
+        if not key:
+            return False
+        if self._bloom is not None and self._bloom_key(key, endpoint) not in self._bloom:
+            return False
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at FROM negative_cache WHERE key = ? AND endpoint = ?",
+                (key, endpoint),
+            ).fetchone()
+        return row is not None and row[0] >= time.time()
+
+    def record(self, key: str, endpoint: str, reason: str = NO_DATA) -> None:
+        if not key:
+            return
+        ttl = self.ttls.get(reason, self.ttls[ERROR])
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO negative_cache (key, endpoint, reason, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, endpoint, reason, time.time() + ttl),
+            )
+            self._conn.commit()
+        if self._bloom is not None:
+            self._bloom.add(self._bloom_key(key, endpoint))
+
+    def forget(self, key: str, endpoint: str) -> None:
+        """Supprime l'entrée (ex : le lookup a fini par réussir)."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM negative_cache WHERE key = ? AND endpoint = ?",
+                (key, endpoint),
+            )
+            self._conn.commit()
+
+
+_default_cache: Optional[NegativeCache] = None
+_default_lock = threading.Lock()
+
+
+def get_default_negative_cache() -> Optional[NegativeCache]:
+    """
+    Cache partagé par tout le process.
+    Variables d'environnement :
+      - NEGATIVE_CACHE_DB : chemin de la base
+      - NEGATIVE_CACHE_BLOOM_CAPACITY : active le filtre de Bloom (nb d'entrées prévu)
+    """
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            bloom_capacity = os.getenv("NEGATIVE_CACHE_BLOOM_CAPACITY")
+            try:
+                _default_cache = NegativeCache(
+                    os.getenv("NEGATIVE_CACHE_DB", DEFAULT_DB_PATH),
+                    bloom_capacity=int(bloom_capacity) if bloom_capacity else None,
+                )
+            except (sqlite3.Error, OSError, ValueError):
+                return None
+        return _default_cache
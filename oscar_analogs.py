@@ -0,0 +1,113 @@
+# oscar_analogs.py
+"""
+Précédents historiques : les films du dataset des Oscars qui ressemblent le plus
+au film évalué par la page ML, avec leur résultat.
+
+La matrice de features standardisée (notes, durée, genres) et son KD-tree sont
+construits une seule fois au démarrage ; une requête k-NN prend ensuite une
+centaine de microsecondes.
+
+Les prix (BAFTA, DGA...) et le nombre de nominations ne servent pas à la
+distance : ils sont inconnus pour un film récent, qui paraîtrait sinon éloigné
+de tous les nominés historiques.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from oscar_dataset import GENRE_COLS, load_oscar_dataset
+
+NUMERIC_COLS = ["NotesTMDb", "Runtime", "NotesIMDb", "NotesRottenTomatoes", "NotesMetacritic"]
+
+# Poids relatifs des blocs de features (après standardisation)
+NUMERIC_WEIGHT = 1.0
+# Les genres sont nombreux : sans sous-pondération, ils écrasent les notes
+GENRE_WEIGHT = 0.5
+
+DEFAULT_K = 5
+
+
+class AnalogIndex:
+    def __init__(self, df: pd.DataFrame):
+        from sklearn.neighbors import KDTree
+
+        # Le dataset contient des lignes répétées pour un même film
+        films = df.drop_duplicates(subset=["titre", "year"]).reset_index(drop=True)
+        self.titles: List[str] = films["titre"].astype(str).tolist()
+        self.years: List[int] = films["year"].astype(int).tolist()
+        # "Not Found" : film sans imdb_id dans le dataset
+        self.imdb_ids: List[Optional[str]] = [
+            None if pd.isna(i) or not str(i).startswith("tt") else str(i)
+            for i in films["imdb_id"].astype(object)
+        ]
+        self.oscars: List[bool] = films["Oscar"].astype(bool).tolist()
+        self.feature_cols: List[str] = [*NUMERIC_COLS, *GENRE_COLS]
+
+        X = films[self.feature_cols].to_numpy(dtype=np.float64)
+        self.fill_values = np.nanmedian(X, axis=0)
+        X = np.where(np.isnan(X), self.fill_values, X)
+        self.mean = X.mean(axis=0)
+        std = X.std(axis=0)
+        self.scale = np.where(std > 0, std, 1.0)
+
+        weights = np.concatenate([
+            np.full(len(NUMERIC_COLS), NUMERIC_WEIGHT),
+            np.full(len(GENRE_COLS), GENRE_WEIGHT),
+        ])
+        self.scale = self.scale / weights
+        self.col_index: Dict[str, int] = {c: i for i, c in enumerate(self.feature_cols)}
+
+        self.tree = KDTree(self._standardize(X))
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def _standardize(self, X: np.ndarray) -> np.ndarray:
+        X = np.where(np.isnan(X), self.fill_values, X)
+        return (X - self.mean) / self.scale
+
+    def _vector(self, row: Dict[str, Any]) -> np.ndarray:
+        # Note absente = inconnue (imputée), genre absent = 0
+        x = np.zeros(len(self.feature_cols), dtype=np.float64)
+        x[:len(NUMERIC_COLS)] = np.nan
+        for col, value in row.items():
+            i = self.col_index.get(col)
+            if i is not None:
+                x[i] = np.nan if value is None else float(value)
+        return x
+
+    def query(
+        self,
+        row: Dict[str, Any],
+        k: int = DEFAULT_K,
+        exclude_imdb_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Les k films historiques les plus proches d'une ligne de features
+        (format build_feature_row) : [{titre, year, imdb_id, Oscar, distance}].
+        exclude_imdb_id : écarte le film lui-même s'il fait partie du dataset
+        (les titres du dataset sont ceux de Wikipédia, pas ceux de TMDB).
+        """
+        n = min(len(self.titles), k + (1 if exclude_imdb_id else 0))
+        dist, idx = self.tree.query(self._standardize(self._vector(row)[None, :]), k=n)
+
+        analogs: List[Dict[str, Any]] = []
+        for d, i in zip(dist[0], idx[0]):
+            if exclude_imdb_id and self.imdb_ids[i] == exclude_imdb_id:
+                continue
+            analogs.append({
+                "titre": self.titles[i],
+                "year": self.years[i],
+                "imdb_id": self.imdb_ids[i],
+                "Oscar": self.oscars[i],
+                "distance": float(d),
+            })
+            if len(analogs) == k:
+                break
+        return analogs
+
+
+def build_analog_index(df: Optional[pd.DataFrame] = None) -> AnalogIndex:
+    return AnalogIndex(load_oscar_dataset() if df is None else df)
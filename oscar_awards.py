@@ -0,0 +1,83 @@
+# oscar_awards.py
+"""
+Index en mémoire des films du dataset historique des Oscars, par imdb_id.
+
+Pour un film déjà présent dans data/oscars_features.csv, on connaît ses prix
+(BAFTA, DGA, PGA, SAG, Golden Globes), son nombre de nominations et ses notes
+IMDb / Rotten Tomatoes / Metacritic : la page ML les utilise directement au lieu
+de valeurs par défaut, et n'appelle pas IMDb pour ce film.
+"""
+
+import math
+import threading
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from oscar_dataset import AWARD_COLS, load_oscar_dataset
+
+SCORE_COLS = ["NotesIMDb", "NotesRottenTomatoes", "NotesMetacritic"]
+
+
+class AwardsIndex:
+    def __init__(self, df: pd.DataFrame):
+        known = df.dropna(subset=["imdb_id"])
+        known = known.assign(imdb_id=known["imdb_id"].astype(str))
+        grouped = known.groupby("imdb_id", sort=False)
+
+        # Lignes répétées d'un même film : un prix obtenu sur l'une vaut pour le film
+        awards = grouped[AWARD_COLS].any()
+        firsts = grouped[[*SCORE_COLS, "nomination_count", "year", "titre"]].first()
+        table = awards.join(firsts)
+
+        self._records: Dict[str, Dict[str, Any]] = {}
+        for imdb_id, rec in table.iterrows():
+            record: Dict[str, Any] = {c: bool(rec[c]) for c in AWARD_COLS}
+            for c in SCORE_COLS:
+                value = rec[c]
+                record[c] = None if pd.isna(value) else float(value)
+            record["nomination_count"] = int(rec["nomination_count"])
+            record["year"] = int(rec["year"])
+            record["titre"] = str(rec["titre"])
+            self._records[imdb_id] = record
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, imdb_id: Optional[str]) -> bool:
+        return bool(imdb_id) and imdb_id in self._records
+
+    def get(self, imdb_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Prix, nominations et notes connus du film, ou None s'il n'est pas dans le dataset."""
+        if not imdb_id:
+            return None
+        return self._records.get(imdb_id)
+
+    def apply(self, row: Dict[str, Any], imdb_id: Optional[str]) -> Dict[str, Any]:
+        """Complète une ligne de features (build_feature_row) avec les valeurs connues."""
+        record = self.get(imdb_id)
+        if record is None:
+            return row
+        for c in AWARD_COLS:
+            row[c] = record[c]
+        row["nomination_count"] = record["nomination_count"]
+        for c in SCORE_COLS:
+            if record[c] is not None and not math.isnan(record[c]):
+                row[c] = record[c]
+        return row
+
+
+_default_index: Optional[AwardsIndex] = None
+_default_lock = threading.Lock()
+
+
+def get_default_awards_index() -> Optional[AwardsIndex]:
+    """Index partagé par tout le process ; None si le dataset est illisible."""
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            try:
+                _default_index = AwardsIndex(load_oscar_dataset())
+            except (OSError, ValueError, KeyError):
+                return None
+        return _default_index
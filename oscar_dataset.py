@@ -0,0 +1,181 @@
+# oscar_dataset.py
+"""
+Version typée et compacte du dataset historique des Oscars.
+
+data/oscars_features.csv traîne des colonnes redondantes (trois index de ligne,
+imdb_id / imdbID en double), des booléens et des scores lus en texte
+("Non Disponible") et des genres en int64. On le convertit une fois en Parquet
+avec un schéma explicite :
+
+    python oscar_dataset.py            # -> data/oscars_features.parquet
+
+- bool pour la cible et les prix, int8 pour les genres et le nombre de nominations
+- float32 pour les notes / durées, int16 pour l'année
+- imdb_id dédoublonné (imdb_id, sinon imdbID ; "Not Found" -> vide) et catégoriel
+
+load_oscar_dataset() lit le Parquet (quelques ms) s'il correspond au CSV
+(hash noté dans ses métadonnées), sinon reconvertit le CSV en mémoire.
+"""
+
+import argparse
+import hashlib
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CSV_PATH = os.path.join("data", "oscars_features.csv")
+DEFAULT_PARQUET_PATH = os.path.join("data", "oscars_features.parquet")
+
+AWARD_COLS = ["BAFTA", "DGA", "PGA", "SAG", "GG"]
+SCORE_COLS = ["NotesTMDb", "Runtime", "NotesIMDb", "NotesRottenTomatoes", "NotesMetacritic"]
+GENRE_COLS = [
+    "Action", "Adventure", "Animation", "Comedy", "Crime",
+    "Documentary", "Drama", "Family", "Fantasy", "History",
+    "Horror", "Music", "Mystery", "Romance", "Science Fiction",
+    "Thriller", "War", "Western",
+]
+
+# Colonnes du dataset typé, dans l'ordre
+COLUMNS: List[str] = [
+    "year", "titre", "imdb_id", "Oscar", *AWARD_COLS, *SCORE_COLS,
+    "nomination_count", *GENRE_COLS, "Quarter",
+]
+
+# Types pandas de chaque colonne
+DTYPES: Dict[str, str] = {
+    "year": "int16",
+    "titre": "string",
+    "imdb_id": "category",
+    "Oscar": "bool",
+    **{c: "bool" for c in AWARD_COLS},
+    **{c: "float32" for c in SCORE_COLS},
+    "nomination_count": "int8",
+    **{c: "int8" for c in GENRE_COLS},
+    "Quarter": "float32",
+}
+
+_MISSING_IDS = {"", "Not Found"}
+_METADATA_KEY = b"source_sha256"
+
+
+def file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+def arrow_schema():
+    """Schéma Arrow explicite du fichier Parquet."""
+    import pyarrow as pa
+
+    fields = [
+        pa.field("year", pa.int16()),
+        pa.field("titre", pa.string()),
+        pa.field("imdb_id", pa.dictionary(pa.int16(), pa.string())),
+        pa.field("Oscar", pa.bool_()),
+        *[pa.field(c, pa.bool_()) for c in AWARD_COLS],
+        *[pa.field(c, pa.float32()) for c in SCORE_COLS],
+        pa.field("nomination_count", pa.int8()),
+        *[pa.field(c, pa.int8()) for c in GENRE_COLS],
+        pa.field("Quarter", pa.float32()),
+    ]
+    return pa.schema(fields)
+
+
+# ===================== Conversion =====================
+
+def read_csv_typed(csv_path: str = DEFAULT_CSV_PATH) -> pd.DataFrame:
+    """CSV d'origine -> DataFrame typé (colonnes redondantes retirées)."""
+    raw = pd.read_csv(
+        csv_path,
+        usecols=lambda c: c in DTYPES or c == "imdbID",
+        dtype={"titre": "string", "imdb_id": "string", "imdbID": "string",
+               "NotesTMDb": "string", "Runtime": "string"},
+    )
+
+    # imdb_id et imdbID : une seule colonne, sans les "Not Found"
+    ids = raw["imdb_id"].where(~raw["imdb_id"].isin(_MISSING_IDS))
+    ids = ids.fillna(raw["imdbID"].where(~raw["imdbID"].isin(_MISSING_IDS)))
+
+    df = pd.DataFrame(index=raw.index)
+    for col in COLUMNS:
+        if col == "imdb_id":
+            df[col] = ids.astype("category")
+        elif DTYPES[col] == "float32":
+            df[col] = pd.to_numeric(raw[col], errors="coerce").astype("float32")
+        elif DTYPES[col] == "int8" and col not in GENRE_COLS:
+            df[col] = pd.to_numeric(raw[col], errors="coerce").fillna(0).astype("int8")
+        else:
+            df[col] = raw[col].astype(DTYPES[col])
+    return df
+
+
+def convert_csv_to_parquet(
+    csv_path: str = DEFAULT_CSV_PATH,
+    parquet_path: str = DEFAULT_PARQUET_PATH,
+) -> str:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    df = read_csv_typed(csv_path)
+    schema = arrow_schema().with_metadata({_METADATA_KEY: file_hash(csv_path).encode()})
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    pq.write_table(table, parquet_path, compression="zstd")
+    return parquet_path
+
+
+# ===================== Lecture =====================
+
+def _parquet_is_fresh(parquet_path: str, csv_path: str) -> bool:
+    import pyarrow.parquet as pq
+
+    if not os.path.exists(parquet_path):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    metadata = pq.read_schema(parquet_path).metadata or {}
+    return metadata.get(_METADATA_KEY, b"").decode() == file_hash(csv_path)
+
+
+def load_oscar_dataset(
+    columns: Optional[List[str]] = None,
+    parquet_path: str = DEFAULT_PARQUET_PATH,
+    csv_path: str = DEFAULT_CSV_PATH,
+) -> pd.DataFrame:
+    """
+    Dataset historique typé. Parquet si disponible et à jour, sinon conversion
+    du CSV en mémoire (pyarrow absent, Parquet non généré ou périmé).
+    """
+    try:
+        import pyarrow.parquet as pq
+
+        if _parquet_is_fresh(parquet_path, csv_path):
+            return pq.read_table(parquet_path, columns=columns).to_pandas()
+    except ImportError:
+        pass
+
+    df = read_csv_typed(csv_path)
+    return df[columns] if columns else df
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Conversion de oscars_features.csv en Parquet typé.")
+    parser.add_argument("--csv", default=DEFAULT_CSV_PATH)
+    parser.add_argument("--out", default=DEFAULT_PARQUET_PATH)
+    args = parser.parse_args(argv)
+
+    path = convert_csv_to_parquet(args.csv, args.out)
+    csv_mb = pd.read_csv(args.csv).memory_usage(deep=True).sum() / 1e6
+    typed_mb = load_oscar_dataset(parquet_path=path, csv_path=args.csv).memory_usage(deep=True).sum() / 1e6
+    print(
+        f"✅ {path} ({os.path.getsize(path) / 1e3:.0f} Ko sur disque, "
+        f"{typed_mb:.2f} Mo en mémoire contre {csv_mb:.2f} Mo pour le CSV)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,500 @@
+# oscar_model.py
+"""
+Chemin d'inférence rapide du modèle Oscar, sans pandas.
+
+Le pipeline sklearn (imputer médiane -> StandardScaler -> XGBClassifier) est
+"aplati" une fois au chargement :
+  - index colonne -> position, calculé depuis oscar_train_cols.joblib
+  - médianes d'imputation, moyennes et écarts-types en tableaux NumPy
+  - booster XGBoost appelé via inplace_predict (pas de DMatrix, pas de DataFrame)
+
+Une prédiction coûte alors quelques dizaines de microsecondes au lieu de
+plusieurs millisecondes de construction / alignement de DataFrame.
+
+Le modèle aplati peut aussi être exporté au format natif XGBoost (UBJSON) avec
+une petite spec de pré-traitement JSON :
+
+    python oscar_model.py export
+
+Au démarrage, l'appli charge alors ces fichiers directement (ni pickle, ni
+sklearn, xgboost importé seulement à ce moment-là) au lieu du pipeline joblib.
+
+Backend optionnel "treelite" (OSCAR_INFERENCE_BACKEND=treelite) : les arbres
+sont compilés en bibliothèque native par Treelite / TL2cgen, pour le scoring de
+gros lots (les explications TreeSHAP passent toujours par le booster XGBoost).
+Parité et débit se vérifient avec :
+
+    python oscar_model.py check --backend xgboost --backend treelite
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_MODEL_DIR = "models"
+BOOSTER_FILENAME = "oscar_booster.ubj"
+SPEC_FILENAME = "oscar_preprocess.json"
+SPEC_VERSION = 1
+
+
+class FastOscarModel:
+    def __init__(
+        self,
+        booster,
+        train_cols: List[str],
+        fill_values: np.ndarray,
+        mean: np.ndarray,
+        scale: np.ndarray,
+        iteration_range: Tuple[int, int] = (0, 0),
+    ):
+        self.booster = booster
+        self.train_cols = list(train_cols)
+        self.col_index: Dict[str, int] = {c: i for i, c in enumerate(self.train_cols)}
+        self.n_features = len(self.train_cols)
+        self.fill_values = np.asarray(fill_values, dtype=np.float64)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.iteration_range = iteration_range
+
+    @classmethod
+    def from_pipeline(cls, pipeline, train_cols: List[str]) -> "FastOscarModel":
+        """
+        Construit le chemin rapide depuis le pipeline entraîné.
+        Lève ValueError si le pipeline n'a pas la forme attendue.
+        """
+        steps = getattr(pipeline, "named_steps", {})
+        imputer, scaler, model = steps.get("imputer"), steps.get("scaler"), steps.get("model")
+        if imputer is None or scaler is None or model is None or len(steps) != 3:
+            raise ValueError("Pipeline inattendu (imputer -> scaler -> model requis).")
+        if getattr(imputer, "add_indicator", False):
+            raise ValueError("Imputer avec indicateurs de valeurs manquantes non supporté.")
+
+        fitted_cols = getattr(imputer, "feature_names_in_", None)
+        if fitted_cols is not None and list(fitted_cols) != list(train_cols):
+            raise ValueError("Colonnes du pipeline différentes de oscar_train_cols.joblib.")
+
+        n = len(train_cols)
+        fill_values = np.asarray(imputer.statistics_, dtype=np.float64)
+        if fill_values.shape != (n,) or np.isnan(fill_values).any():
+            raise ValueError("Médianes d'imputation incomplètes.")
+
+        mean = scaler.mean_ if getattr(scaler, "with_mean", True) else np.zeros(n)
+        scale = scaler.scale_ if getattr(scaler, "with_std", True) else np.ones(n)
+
+        try:
+            iteration_range = (0, int(model.best_iteration) + 1)
+        except (AttributeError, TypeError):
+            iteration_range = (0, 0)
+
+        return cls(model.get_booster(), train_cols, fill_values, mean, scale, iteration_range)
+
+    # ---------- Assemblage des features ----------
+    def vector_from_row(self, row: Dict[str, Any]) -> np.ndarray:
+        """
+        Ligne de features (dict) -> vecteur aligné sur les colonnes d'entraînement
+        (colonnes absentes à 0, colonnes inconnues ignorées, comme align_features).
+        """
+        x = np.zeros(self.n_features, dtype=np.float64)
+        index = self.col_index
+        for col, value in row.items():
+            i = index.get(col)
+            if i is not None:
+                x[i] = np.nan if value is None else value
+        return x
+
+    def matrix_from_rows(self, rows: Iterable[Dict[str, Any]]) -> np.ndarray:
+        rows = list(rows)
+        X = np.zeros((len(rows), self.n_features), dtype=np.float64)
+        index = self.col_index
+        for r, row in enumerate(rows):
+            for col, value in row.items():
+                i = index.get(col)
+                if i is not None:
+                    X[r, i] = np.nan if value is None else value
+        return X
+
+    # ---------- Prédiction ----------
+    def _preprocess(self, X: np.ndarray) -> np.ndarray:
+        # Imputation + standardisation en float64 (comme sklearn), puis float32
+        # comme XGBoost : résultats identiques au pipeline
+        X = np.where(np.isnan(X), self.fill_values, X)
+        return ((X - self.mean) / self.scale).astype(np.float32)
+
+    def predict_proba_matrix(self, X: np.ndarray) -> np.ndarray:
+        """Probabilité d'Oscar (classe 1) de chaque ligne de X (n, n_features)."""
+        if X.shape[0] == 0:
+            return np.empty(0, dtype=np.float64)
+        out = self.booster.inplace_predict(
+            self._preprocess(X), iteration_range=self.iteration_range
+        )
+        return np.asarray(out, dtype=np.float64).reshape(X.shape[0], -1)[:, -1]
+
+    def predict_proba_row(self, row: Dict[str, Any]) -> float:
+        return float(self.predict_proba_matrix(self.vector_from_row(row)[None, :])[0])
+
+    def predict_proba_rows(self, rows: Iterable[Dict[str, Any]]) -> np.ndarray:
+        return self.predict_proba_matrix(self.matrix_from_rows(rows))
+
+    # ---------- Explications ----------
+    def contributions_matrix(self, X: np.ndarray) -> np.ndarray:
+        """
+        Contributions de chaque feature au score (log-odds), TreeSHAP natif du booster
+        en un seul appel pour tout le lot : (n, n_features + 1), dernière colonne = biais.
+        La somme d'une ligne redonne le logit de predict_proba_matrix.
+        """
+        if X.shape[0] == 0:
+            return np.empty((0, self.n_features + 1), dtype=np.float64)
+        import xgboost as xgb
+
+        out = self.booster.predict(
+            xgb.DMatrix(self._preprocess(X)),
+            pred_contribs=True,
+            iteration_range=self.iteration_range,
+        )
+        return np.asarray(out, dtype=np.float64).reshape(X.shape[0], -1)
+
+    def contributions_rows(self, rows: Iterable[Dict[str, Any]]) -> np.ndarray:
+        return self.contributions_matrix(self.matrix_from_rows(rows))
+
+
+def build_fast_model(pipeline, train_cols: List[str]) -> Optional[FastOscarModel]:
+    """Chemin rapide, ou None si le pipeline ne s'y prête pas (on garde alors predict_proba)."""
+    try:
+        return FastOscarModel.from_pipeline(pipeline, train_cols)
+    except (ValueError, AttributeError):
+        return None
+
+
+# ===================== Format natif (UBJSON + spec) =====================
+
+def export_native(
+    model: FastOscarModel,
+    model_dir: str = DEFAULT_MODEL_DIR,
+    source_hash: Optional[str] = None,
+) -> Tuple[str, str]:
+    """
+    Écrit le booster au format natif XGBoost (UBJSON) et la spec de pré-traitement.
+    source_hash : version de l'artefact joblib d'origine (détection d'un export périmé).
+    """
+    os.makedirs(model_dir, exist_ok=True)
+    booster_path = os.path.join(model_dir, BOOSTER_FILENAME)
+    spec_path = os.path.join(model_dir, SPEC_FILENAME)
+
+    model.booster.save_model(booster_path)
+    spec = {
+        "version": SPEC_VERSION,
+        "source_hash": source_hash,
+        "train_cols": model.train_cols,
+        "fill_values": model.fill_values.tolist(),
+        "mean": model.mean.tolist(),
+        "scale": model.scale.tolist(),
+        "iteration_range": list(model.iteration_range),
+    }
+    with open(spec_path, "w", encoding="utf-8") as f:
+        json.dump(spec, f, ensure_ascii=False, indent=1)
+    return booster_path, spec_path
+
+
+def read_native_spec(model_dir: str = DEFAULT_MODEL_DIR) -> Optional[Dict[str, Any]]:
+    """Spec de pré-traitement exportée, ou None si absente / illisible / d'une autre version."""
+    try:
+        with open(os.path.join(model_dir, SPEC_FILENAME), encoding="utf-8") as f:
+            spec = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if spec.get("version") != SPEC_VERSION:
+        return None
+    if not os.path.exists(os.path.join(model_dir, BOOSTER_FILENAME)):
+        return None
+    return spec
+
+
+def load_native(model_dir: str = DEFAULT_MODEL_DIR, spec: Optional[Dict[str, Any]] = None) -> FastOscarModel:
+    """
+    Charge le modèle exporté. Le fichier UBJSON est lu directement par libxgboost
+    (pas de copie côté Python, pages servies par le cache disque partagé entre
+    workers) ; aucun objet sklearn n'est désérialisé.
+    """
+    spec = spec or read_native_spec(model_dir)
+    if spec is None:
+        raise FileNotFoundError(f"Pas de modèle natif exporté dans {model_dir}/.")
+
+    import xgboost as xgb  # import paresseux : coûteux, inutile tant qu'on ne prédit pas
+
+    booster = xgb.Booster()
+    booster.load_model(os.path.join(model_dir, BOOSTER_FILENAME))
+    return FastOscarModel(
+        booster,
+        spec["train_cols"],
+        np.asarray(spec["fill_values"]),
+        np.asarray(spec["mean"]),
+        np.asarray(spec["scale"]),
+        tuple(spec.get("iteration_range") or (0, 0)),
+    )
+
+
+# ===================== Backend compilé (Treelite / TL2cgen) =====================
+
+BACKENDS = ("xgboost", "treelite")
+DEFAULT_BACKEND = "xgboost"
+# Parité exigée entre un backend compilé et le booster (inplace_predict), en probabilité
+PARITY_TOLERANCE = 1e-5
+PARITY_ROWS = 256
+
+
+class CompiledOscarModel(FastOscarModel):
+    """Même pré-traitement, arbres évalués par une bibliothèque native générée par TL2cgen."""
+
+    def __init__(self, base: FastOscarModel, predictor, libpath: str):
+        super().__init__(
+            base.booster, base.train_cols, base.fill_values, base.mean, base.scale, base.iteration_range
+        )
+        self.predictor = predictor
+        self.libpath = libpath
+
+    def predict_proba_matrix(self, X: np.ndarray) -> np.ndarray:
+        if X.shape[0] == 0:
+            return np.empty(0, dtype=np.float64)
+        import tl2cgen
+
+        out = self.predictor.predict(tl2cgen.DMatrix(self._preprocess(X), dtype="float32"))
+        return np.asarray(out, dtype=np.float64).reshape(X.shape[0], -1)[:, -1]
+
+
+def _shared_lib_suffix() -> str:
+    if sys.platform == "win32":
+        return ".dll"
+    if sys.platform == "darwin":
+        return ".dylib"
+    return ".so"
+
+
+def _toolchain() -> str:
+    if sys.platform == "win32":
+        return "msvc"
+    if sys.platform == "darwin":
+        return "clang"
+    return "gcc"
+
+
+def compile_treelite(base: FastOscarModel, lib_dir: str = DEFAULT_MODEL_DIR) -> CompiledOscarModel:
+    """
+    Compile les arbres en bibliothèque native (une seule fois par version du
+    booster : le fichier models/oscar_booster.<hash>.so est réutilisé ensuite).
+    Lève ImportError si treelite / tl2cgen ne sont pas installés.
+    """
+    import treelite
+    import tl2cgen
+
+    begin, end = base.iteration_range
+    booster = base.booster[begin:end] if end else base.booster
+    digest = hashlib.sha256(bytes(booster.save_raw("ubj"))).hexdigest()[:16]
+    libpath = os.path.join(lib_dir, f"oscar_booster.{digest}{_shared_lib_suffix()}")
+
+    if not os.path.exists(libpath):
+        os.makedirs(lib_dir, exist_ok=True)
+        tl_model = treelite.frontend.from_xgboost(booster)
+        tl2cgen.export_lib(
+            tl_model,
+            toolchain=_toolchain(),
+            libpath=libpath,
+            params={"parallel_comp": os.cpu_count() or 1},
+        )
+    return CompiledOscarModel(base, tl2cgen.Predictor(libpath), libpath)
+
+
+def parity_probe(model: FastOscarModel, n_rows: int = PARITY_ROWS, seed: int = 0) -> np.ndarray:
+    """Lignes brutes de contrôle autour des moyennes d'entraînement (10 % de valeurs manquantes)."""
+    rng = np.random.default_rng(seed)
+    X = model.mean + rng.standard_normal((n_rows, len(model.train_cols))) * 2.0 * model.scale
+    X[rng.random(X.shape) < 0.1] = np.nan
+    return X
+
+
+def check_parity(compiled: FastOscarModel, reference: FastOscarModel) -> float:
+    """
+    Écart max de probabilité entre un backend et le booster XGBoost sur les
+    lignes de contrôle. Lève ValueError au-delà de PARITY_TOLERANCE.
+    """
+    X = parity_probe(reference)
+    diff = float(np.abs(compiled.predict_proba_matrix(X) - reference.predict_proba_matrix(X)).max())
+    if not diff <= PARITY_TOLERANCE:
+        raise ValueError(f"Backend compilé non conforme au booster (écart max {diff:.2e}).")
+    return diff
+
+
+def with_backend(model: FastOscarModel, backend: str = DEFAULT_BACKEND) -> FastOscarModel:
+    """
+    Modèle servi par le backend demandé ("xgboost" : booster tel quel).
+    Un backend compilé n'est servi qu'après contrôle de parité avec le booster.
+    """
+    if backend == "xgboost":
+        return model
+    if backend == "treelite":
+        compiled = compile_treelite(model)
+        check_parity(compiled, model)
+        return compiled
+    raise ValueError(f"Backend inconnu : {backend} (attendu : {', '.join(BACKENDS)}).")
+
+
+# ===================== Modèle servi (appli + scoring hors ligne) =====================
+
+PIPELINE_FILENAME = "oscar_pipeline.joblib"
+TRAIN_COLS_FILENAME = "oscar_train_cols.joblib"
+
+
+def model_version(model_dir: str = DEFAULT_MODEL_DIR) -> Optional[str]:
+    """Hash de l'artefact joblib servi (clé du cache de prédictions), sinon celui noté à l'export."""
+    from feature_store import file_sha256
+
+    try:
+        return file_sha256(os.path.join(model_dir, PIPELINE_FILENAME))
+    except OSError:
+        spec = read_native_spec(model_dir)
+        return spec.get("source_hash") if spec else None
+
+
+def load_serving_model(model_dir: str = DEFAULT_MODEL_DIR, backend: str = DEFAULT_BACKEND) -> Optional[FastOscarModel]:
+    """
+    Modèle natif exporté s'il correspond au pipeline servi, sinon chemin rapide
+    construit depuis le pipeline joblib. None si le pipeline ne s'y prête pas.
+    Un backend indisponible (ou en écart de parité) retombe sur XGBoost.
+    """
+    model = None
+    spec = read_native_spec(model_dir)
+    if spec is not None and spec.get("source_hash") in (None, model_version(model_dir)):
+        try:
+            model = load_native(model_dir, spec)
+        except Exception:
+            model = None
+    if model is None:
+        import joblib
+        from xgboost import XGBClassifier  # noqa: F401
+
+        pipeline = joblib.load(os.path.join(model_dir, PIPELINE_FILENAME))
+        train_cols = list(joblib.load(os.path.join(model_dir, TRAIN_COLS_FILENAME)))
+        model = build_fast_model(pipeline, train_cols)
+    if model is None:
+        return None
+
+    try:
+        return with_backend(model, backend)
+    except Exception:
+        return model
+
+
+# ===================== Vérification : parité + débit =====================
+
+def load_reference_matrix(csv_path: str, train_cols: List[str]):
+    """Features du dataset historique alignées sur les colonnes d'entraînement (DataFrame float64)."""
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    X = df.reindex(columns=train_cols, fill_value=0)
+    return X.apply(pd.to_numeric, errors="coerce").astype("float64")
+
+
+def check_backends(
+    pipeline,
+    train_cols: List[str],
+    csv_path: str,
+    backends: Iterable[str],
+    n_rows: int = 100_000,
+    tolerance: float = 1e-5,
+) -> List[Dict[str, Any]]:
+    """
+    Compare chaque backend à pipeline.predict_proba sur le dataset historique,
+    puis mesure son débit sur n_rows lignes (dataset répété).
+    """
+    X_df = load_reference_matrix(csv_path, train_cols)
+    classes = list(getattr(pipeline, "classes_", []))
+    pos = classes.index(1) if 1 in classes else -1
+    reference = pipeline.predict_proba(X_df)[:, pos]
+
+    X = X_df.to_numpy()
+    X_big = np.tile(X, (math.ceil(n_rows / len(X)), 1))[:n_rows]
+
+    start = time.perf_counter()
+    pipeline.predict_proba(X_df.iloc[np.arange(n_rows) % len(X_df)])
+    results = [{
+        "backend": "sklearn pipeline",
+        "max_abs_diff": 0.0,
+        "ok": True,
+        "rows_per_s": n_rows / (time.perf_counter() - start),
+    }]
+
+    base = FastOscarModel.from_pipeline(pipeline, train_cols)
+    for backend in backends:
+        try:
+            model = with_backend(base, backend)
+        except ImportError as e:
+            results.append({"backend": backend, "error": f"non installé ({e.name})"})
+            continue
+        except ValueError as e:
+            results.append({"backend": backend, "error": str(e)})
+            continue
+        diff = float(np.abs(model.predict_proba_matrix(X) - reference).max())
+        model.predict_proba_matrix(X[:10])  # préchauffage
+        start = time.perf_counter()
+        model.predict_proba_matrix(X_big)
+        results.append({
+            "backend": backend,
+            "max_abs_diff": diff,
+            "ok": diff <= tolerance,
+            "rows_per_s": n_rows / (time.perf_counter() - start),
+        })
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Export du pipeline Oscar au format natif XGBoost (UBJSON + spec JSON) "
+                    "et vérification des backends d'inférence."
+    )
+    parser.add_argument("command", choices=["export", "check"])
+    parser.add_argument("--pipeline", default=os.path.join(DEFAULT_MODEL_DIR, "oscar_pipeline.joblib"))
+    parser.add_argument("--train-cols", default=os.path.join(DEFAULT_MODEL_DIR, "oscar_train_cols.joblib"))
+    parser.add_argument("--out-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--csv", default=os.path.join("data", "oscars_features.csv"))
+    parser.add_argument("--backend", action="append", choices=BACKENDS,
+                        help="Backend(s) à vérifier (check ; par défaut : tous)")
+    parser.add_argument("--rows", type=int, default=100_000, help="Taille du lot de benchmark (check)")
+    args = parser.parse_args(argv)
+
+    import joblib
+    from feature_store import file_sha256
+
+    start = time.perf_counter()
+    pipeline = joblib.load(args.pipeline)
+    train_cols = list(joblib.load(args.train_cols))
+
+    if args.command == "export":
+        model = FastOscarModel.from_pipeline(pipeline, train_cols)
+        booster_path, spec_path = export_native(model, args.out_dir, source_hash=file_sha256(args.pipeline))
+        print(f"✅ {booster_path} + {spec_path} ({time.perf_counter() - start:.2f}s)")
+        return
+
+    results = check_backends(pipeline, train_cols, args.csv, args.backend or BACKENDS, args.rows)
+    failed = False
+    for r in results:
+        if "error" in r:
+            print(f"⚪ {r['backend']:<17} {r['error']}")
+            continue
+        failed |= not r["ok"]
+        print(
+            f"{'✅' if r['ok'] else '❌'} {r['backend']:<17} "
+            f"écart max {r['max_abs_diff']:.2e}  {r['rows_per_s']:>12,.0f} films/s"
+        )
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# scheduler.py
+"""
+Ordonnanceur central des appels sortants (TMDB, IMDb).
+
+Toutes les requêtes passent par un RequestScheduler qui applique :
+- un débit maximal (token bucket) commun à toute l'appli ;
+- une concurrence maximale, avec des slots réservés aux classes prioritaires ;
+- une file par priorité : INTERACTIVE > PAGE_LOAD > BACKGROUND.
+
+Une recherche tapée par l'utilisateur passe donc devant l'enrichissement en
+masse de la page Data Analyse ou le préchauffage des caches.
+
+    with request_priority(INTERACTIVE):
+        tmdb.search_movies("Dune")
+"""
+
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, TypeVar, Any, Iterator
+
+T = TypeVar("T")
+
+INTERACTIVE = 0
+PAGE_LOAD = 1
+BACKGROUND = 2
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", PAGE_LOAD: "page_load", BACKGROUND: "background"}
+
+# Slots de concurrence laissés libres pour les classes plus prioritaires
+DEFAULT_RESERVED_SLOTS: Dict[int, int] = {INTERACTIVE: 0, PAGE_LOAD: 2, BACKGROUND: 4}
+
+
+class SchedulerRejected(TimeoutError):
+    """La requête n'a pas été admise à temps (file saturée)."""
+
+
+_current_priority: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "request_priority", default=PAGE_LOAD
+)
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """Fixe la priorité des appels faits dans ce bloc (et des threads lancés via submit_in_context)."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> int:
+    return _current_priority.get()
+
+
+def submit_in_context(pool: ThreadPoolExecutor, fn: Callable[..., T], *args: Any) -> "Future[T]":
+    """pool.submit qui propage le contexte courant (priorité, budget de latence) au thread."""
+    ctx = contextvars.copy_context()
+    return pool.submit(ctx.run, fn, *args)
+
+
+class RequestScheduler:
+    def __init__(
+        self,
+        rate_per_s: float = 20.0,
+        burst: int = 20,
+        max_concurrency: int = 12,
+        reserved_slots: Optional[Dict[int, int]] = None,
+    ):
+        self.rate_per_s = rate_per_s
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.reserved_slots = {**DEFAULT_RESERVED_SLOTS, **(reserved_slots or {})}
+
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._in_flight = 0
+        self._waiting: list = []  # heap de (priorité, n° d'arrivée)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    # ---------- Token bucket ----------
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate_per_s)
+        self._last_refill = now
+
+    def _time_until_token(self) -> float:
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate_per_s
+
+    def _can_admit(self, priority: int) -> bool:
+        limit = self.max_concurrency - self.reserved_slots.get(priority, 0)
+        return self._tokens >= 1 and self._in_flight < max(1, limit)
+
+    # ---------- Admission ----------
+    def acquire(self, priority: int, timeout: Optional[float] = None) -> None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    self._refill()
+                    # Seule la tête de file (la plus prioritaire, puis la plus ancienne) est admise
+                    if self._waiting[0] == ticket and self._can_admit(priority):
+                        heapq.heappop(self._waiting)
+                        self._tokens -= 1
+                        self._in_flight += 1
+                        self._cond.notify_all()
+                        return
+
+                    wait_s = self._time_until_token() or None
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise SchedulerRejected(
+                                f"Requête {PRIORITY_NAMES.get(priority, priority)} non admise à temps."
+                            )
+                        wait_s = remaining if wait_s is None else min(wait_s, remaining)
+                    self._cond.wait(wait_s)
+            except BaseException:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                raise
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority: Optional[int] = None, timeout: Optional[float] = None) -> Iterator[None]:
+        self.acquire(current_priority() if priority is None else priority, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            waiting = [p for p, _ in self._waiting]
+            return {
+                "in_flight": self._in_flight,
+                "waiting": {name: waiting.count(p) for p, name in PRIORITY_NAMES.items()},
+            }
+
+
+# Un ordonnanceur par API (quotas indépendants)
+tmdb_scheduler = RequestScheduler(rate_per_s=20.0, burst=20, max_concurrency=12)
+imdb_scheduler = RequestScheduler(rate_per_s=5.0, burst=5, max_concurrency=5,
+                                  reserved_slots={PAGE_LOAD: 1, BACKGROUND: 2})
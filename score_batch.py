@@ -0,0 +1,389 @@
+# score_batch.py
+"""
+Scoring hors ligne de grandes listes de films TMDB, sans l'interface Streamlit.
+
+    python score_batch.py ids.txt -o scores.parquet
+    python score_batch.py sorties_2024.csv --id-column id -o scores.csv --processes 4
+
+- ids lus en flux depuis le fichier (texte libre ou colonne d'un CSV), par blocs
+- features : même logique que la page ML (ml_page.get_feature_rows) : feature store
+  d'abord, récupération TMDB / IMDb concurrente pour les films manquants
+- modèle choisi dans le registre (--model, défaut : celui de l'appli)
+- prédictions déjà en cache (même version du modèle) réutilisées, les autres
+  calculées dans un pool de processus (modèle chargé une fois par processus)
+  pendant que les blocs suivants sont récupérés
+- résultats écrits bloc par bloc : un fichier Parquet par bloc dans le dossier
+  de sortie, ou ajout en fin de CSV
+- reprise : point de contrôle <sortie>.checkpoint.json mis à jour après chaque
+  bloc ; relancer la même commande reprend là où le scoring s'était arrêté
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import get_context
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+from model_registry import read_manifest
+from oscar_model import (
+    DEFAULT_BACKEND,
+    DEFAULT_MODEL_DIR,
+    PIPELINE_FILENAME,
+    TRAIN_COLS_FILENAME,
+    load_serving_model,
+    model_version,
+)
+
+DEFAULT_CHUNK_SIZE = 200
+DEFAULT_FETCH_WORKERS = 8
+
+OUTPUT_COLUMNS = ["id", "title", "year", "NotesTMDb", "NotesIMDb", "proba_oscar", "model_hash"]
+
+
+# ===================== Lecture des ids =====================
+
+def iter_ids(path: str, id_column: Optional[str] = None) -> Iterator[int]:
+    """Ids TMDB du fichier, lus ligne à ligne (jamais chargé entièrement en mémoire)."""
+    from ml_page import parse_tmdb_ids
+
+    with open(path, newline="", encoding="utf-8", errors="ignore") as f:
+        if id_column:
+            for record in csv.DictReader(f):
+                value = (record.get(id_column) or "").strip()
+                if value.isdigit():
+                    yield int(value)
+        else:
+            for line in f:
+                yield from parse_tmdb_ids(line)
+
+
+def unique_ids(ids: Iterable[int], skip: Set[int]) -> Iterator[int]:
+    """Ids dédoublonnés au fil de la lecture (seuls les ids déjà vus sont gardés), hors skip."""
+    seen: Set[int] = set()
+    for mid in ids:
+        if mid not in seen and mid not in skip:
+            seen.add(mid)
+            yield mid
+
+
+def chunked(ids: Iterable[int], size: int) -> Iterator[List[int]]:
+    it = iter(ids)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ===================== Sorties incrémentales =====================
+
+def output_format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "parquet"
+
+
+def _arrow_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        pa.field("id", pa.int64()),
+        pa.field("title", pa.string()),
+        pa.field("year", pa.int16()),
+        pa.field("NotesTMDb", pa.float64()),
+        pa.field("NotesIMDb", pa.float64()),
+        pa.field("proba_oscar", pa.float64()),
+        pa.field("model_hash", pa.string()),
+    ])
+
+
+def write_chunk(output: str, part: int, df: pd.DataFrame, csv_offset: int) -> int:
+    """
+    Écrit un bloc de résultats ; renvoie la nouvelle taille du CSV (0 en Parquet).
+    Parquet : un fichier par bloc, écrit sous un nom temporaire puis renommé.
+    """
+    if output_format(output) == "csv":
+        with open(output, "a", newline="", encoding="utf-8") as f:
+            df.to_csv(f, header=csv_offset == 0, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(output, exist_ok=True)
+    tmp_path = os.path.join(output, f".part-{part:06d}.parquet.tmp")
+    table = pa.Table.from_pandas(df, schema=_arrow_schema(), preserve_index=False)
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, os.path.join(output, f"part-{part:06d}.parquet"))
+    return 0
+
+
+def written_ids(output: str, state: Dict[str, Any]) -> Set[int]:
+    """Ids déjà présents dans la sortie (jusqu'au dernier point de contrôle)."""
+    if not os.path.exists(output):
+        return set()
+    if output_format(output) == "csv":
+        # Lignes écrites après le dernier point de contrôle (interruption en cours de bloc)
+        with open(output, "r+b") as f:
+            f.truncate(state.get("csv_offset", 0))
+        if state.get("csv_offset", 0) == 0:
+            return set()
+        return set(pd.read_csv(output, usecols=["id"])["id"].astype(int))
+
+    import pyarrow.parquet as pq
+
+    # Blocs écrits après le dernier point de contrôle (interruption entre le renommage
+    # et la sauvegarde) : supprimés, comme la fin du CSV, puis rescorés
+    ids: Set[int] = set()
+    for name in sorted(os.listdir(output)):
+        path = os.path.join(output, name)
+        if name.startswith(".part-"):
+            os.remove(path)
+        elif name.startswith("part-") and name.endswith(".parquet"):
+            if int(name[len("part-"):-len(".parquet")]) >= state.get("next_part", 0):
+                os.remove(path)
+                continue
+            ids.update(pq.read_table(path, columns=["id"])["id"].to_pylist())
+    return ids
+
+
+# ===================== Point de contrôle =====================
+
+def checkpoint_path(output: str) -> str:
+    return f"{output.rstrip(os.sep)}.checkpoint.json"
+
+
+def load_checkpoint(output: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(checkpoint_path(output), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_checkpoint(output: str, state: Dict[str, Any]) -> None:
+    path = checkpoint_path(output)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+# ===================== Scoring (processus du pool) =====================
+
+_worker_model = None
+_worker_pipeline = None
+
+
+def _init_worker(model_dir: str, backend: str) -> None:
+    """Chargé une fois par processus : modèle natif / chemin rapide, sinon pipeline joblib."""
+    global _worker_model, _worker_pipeline
+    _worker_model = load_serving_model(model_dir, backend)
+    if _worker_model is None:
+        import joblib
+
+        _worker_pipeline = (
+            joblib.load(os.path.join(model_dir, PIPELINE_FILENAME)),
+            list(joblib.load(os.path.join(model_dir, TRAIN_COLS_FILENAME))),
+        )
+
+
+def _score_rows(rows: List[Dict[str, Any]]) -> np.ndarray:
+    if _worker_model is not None:
+        return _worker_model.predict_proba_rows(rows)
+    from ml_page import align_features, predict_oscar_proba
+
+    pipeline, train_cols = _worker_pipeline
+    return predict_oscar_proba(pipeline, align_features(rows, train_cols))
+
+
+# ===================== Boucle principale =====================
+
+def _release_year(meta: Dict[str, Any]) -> Optional[int]:
+    year = (meta.get("release_date") or "")[:4]
+    return int(year) if year.isdigit() else None
+
+
+def _results_frame(
+    ids: List[int],
+    rows: Dict[int, Any],
+    probas: Dict[int, float],
+    model_hash: Optional[str],
+) -> pd.DataFrame:
+    metas = [rows[mid][1] for mid in ids]
+    return pd.DataFrame({
+        "id": pd.Series(ids, dtype="int64"),
+        "title": pd.Series([m.get("title") or m.get("original_title") for m in metas], dtype="string"),
+        "year": pd.Series([_release_year(m) for m in metas], dtype="Int16"),
+        "NotesTMDb": pd.Series([rows[mid][0].get("NotesTMDb") for mid in ids], dtype="float64"),
+        "NotesIMDb": pd.Series([rows[mid][0].get("NotesIMDb") for mid in ids], dtype="float64"),
+        "proba_oscar": pd.Series([probas[mid] for mid in ids], dtype="float64"),
+        "model_hash": pd.Series([model_hash] * len(ids), dtype="string"),
+    })[OUTPUT_COLUMNS]
+
+
+def score_file(
+    ids_path: str,
+    output: str,
+    id_column: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    processes: Optional[int] = None,
+    fetch_workers: int = DEFAULT_FETCH_WORKERS,
+    models_dir: str = DEFAULT_MODEL_DIR,
+    model_name: Optional[str] = None,
+    backend: str = DEFAULT_BACKEND,
+    retry_failed: bool = False,
+    overwrite: bool = False,
+) -> Dict[str, Any]:
+    """Score tous les ids du fichier ; renvoie l'état final du point de contrôle."""
+    from feature_store import get_default_feature_store
+    from imdb_client import IMDbClient
+    from ml_page import get_feature_rows
+    from tmdb_client import TMDBClient
+
+    entries, default = read_manifest(models_dir)
+    if (model_name or default) not in entries:
+        raise KeyError(f"Modèle inconnu du registre : {model_name} (disponibles : {', '.join(entries)}).")
+    entry = entries[model_name or default]
+    model_dir = os.path.join(models_dir, entry.path)
+    model_hash = model_version(model_dir)
+    if model_hash is None:
+        raise FileNotFoundError(f"Aucun modèle dans {model_dir}/ (pipeline joblib ou export natif).")
+    if entry.artifact_hash is not None and model_hash != entry.artifact_hash:
+        raise ValueError(f"Artefacts de {entry.name} modifiés depuis leur enregistrement dans le registre.")
+    state = None if overwrite else load_checkpoint(output)
+    if state is None:
+        if os.path.exists(output) and not overwrite:
+            raise FileExistsError(f"{output} existe déjà sans point de contrôle (--overwrite pour l'écraser).")
+        if os.path.isdir(output):
+            for name in os.listdir(output):
+                if name.startswith("part-") or name.startswith(".part-"):
+                    os.remove(os.path.join(output, name))
+        elif os.path.exists(output):
+            os.remove(output)
+        state = {"model_hash": model_hash, "next_part": 0, "csv_offset": 0, "n_scored": 0, "failed": []}
+    elif state.get("model_hash") != model_hash:
+        raise RuntimeError(
+            f"Le point de contrôle a été écrit avec un autre modèle ({state.get('model_hash')}) : "
+            "relancer avec --overwrite."
+        )
+
+    done = written_ids(output, state)
+    skip = done if retry_failed else done | set(state["failed"])
+    if retry_failed:
+        state["failed"] = []
+
+    tmdb_client, imdb_client = TMDBClient(), IMDbClient()
+    store = get_default_feature_store()
+    todo_ids = unique_ids(iter_ids(ids_path, id_column), skip)
+
+    processes = processes or os.cpu_count() or 1
+    pending: deque = deque()
+    start = time.perf_counter()
+    scored_this_run = 0
+
+    def finalize(ids: List[int], rows: Dict[int, Any], cached: Dict[int, float], future: Optional[Future]):
+        nonlocal scored_this_run
+        probas = dict(cached)
+        if future is not None:
+            fresh = {mid: float(p) for mid, p in zip([m for m in ids if m not in cached], future.result())}
+            probas.update(fresh)
+            if store is not None and model_hash:
+                try:
+                    store.put_predictions(model_hash, fresh)
+                except Exception:
+                    pass
+
+        part = state["next_part"]
+        if ids:
+            state["csv_offset"] = write_chunk(output, part, _results_frame(ids, rows, probas, model_hash), state["csv_offset"])
+            state["next_part"] = part + 1
+        state["n_scored"] += len(ids)
+        scored_this_run += len(ids)
+        save_checkpoint(output, state)
+
+        elapsed = time.perf_counter() - start
+        print(
+            f"✅ bloc {part} : {len(ids)} films, {len(state['failed'])} en échec au total, "
+            f"{state['n_scored']} scorés ({scored_this_run / elapsed:.1f} films/s)",
+            flush=True,
+        )
+
+    # spawn : aucun thread de récupération n'est dupliqué dans les processus du pool
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(model_dir, backend),
+    ) as pool:
+        for chunk in chunked(todo_ids, chunk_size):
+            rows, errors = get_feature_rows(tmdb_client, imdb_client, chunk, max_workers=fetch_workers)
+            state["failed"].extend(mid for mid in chunk if mid in errors)
+            ids = [mid for mid in chunk if mid in rows]
+
+            cached: Dict[int, float] = {}
+            if store is not None and model_hash:
+                try:
+                    cached = store.get_predictions(model_hash, ids)
+                except Exception:
+                    cached = {}
+            todo_rows = [rows[mid][0] for mid in ids if mid not in cached]
+            future = pool.submit(_score_rows, todo_rows) if todo_rows else None
+            pending.append((ids, rows, cached, future))
+
+            # Les blocs en cours de scoring laissent le temps de récupérer les suivants
+            while len(pending) > processes:
+                finalize(*pending.popleft())
+
+        while pending:
+            finalize(*pending.popleft())
+
+    state["completed"] = True
+    save_checkpoint(output, state)
+    return state
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Scoring hors ligne d'une liste d'ids TMDB avec le modèle Oscar.")
+    parser.add_argument("ids", help="Fichier d'ids TMDB (texte libre, ou CSV avec --id-column)")
+    parser.add_argument("-o", "--output", required=True, help="Sortie : dossier Parquet, ou fichier .csv")
+    parser.add_argument("--id-column", default=None, help="Colonne des ids si le fichier est un CSV")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--processes", type=int, default=None, help="Processus de scoring (défaut : tous les cœurs)")
+    parser.add_argument("--fetch-workers", type=int, default=DEFAULT_FETCH_WORKERS)
+    parser.add_argument("--models-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--model", default=None, help="Nom du modèle dans models/registry.json (défaut : celui de l'appli)")
+    parser.add_argument("--backend", default=os.getenv("OSCAR_INFERENCE_BACKEND", DEFAULT_BACKEND))
+    parser.add_argument("--retry-failed", action="store_true", help="Retente les films en échec lors d'un précédent passage")
+    parser.add_argument("--overwrite", action="store_true", help="Ignore le point de contrôle et repart de zéro")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    state = score_file(
+        args.ids, args.output,
+        id_column=args.id_column,
+        chunk_size=args.chunk_size,
+        processes=args.processes,
+        fetch_workers=args.fetch_workers,
+        models_dir=args.models_dir,
+        model_name=args.model,
+        backend=args.backend,
+        retry_failed=args.retry_failed,
+        overwrite=args.overwrite,
+    )
+    print(
+        f"✅ {args.output} : {state['n_scored']} films scorés, {len(state['failed'])} en échec "
+        f"({time.perf_counter() - start:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+# search_index.py
+"""
+Index local de recherche de titres (titres + titres originaux de tous les
+films déjà vus par l'appli, ou d'un catalogue ingéré).
+
+- normalisation : casse, accents, ponctuation ("Amélie" == "amelie")
+- trie de préfixes par mot : "dun" -> Dune, Dunkerque...
+- index de trigrammes : correspondance approximative ("parasyte" -> Parasite)
+- classement pondéré par la popularité TMDB
+
+Les films sont persistés (SQLite) pour que l'index survive aux redémarrages ;
+le trie et les trigrammes ne sont construits qu'à la première recherche (un
+process qui ne fait qu'ajouter des films n'en paie pas le coût). Un titre déjà
+connu est servi localement ; une fois un export complet ingéré, l'absence de
+résultat local vaut aussi réponse.
+"""
+
+import argparse
+import gzip
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+DEFAULT_DB_PATH = os.path.join("data", "title_catalog.sqlite")
+
+# Profondeur maximale du trie (au-delà, les préfixes sont assez sélectifs)
+MAX_TRIE_DEPTH = 16
+# Similarité minimale (Dice sur trigrammes) pour un résultat approximatif
+MIN_FUZZY_SCORE = 0.45
+
+# Champs conservés d'un résultat TMDB (format des listes search / popular / now_playing)
+STORED_FIELDS = (
+    "id", "title", "original_title", "release_date", "vote_average", "vote_count",
+    "popularity", "original_language", "genre_ids", "poster_path", "overview", "adult",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS movies (
+    id INTEGER PRIMARY KEY,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Nombre maximal de paramètres d'une requête SQLite (IN (...))
+_MAX_PARAMS = 500
+
+# Clé de meta : date du dernier export TMDB complet ingéré
+CATALOG_INGESTED_KEY = "catalog_ingested_at"
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def fold(text: Optional[str]) -> str:
+    """Minuscules, sans accents ni ponctuation, espaces normalisés."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    no_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", no_accents.casefold()).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleSearchIndex:
+    def __init__(self, db_path: Optional[str] = None):
+        self._movies: Dict[int, Dict[str, Any]] = {}
+        self._folded: Dict[int, List[str]] = {}
+        self._trie: Dict[str, Any] = {}
+        self._trigrams: Dict[str, Set[int]] = {}
+        self._lock = threading.RLock()
+        # Catalogue complet ingéré (sinon : seulement les films déjà vus par l'appli)
+        self.complete = False
+
+        self._conn: Optional[sqlite3.Connection] = None
+        # Films de la base pas encore chargés dans le trie / les trigrammes
+        self._loaded = True
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.executescript(SCHEMA)
+            self._loaded = False
+            self.complete = self._conn.execute(
+                "SELECT 1 FROM meta WHERE key = ?", (CATALOG_INGESTED_KEY,)
+            ).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._movies)
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        for (payload,) in self._conn.execute("SELECT payload FROM movies"):
+            self._index(json.loads(payload))
+        self._loaded = True
+
+    # ---------- Indexation ----------
+    @staticmethod
+    def _merge(movie: Dict[str, Any], previous: Dict[str, Any]) -> Dict[str, Any]:
+        # Fusion avec ce qu'on connaît déjà (un export TMDB n'a pas tous les champs)
+        return {
+            k: movie.get(k) if movie.get(k) is not None else previous.get(k)
+            for k in STORED_FIELDS
+        }
+
+    @staticmethod
+    def _indexable(movie: Dict[str, Any]) -> bool:
+        return movie.get("id") is not None and bool(movie.get("title") or movie.get("original_title"))
+
+    def _index(self, movie: Dict[str, Any]) -> bool:
+        if not self._indexable(movie):
+            return False
+        movie_id = int(movie["id"])
+        self._movies[movie_id] = self._merge(movie, self._movies.get(movie_id, {}))
+
+        titles = {fold(movie.get("title")), fold(movie.get("original_title"))} - {""}
+        known_titles = set(self._folded.get(movie_id, []))
+        new_titles = titles - known_titles
+        self._folded[movie_id] = sorted(known_titles | titles)
+
+        for title in new_titles:
+            for word in title.split():
+                node = self._trie
+                for ch in word[:MAX_TRIE_DEPTH]:
+                    node = node.setdefault(ch, {})
+                    node.setdefault("_ids", set()).add(movie_id)
+            for tri in trigrams(title):
+                self._trigrams.setdefault(tri, set()).add(movie_id)
+        return True
+
+    def add_many(self, movies: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            if self._loaded:
+                to_store = [self._movies[int(m["id"])] for m in movies if self._index(m)]
+            else:
+                # Index pas encore chargé : fusion avec la version stockée, en base seulement
+                to_store = self._merge_stored([m for m in movies if self._indexable(m)])
+            if self._conn is not None and to_store:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO movies (id, payload) VALUES (?, ?)",
+                    [(int(m["id"]), json.dumps(m)) for m in to_store],
+                )
+                self._conn.commit()
+
+    def _merge_stored(self, movies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        merged: Dict[int, Dict[str, Any]] = {}
+        for m in movies:
+            merged[int(m["id"])] = self._merge(m, merged.get(int(m["id"]), {}))
+        ids = list(merged)
+        for start in range(0, len(ids), _MAX_PARAMS):
+            chunk = ids[start:start + _MAX_PARAMS]
+            rows = self._conn.execute(
+                f"SELECT id, payload FROM movies WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for movie_id, payload in rows:
+                merged[movie_id] = self._merge(merged[movie_id], json.loads(payload))
+        return list(merged.values())
+
+    def add(self, movie: Dict[str, Any]) -> None:
+        self.add_many([movie])
+
+    def mark_complete(self) -> None:
+        """Un export complet du catalogue TMDB vient d'être ingéré."""
+        with self._lock:
+            self.complete = True
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, strftime('%s', 'now'))",
+                    (CATALOG_INGESTED_KEY,),
+                )
+                self._conn.commit()
+
+    # ---------- Recherche ----------
+    def _prefix_ids(self, word: str) -> Set[int]:
+        node = self._trie
+        for ch in word[:MAX_TRIE_DEPTH]:
+            node = node.get(ch)
+            if node is None:
+                return set()
+        ids = node.get("_ids", set())
+        if len(word) <= MAX_TRIE_DEPTH:
+            return set(ids)
+        # Mot plus long que le trie : vérification sur les titres
+        return {i for i in ids if any(word in t for t in self._folded[i])}
+
+    def _popularity_boost(self, movie_id: int) -> float:
+        pop = self._movies[movie_id].get("popularity") or 0.0
+        return math.log1p(max(0.0, float(pop))) / 10.0
+
+    @staticmethod
+    def _year_ok(movie: Dict[str, Any], year: Optional[int]) -> bool:
+        if not year:
+            return True
+        return (movie.get("release_date") or "")[:4] == str(year)
+
+    def search(
+        self,
+        query: str,
+        year: Optional[int] = None,
+        limit: int = 20,
+        fuzzy: bool = True,
+        include_adult: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Renvoie des dicts au format TMDB (films pour adultes exclus sauf
+        include_adult), avec en plus :
+          - "_match" : "exact" | "prefix" | "fuzzy"
+          - "_score" : score de classement
+        """
+        q = fold(query)
+        if not q:
+            return []
+        words = q.split()
+
+        with self._lock:
+            self._ensure_loaded()
+            scored: Dict[int, tuple] = {}
+
+            # 1) Préfixes : chaque mot de la requête doit débuter un mot du titre
+            candidates: Optional[Set[int]] = None
+            for w in words:
+                ids = self._prefix_ids(w)
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    break
+            for mid in candidates or ():
+                exact = q in self._folded[mid]
+                base = 3.0 if exact else 2.0
+                scored[mid] = (base + self._popularity_boost(mid), "exact" if exact else "prefix")
+
+            # 2) Trigrammes : fautes de frappe... seulement si les préfixes n'ont rien
+            #    donné (le balayage des trigrammes est bien plus coûteux)
+            if fuzzy and not scored and len(q) >= 3:
+                q_tris = trigrams(q)
+                counts: Dict[int, int] = {}
+                for tri in q_tris:
+                    for mid in self._trigrams.get(tri, ()):
+                        counts[mid] = counts.get(mid, 0) + 1
+                # Dice >= seuil impose un nombre minimal de trigrammes communs
+                min_shared = MIN_FUZZY_SCORE * len(q_tris) / 2
+                for mid, shared in counts.items():
+                    if shared < min_shared:
+                        continue
+                    best = max(
+                        2 * shared / (len(q_tris) + len(trigrams(t))) for t in self._folded[mid]
+                    )
+                    if best >= MIN_FUZZY_SCORE:
+                        scored[mid] = (best + self._popularity_boost(mid), "fuzzy")
+
+            ranked = sorted(
+                (
+                    (score, kind, mid)
+                    for mid, (score, kind) in scored.items()
+                    if self._year_ok(self._movies[mid], year)
+                    and (include_adult or not self._movies[mid].get("adult"))
+                ),
+                key=lambda x: x[0],
+                reverse=True,
+            )[:limit]
+
+            results = []
+            for score, kind, mid in ranked:
+                movie = dict(self._movies[mid])
+                # Les exports TMDB n'ont que le titre original
+                movie["title"] = movie.get("title") or movie.get("original_title")
+                movie["_match"] = kind
+                movie["_score"] = round(score, 4)
+                results.append(movie)
+            return results
+
+
+_default_index: Optional[TitleSearchIndex] = None
+_default_lock = threading.Lock()
+
+
+def get_default_index() -> Optional[TitleSearchIndex]:
+    """Index partagé par le process (persisté dans TITLE_CATALOG_DB ou data/title_catalog.sqlite)."""
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            try:
+                _default_index = TitleSearchIndex(os.getenv("TITLE_CATALOG_DB", DEFAULT_DB_PATH))
+            except (sqlite3.Error, OSError, ValueError):
+                return None
+        return _default_index
+
+
+def ingest_tmdb_export(path: str, index: Optional[TitleSearchIndex] = None, batch_size: int = 20_000) -> int:
+    """
+    Ingère un export quotidien TMDB (movie_ids_MM_DD_YYYY.json.gz : un objet
+    JSON par ligne avec id, original_title, popularity) dans l'index.
+    """
+    index = index or get_default_index()
+    if index is None:
+        raise RuntimeError("Index de titres indisponible.")
+
+    opener = gzip.open if path.endswith(".gz") else open
+    batch: List[Dict[str, Any]] = []
+    total = 0
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                movie = json.loads(line)
+            except ValueError:
+                continue
+            if movie.get("adult"):
+                continue
+            batch.append(movie)
+            if len(batch) >= batch_size:
+                index.add_many(batch)
+                total += len(batch)
+                batch.clear()
+    if batch:
+        index.add_many(batch)
+        total += len(batch)
+    index.mark_complete()
+    return total
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Ingestion d'un export TMDB (JSON lines) dans l'index local de titres."
+    )
+    parser.add_argument("export", help="Chemin vers movie_ids_MM_DD_YYYY.json.gz")
+    args = parser.parse_args(argv)
+
+    n = ingest_tmdb_export(args.export)
+    print(f"✅ {n:,} films indexés")
+
+
+if __name__ == "__main__":
+    main()
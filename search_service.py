@@ -0,0 +1,164 @@
+# search_service.py
+"""
+Service de recherche de films partagé par les pages Comparaison et ML.
+
+- requêtes normalisées (casse, accents, espaces) : "  Amélie" == "amelie"
+- cache LRU + TTL borné, commun à toutes les sessions Streamlit
+- filtre par année réutilisé : "dune" + 2021 est servi en filtrant localement
+  le résultat déjà en cache de "dune" (sans année) quand c'est possible
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+
+from search_index import fold
+from tmdb_client import TMDBClient
+
+DEFAULT_MAXSIZE = 2048
+DEFAULT_TTL_S = 6 * 3600
+GENRE_MAP_TTL_S = 24 * 3600
+
+
+class LRUTTLCache:
+    """Cache LRU borné avec expiration, thread-safe."""
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl_s: float = DEFAULT_TTL_S):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_s, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def normalize_query(query: str) -> str:
+    return fold(query)
+
+
+class SearchService:
+    def __init__(self, tmdb: TMDBClient, cache: Optional[LRUTTLCache] = None):
+        self.tmdb = tmdb
+        self.cache = cache or LRUTTLCache()
+        self._genre_map: Optional[Dict[int, str]] = None
+        self._genre_map_expires = 0.0
+        self._lock = threading.Lock()
+
+    def _key(self, query: str, year: Optional[int]) -> Tuple[str, str, Optional[int]]:
+        return (self.tmdb.language, query, year or None)
+
+    @staticmethod
+    def _filter_year(movies: List[Dict[str, Any]], year: int) -> List[Dict[str, Any]]:
+        return [m for m in movies if (m.get("release_date") or "")[:4] == str(year)]
+
+    def search(self, query: str, year: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Résultats TMDB (format liste /search/movie). La forme normalisée ne sert
+        que de clé de cache : TMDB reçoit la requête telle que saisie.
+        """
+        q = normalize_query(query)
+        if not q:
+            return []
+
+        cached = self.cache.get(self._key(q, year))
+        if cached is not None:
+            return cached
+
+        # Réutilisation du résultat sans année, filtré localement
+        if year:
+            unfiltered = self.cache.get(self._key(q, None))
+            if unfiltered is not None:
+                filtered = self._filter_year(unfiltered, year)
+                if filtered:
+                    self.cache.set(self._key(q, year), filtered)
+                    return filtered
+
+        results = self.tmdb.search_movies(query=query.strip(), year=year)
+        self.cache.set(self._key(q, year), results)
+        return results
+
+    def peek(self, query: str, year: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """Résultats déjà en cache pour cette requête (aucun appel réseau), sinon None."""
+        q = normalize_query(query)
+        if not q:
+            return None
+        cached = self.cache.get(self._key(q, year))
+        if cached is None and year:
+            unfiltered = self.cache.get(self._key(q, None))
+            if unfiltered is not None:
+                cached = self._filter_year(unfiltered, year) or None
+        return cached
+
+    def get_genre_map(self) -> Dict[int, str]:
+        with self._lock:
+            if self._genre_map is None or self._genre_map_expires < time.monotonic():
+                self._genre_map = self.tmdb.get_genre_map()
+                self._genre_map_expires = time.monotonic() + GENRE_MAP_TTL_S
+            return self._genre_map
+
+    def to_df(self, movies: List[Dict[str, Any]]) -> pd.DataFrame:
+        df = self.tmdb.movies_to_dataframe(movies, self.get_genre_map())
+        if df.empty:
+            return df
+        return df.dropna(subset=["title"]).reset_index(drop=True)
+
+    def search_df(self, query: str, year: Optional[int] = None) -> pd.DataFrame:
+        """Mêmes résultats sous forme de DataFrame (format TMDBClient.movies_to_dataframe)."""
+        return self.to_df(self.search(query, year))
+
+
+def refine_results_df(df: pd.DataFrame, query: str) -> pd.DataFrame:
+    """
+    Filtre localement des résultats déjà affichés : chaque mot de la requête
+    doit débuter un mot du titre ou du titre original (sans accents).
+    Sert au "search-as-you-type" quand la nouvelle saisie prolonge l'ancienne.
+    """
+    words = normalize_query(query).split()
+    if df is None or df.empty or not words:
+        return df
+
+    def _matches(row) -> bool:
+        title_words = set(
+            (fold(row.get("title")) + " " + fold(row.get("original_title"))).split()
+        )
+        return all(any(t.startswith(w) for t in title_words) for w in words)
+
+    mask = df.apply(_matches, axis=1)
+    return df[mask].reset_index(drop=True)
+
+
+@st.cache_resource(show_spinner=False)
+def get_search_service(language: str = "fr-FR") -> SearchService:
+    """Instance unique par langue, partagée entre toutes les sessions."""
+    tmdb = TMDBClient(
+        api_key_v3=st.secrets.get("TMDB_API_KEY"),
+        read_token_v4=st.secrets.get("TMDB_API_READ_TOKEN"),
+        language=language,
+    )
+    return SearchService(tmdb)
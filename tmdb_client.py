@@ -1,24 +1,50 @@
 # tmdb_client.py
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import pandas as pd
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable
+
+from id_mapping import IdMappingStore, get_default_store
+from negative_cache import NegativeCache, get_default_negative_cache, NO_DATA
+from latency import LatencyTracker, effective_timeout, hedged_call
+from scheduler import tmdb_scheduler, current_priority
+from search_index import TitleSearchIndex, get_default_index
 
 class TMDBClient:
     BASE_URL = "https://api.themoviedb.org/3"
+    DEFAULT_TIMEOUT = 15
+
+    # Latences observées, partagées par toutes les instances (délai de hedging)
+    latency_tracker = LatencyTracker()
 
     def __init__(
         self,
         api_key_v3: str | None = None,
         read_token_v4: str | None = None,
         language: str = "fr-FR",
+        id_map: IdMappingStore | None = None,
+        negative_cache: NegativeCache | None = None,
+        title_index: TitleSearchIndex | None = None,
     ):
         self.api_key_v3 = api_key_v3 or os.getenv("TMDB_API_KEY")
         self.read_token_v4 = read_token_v4 or os.getenv("TMDB_API_READ_TOKEN")
         if not self.api_key_v3 and not self.read_token_v4:
             raise ValueError("Aucune clé TMDB fournie (v3 ou v4).")
         self.language = language
+        # Table TMDB id <-> IMDb tconst, alimentée à chaque réponse qui contient imdb_id
+        self.id_map = id_map or get_default_store()
+        # Films sans imdb_id connus : pas la peine de redemander /external_ids
+        self.negative_cache = negative_cache or get_default_negative_cache()
+        # Index local des titres déjà vus, ouvert à la première utilisation
+        self._title_index = title_index
+
+    @property
+    def title_index(self) -> TitleSearchIndex | None:
+        if self._title_index is None:
+            self._title_index = get_default_index()
+        return self._title_index
 
     def _get(self, endpoint: str, params: Dict[str, Any] | None = None) -> Dict[str, Any]:
         if params is None:
@@ -33,9 +59,26 @@ class TMDBClient:
             headers["Authorization"] = f"Bearer {self.read_token_v4}"
 
         url = f"{self.BASE_URL}{endpoint}"
-        resp = requests.get(url, params=params, headers=headers)
-        resp.raise_for_status()
-        return resp.json()
+
+        # Priorité lue dans le thread appelant (les envois partent dans un pool)
+        priority = current_priority()
+
+        def _send(timeout: float) -> Dict[str, Any]:
+            with tmdb_scheduler.slot(priority, timeout=timeout):
+                resp = requests.get(url, params=params, headers=headers, timeout=timeout)
+            resp.raise_for_status()
+            return resp.json()
+
+        # Timeout borné par le budget de la page ; doublon si la réponse tarde
+        timeout = effective_timeout(self.DEFAULT_TIMEOUT)
+        return hedged_call(_send, self.latency_tracker, timeout)
+
+    def _remember_titles(self, movies: List[Dict[str, Any]]) -> None:
+        if self.title_index is not None and movies:
+            try:
+                self.title_index.add_many(movies)
+            except Exception:
+                pass
 
     def get_genre_map(self) -> Dict[int, str]:
         data = self._get("/genre/movie/list")
@@ -47,6 +90,7 @@ class TMDBClient:
         for page in range(1, nb_pages + 1):
             data = self._get("/movie/now_playing", params={"page": page})
             results.extend(data.get("results", []))
+        self._remember_titles(results)
         return results
     
     def get_popular_movies(self, nb_pages: int = 3) -> List[Dict[str, Any]]:
@@ -54,11 +98,77 @@ class TMDBClient:
         for page in range(1, nb_pages + 1):
             data = self._get("/movie/popular", params={"page": page})
             results.extend(data.get("results", []))
+        self._remember_titles(results)
         return results
 
+    def _remember_imdb_id(self, movie_id: int, data: Dict[str, Any]) -> None:
+        try:
+            if data.get("imdb_id"):
+                if self.id_map is not None:
+                    self.id_map.record(movie_id, data["imdb_id"])
+            elif self.negative_cache is not None:
+                self.negative_cache.record(f"tmdb:{movie_id}", "imdb_id", NO_DATA)
+        except Exception:
+            pass
+
     def get_movie_details(self, movie_id: int) -> Dict[str, Any]:
         """Détails complets d'un film (budget, revenue, runtime, etc.)."""
-        return self._get(f"/movie/{movie_id}")
+        data = self._get(f"/movie/{movie_id}")
+        self._remember_imdb_id(movie_id, data)
+        return data
+
+    def get_movie_external_ids(self, movie_id: int) -> Dict[str, Any]:
+        """Identifiants externes d'un film (imdb_id, wikidata_id, ...)."""
+        data = self._get(f"/movie/{movie_id}/external_ids")
+        self._remember_imdb_id(movie_id, data)
+        return data
+
+    def get_known_imdb_id(self, movie_id: int) -> str | None:
+        """tconst déjà connu localement pour ce film (aucun appel réseau)."""
+        if self.id_map is None:
+            return None
+        try:
+            return self.id_map.get_imdb_id(movie_id)
+        except Exception:
+            return None
+
+    def resolve_imdb_ids(
+        self,
+        movie_ids: Iterable[int],
+        fetch_missing: bool = True,
+        max_workers: int = 8,
+    ) -> Dict[int, str]:
+        """
+        Résolution en masse TMDB id -> IMDb tconst.
+        Les films déjà vus sont servis par la table locale ; les autres passent
+        (si fetch_missing) par /external_ids, en parallèle.
+        """
+        ids = [int(m) for m in movie_ids if m is not None]
+        resolved: Dict[int, str] = {}
+        if self.id_map is not None:
+            try:
+                resolved.update(self.id_map.resolve_many(ids))
+            except Exception:
+                pass
+
+        missing = [m for m in ids if m not in resolved]
+        if fetch_missing and self.negative_cache is not None:
+            missing = [
+                m for m in missing
+                if not self.negative_cache.is_negative(f"tmdb:{m}", "imdb_id")
+            ]
+        if fetch_missing and missing:
+            def _fetch(mid: int) -> str | None:
+                try:
+                    return self.get_movie_external_ids(mid).get("imdb_id")
+                except Exception:
+                    return None
+
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                for mid, imdb_id in zip(missing, pool.map(_fetch, missing)):
+                    if imdb_id:
+                        resolved[mid] = imdb_id
+        return resolved
 
     def movies_to_dataframe(self, movies: List[Dict[str, Any]], genre_map: Dict[int, str]) -> pd.DataFrame:
         rows = []
@@ -89,6 +199,7 @@ class TMDBClient:
         for page in range(1, nb_pages + 1):
             data = self._get(f"/movie/{movie_id}/recommendations", params={"page": page})
             results.extend(data.get("results", []))
+        self._remember_titles(results)
         return results
 
     @staticmethod
@@ -103,10 +214,25 @@ class TMDBClient:
         year: int | None = None,
         page: int = 1,
         include_adult: bool = False,
+        use_local_index: bool = True,
     ) -> List[Dict[str, Any]]:
         """
         Recherche de films par titre.
+        Les titres exacts / préfixes déjà connus de l'index local sont servis sans
+        appel TMDB. Sans résultat local, TMDB n'est interrogé que si le catalogue
+        complet n'a pas été ingéré (ou pour les films pour adultes, absents de l'export).
         """
+        if use_local_index and page == 1 and self.title_index is not None:
+            local = [
+                m
+                for m in self.title_index.search(query, year=year, include_adult=include_adult)
+                if m["_match"] in ("exact", "prefix")
+            ]
+            if local:
+                return local
+            if self.title_index.complete and not include_adult:
+                return []
+
         params: Dict[str, Any] = {
             "query": query,
             "page": page,
@@ -116,8 +242,10 @@ class TMDBClient:
             params["year"] = year
 
         data = self._get("/search/movie", params=params)
-        return data.get("results", [])
-    
+        results = data.get("results", [])
+        self._remember_titles(results)
+        return results
+
     def get_movie_credits(self, movie_id: int) -> Dict[str, Any]:
         """
         Crédits du film : casting, équipe, etc.
@@ -0,0 +1,260 @@
+# train_model.py
+"""
+Entraînement reproductible du modèle Oscar à partir de data/oscars_features.csv.
+
+    python train_model.py                 # entraîne + écrit models/versions/<version>/
+    python train_model.py --promote       # ... et remplace le modèle servi par l'appli
+
+- dataset typé et compact (oscar_dataset : Parquet, sinon CSV converti)
+- mêmes colonnes que build_features_for_movie (ml_page) : oscar_train_cols.joblib
+- XGBoost "hist" sur tous les cœurs
+- validation croisée groupée par année de cérémonie (les films d'une même année
+  ne sont jamais à la fois en train et en validation), folds en parallèle,
+  early stopping sur des années réservées dans la partie train de chaque fold
+  (le fold de validation ne sert qu'aux métriques)
+- modèle final réentraîné sur tout le dataset avec le nombre d'arbres retenu
+- artefacts versionnés (pipeline, colonnes, métriques), graines fixées
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from oscar_dataset import AWARD_COLS, GENRE_COLS, load_oscar_dataset
+
+DEFAULT_CSV_PATH = os.path.join("data", "oscars_features.csv")
+MODELS_DIR = "models"
+VERSIONS_DIR = os.path.join(MODELS_DIR, "versions")
+
+TARGET = "Oscar"
+GROUP = "year"
+SCORE_COLS = ["NotesTMDb", "Runtime", "NotesIMDb", "NotesRottenTomatoes", "NotesMetacritic", "nomination_count"]
+
+# Ordre des colonnes du modèle : identique à celui de build_features_for_movie.
+# "Unnamed: 0.2" est l'index de ligne du CSV d'origine ; l'appli le met à 0,
+# on fait donc de même à l'entraînement (sinon le modèle apprend l'ordre du fichier).
+TRAIN_COLS = ["Unnamed: 0.2", *AWARD_COLS, *SCORE_COLS, *GENRE_COLS]
+
+# Hyperparamètres du modèle d'origine ; n_estimators est un plafond (early stopping)
+XGB_PARAMS: Dict[str, Any] = {
+    "objective": "binary:logistic",
+    "eval_metric": "logloss",
+    "tree_method": "hist",
+    "learning_rate": 0.05434166483902448,
+    "max_depth": 10,
+    "min_child_weight": 1,
+    "subsample": 0.9621111548324811,
+    "colsample_bytree": 0.7689766678803608,
+    "n_estimators": 1000,
+}
+EARLY_STOPPING_ROUNDS = 50
+# Part des années d'entraînement d'un fold réservée à l'early stopping
+EARLY_STOPPING_FRACTION = 0.2
+RANDOM_STATE = 42
+
+
+# ===================== Données =====================
+
+def load_training_frame(csv_path: str = DEFAULT_CSV_PATH) -> pd.DataFrame:
+    """Dataset historique typé (Parquet si à jour), limité aux colonnes utiles."""
+    return load_oscar_dataset(
+        columns=[GROUP, TARGET, *AWARD_COLS, *SCORE_COLS, *GENRE_COLS],
+        csv_path=csv_path,
+    )
+
+
+def build_training_matrix(df: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    """(X aligné sur TRAIN_COLS, y, année de cérémonie pour le groupage)."""
+    X = df.reindex(columns=TRAIN_COLS, fill_value=0).astype("float32")
+    X["Unnamed: 0.2"] = 0.0
+    y = df[TARGET].to_numpy(dtype=np.int8)
+    groups = df[GROUP].to_numpy()
+    return X, y, groups
+
+
+def dataset_hash(csv_path: str) -> str:
+    h = hashlib.sha256()
+    with open(csv_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:8]
+
+
+# ===================== Modèle =====================
+
+def make_pipeline(n_estimators: int, n_jobs: int, early_stopping: bool = False):
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+    from xgboost import XGBClassifier
+
+    params = {**XGB_PARAMS, "n_estimators": n_estimators}
+    if early_stopping:
+        params["early_stopping_rounds"] = EARLY_STOPPING_ROUNDS
+    return Pipeline([
+        ("imputer", SimpleImputer(strategy="median")),
+        ("scaler", StandardScaler()),
+        ("model", XGBClassifier(**params, n_jobs=n_jobs, random_state=RANDOM_STATE)),
+    ])
+
+
+def _fit_fold(
+    X: pd.DataFrame, y: np.ndarray, groups: np.ndarray, train_idx, val_idx, n_jobs: int
+) -> Dict[str, Any]:
+    from sklearn.metrics import log_loss, roc_auc_score
+    from sklearn.model_selection import GroupShuffleSplit
+
+    # Années d'arrêt prises dans la partie train : val_idx reste hors de tout choix
+    inner = GroupShuffleSplit(n_splits=1, test_size=EARLY_STOPPING_FRACTION, random_state=RANDOM_STATE)
+    fit_pos, stop_pos = next(inner.split(train_idx, groups=groups[train_idx]))
+    fit_idx, stop_idx = train_idx[fit_pos], train_idx[stop_pos]
+
+    pipeline = make_pipeline(XGB_PARAMS["n_estimators"], n_jobs, early_stopping=True)
+    pre = pipeline[:-1]
+    X_fit = pre.fit_transform(X.iloc[fit_idx])
+    X_stop = pre.transform(X.iloc[stop_idx])
+    X_val = pre.transform(X.iloc[val_idx])
+
+    model = pipeline.named_steps["model"]
+    model.fit(X_fit, y[fit_idx], eval_set=[(X_stop, y[stop_idx])], verbose=False)
+    proba = model.predict_proba(X_val)[:, 1]
+
+    fold = {
+        "best_iteration": int(model.best_iteration),
+        "logloss": float(log_loss(y[val_idx], proba, labels=[0, 1])),
+        "n_val": int(len(val_idx)),
+    }
+    if len(np.unique(y[val_idx])) > 1:
+        fold["auc"] = float(roc_auc_score(y[val_idx], proba))
+    return fold
+
+
+def cross_validate(
+    X: pd.DataFrame,
+    y: np.ndarray,
+    groups: np.ndarray,
+    n_splits: int = 5,
+    n_jobs: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Validation croisée groupée par année, folds entraînés en parallèle
+    (les cœurs sont répartis entre folds : pas de sur-souscription).
+    """
+    from joblib import Parallel, delayed
+    from sklearn.model_selection import GroupKFold
+
+    n_cpu = n_jobs or os.cpu_count() or 1
+    workers = max(1, min(n_splits, n_cpu))
+    threads_per_fold = max(1, n_cpu // workers)
+
+    splits = GroupKFold(n_splits=n_splits).split(X, y, groups)
+    return Parallel(n_jobs=workers, prefer="threads")(
+        delayed(_fit_fold)(X, y, groups, train_idx, val_idx, threads_per_fold)
+        for train_idx, val_idx in splits
+    )
+
+
+def train(
+    csv_path: str = DEFAULT_CSV_PATH,
+    n_splits: int = 5,
+    n_jobs: Optional[int] = None,
+) -> Tuple[Any, Dict[str, Any]]:
+    """Entraîne le pipeline final ; renvoie (pipeline, métriques)."""
+    start = time.perf_counter()
+    df = load_training_frame(csv_path)
+    X, y, groups = build_training_matrix(df)
+
+    folds = cross_validate(X, y, groups, n_splits=n_splits, n_jobs=n_jobs)
+    n_estimators = int(np.median([f["best_iteration"] for f in folds])) + 1
+
+    pipeline = make_pipeline(n_estimators, n_jobs or -1)
+    pipeline.fit(X, y)
+
+    aucs = [f["auc"] for f in folds if "auc" in f]
+    metrics = {
+        "dataset": os.path.basename(csv_path),
+        "dataset_hash": dataset_hash(csv_path),
+        "n_rows": int(len(df)),
+        "n_positive": int(y.sum()),
+        "years": [int(groups.min()), int(groups.max())],
+        "cv": "GroupKFold by year, early stopping on held-out training years",
+        "folds": folds,
+        "cv_logloss": float(np.mean([f["logloss"] for f in folds])),
+        "cv_auc": float(np.mean(aucs)) if aucs else None,
+        "n_estimators": n_estimators,
+        "params": {**XGB_PARAMS, "n_estimators": n_estimators, "random_state": RANDOM_STATE},
+        "train_seconds": round(time.perf_counter() - start, 2),
+    }
+    return pipeline, metrics
+
+
+# ===================== Artefacts =====================
+
+def save_version(pipeline, metrics: Dict[str, Any], versions_dir: str = VERSIONS_DIR) -> str:
+    """Écrit models/versions/<date>-<hash dataset>/ et renvoie ce dossier."""
+    import joblib
+
+    version = f"{datetime.now(timezone.utc):%Y%m%d-%H%M%S}-{metrics['dataset_hash']}"
+    out_dir = os.path.join(versions_dir, version)
+    os.makedirs(out_dir, exist_ok=True)
+
+    joblib.dump(pipeline, os.path.join(out_dir, "oscar_pipeline.joblib"))
+    joblib.dump(list(TRAIN_COLS), os.path.join(out_dir, "oscar_train_cols.joblib"))
+    with open(os.path.join(out_dir, "metrics.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": version, **metrics}, f, ensure_ascii=False, indent=1)
+    return out_dir
+
+
+def promote(version_dir: str, models_dir: str = MODELS_DIR) -> None:
+    """Fait servir cette version par l'appli (modèle natif réexporté, registre mis à jour)."""
+    from feature_store import file_sha256
+    from oscar_model import FastOscarModel, export_native
+
+    for name in ("oscar_pipeline.joblib", "oscar_train_cols.joblib"):
+        shutil.copyfile(os.path.join(version_dir, name), os.path.join(models_dir, name))
+
+    import joblib
+
+    pipeline_path = os.path.join(models_dir, "oscar_pipeline.joblib")
+    model = FastOscarModel.from_pipeline(joblib.load(pipeline_path), list(TRAIN_COLS))
+    export_native(model, models_dir, source_hash=file_sha256(pipeline_path))
+
+    # Le manifeste du registre suit les nouveaux artefacts (hash = clé du cache de prédictions)
+    from model_registry import refresh_path
+
+    refresh_path(".", models_dir, version=os.path.basename(os.path.normpath(version_dir)))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Entraînement du modèle Oscar (XGBoost hist, CV par année).")
+    parser.add_argument("--csv", default=DEFAULT_CSV_PATH)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=None, help="Cœurs utilisés (défaut : tous)")
+    parser.add_argument("--promote", action="store_true", help="Remplace le modèle servi par l'appli")
+    args = parser.parse_args(argv)
+
+    pipeline, metrics = train(args.csv, n_splits=args.folds, n_jobs=args.jobs)
+    out_dir = save_version(pipeline, metrics)
+
+    auc = metrics["cv_auc"]
+    print(
+        f"✅ {out_dir} : {metrics['n_estimators']} arbres, "
+        f"logloss CV {metrics['cv_logloss']:.4f}"
+        + (f", AUC CV {auc:.4f}" if auc is not None else "")
+        + f" ({metrics['train_seconds']:.1f}s)"
+    )
+    if args.promote:
+        promote(out_dir)
+        print(f"✅ Modèle promu dans {MODELS_DIR}/")
+
+
+if __name__ == "__main__":
+    main()